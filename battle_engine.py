@@ -0,0 +1,470 @@
+import math
+from array import array
+from typing import Optional
+
+try:
+    # numpy 为可选依赖，未安装时使用标准库 array 逐回合结算
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# 伤害判定：每次攻击抽取 1~100 的判定值，大于 80 暴击(伤害 ×1.5~1.8)，小于 20 失手(伤害 ×0.5~0.7)，
+# 其余正常命中；最终伤害向下取整且至少为 1
+CRIT_ROLL = 80
+MISS_ROLL = 20
+CRIT_EXPLAIN = "💥暴击！"
+MISS_EXPLAIN = "🤦‍♂️失手了！"
+
+# 怪物狂暴：生命值低于 30% 时每回合有 40% 概率狂暴，攻击力提升 50%，之后每次攻击吸取 30% 伤害的生命值
+BERSERK_HP_RATIO = 0.3
+BERSERK_PROBABILITY = 0.4
+BERSERK_ATTACK_MULTIPLIER = 1.5
+LIFE_STEAL_RATIO = 0.3
+
+# 一批回合数少于该值时使用标准库逐回合结算(numpy 的固定开销在短战斗中并不划算)
+VECTOR_MIN_ROUNDS = 48
+
+
+def base_damage(attack: int, defense: int) -> int:
+    """计算减伤后的基础伤害(至少为1)"""
+    damage_reduction = min(defense / 1000, 0.8)
+    return max(1, int(attack * (1 - damage_reduction)))
+
+
+class DamageRolls:
+    """
+    预先抽取的一组伤害判定：
+        每次攻击对应一个 1~100 的判定值和一个 [0, 1) 的浮动系数，
+        可以按任意基础伤害批量换算成最终伤害(判定规则见 CRIT_ROLL/MISS_ROLL)
+    """
+
+    def __init__(self, rng, count: int):
+        """
+        :param rng: random.Random 实例(来自随机数服务)
+        :param count: 抽取的次数
+        """
+        self.count = count
+        # 次数较少时直接使用标准库，避免 numpy 的固定开销
+        self.vectorized = np is not None and count >= VECTOR_MIN_ROUNDS
+        if self.vectorized:
+            generator = np.random.default_rng(rng.getrandbits(64))
+            self.rolls = generator.integers(1, 101, count)
+            self.factors = generator.random(count)
+        else:
+            random = rng.random
+            self.rolls = array('b', (int(random() * 100) + 1 for _ in range(count)))
+            self.factors = array('d', (random() for _ in range(count)))
+
+    def damages(self, base: int):
+        """按基础伤害换算出每次攻击的最终伤害"""
+        if self.vectorized:
+            crit = np.floor(base * (1.5 + 0.3 * self.factors))
+            miss = np.maximum(1, np.floor(base * (0.5 + 0.2 * self.factors)))
+            damages = np.where(self.rolls > CRIT_ROLL, crit, np.where(self.rolls < MISS_ROLL, miss, base))
+            return np.maximum(damages, 1).astype(np.int64)
+        return array('q', (
+            max(1, int(base * (1.5 + 0.3 * factor))) if roll > CRIT_ROLL
+            else max(1, int(base * (0.5 + 0.2 * factor))) if roll < MISS_ROLL
+            else base
+            for roll, factor in zip(self.rolls, self.factors)
+        ))
+
+    def explain(self, index: int) -> str:
+        """第 index 次攻击的判定说明(暴击/失手)"""
+        roll = self.rolls[index]
+        if roll > CRIT_ROLL:
+            return CRIT_EXPLAIN
+        if roll < MISS_ROLL:
+            return MISS_EXPLAIN
+        return ""
+
+
+def _first(mask) -> Optional[int]:
+    """布尔数组中第一个 True 的下标"""
+    index = np.flatnonzero(mask)
+    return int(index[0]) if index.size else None
+
+
+class _PveChunk:
+    """一批回合的预抽随机数"""
+
+    def __init__(self, rng, count: int, player_base: int):
+        self.count = count
+        self.player_rolls = DamageRolls(rng, count)
+        self.monster_rolls = DamageRolls(rng, count)
+        self.vectorized = self.player_rolls.vectorized
+        if self.vectorized:
+            self.chances = np.random.default_rng(rng.getrandbits(64)).random(count)
+        else:
+            self.chances = array('d', (rng.random() for _ in range(count)))
+        self.player = self.player_rolls.damages(player_base)
+        # 基础伤害 -> 怪物伤害数组(狂暴后基础伤害会变化)
+        self._monster = {}
+
+    def monster(self, base: int):
+        damages = self._monster.get(base)
+        if damages is None:
+            damages = self.monster_rolls.damages(base)
+            self._monster[base] = damages
+        return damages
+
+
+class PveBattle:
+    """
+    玩家对怪物的战斗结算：
+        1) 按批次预先抽取双方的伤害判定与狂暴判定
+        2) 只有需要写入战报的前几个回合逐回合结算并生成文字
+        3) 其余回合使用累加和(numpy)直接定位怪物死亡、狂暴、吸血回满与玩家死亡的回合
+    结算结果(回合数、剩余生命值、总伤害)与逐回合循环完全一致。
+    """
+
+    def __init__(self, rng, player: dict, monster: dict, keep_log: bool = True, report_rounds: int = 0):
+        """
+        :param rng: random.Random 实例(来自随机数服务)
+        :param player: 玩家属性 {'name', 'hp', 'attack', 'defense'}
+        :param monster: 怪物属性 {'name', 'hp', 'max_hp', 'attack', 'defense'}
+        :param keep_log: 是否记录战斗日志
+        :param report_rounds: 写入战报的回合数
+        """
+        self.rng = rng
+        self.player_name = player['name']
+        self.player_hp = int(player['hp'])
+        self.player_attack = int(player['attack'])
+        self.player_defense = int(player['defense'])
+        self.monster_name = monster['name']
+        self.monster_hp = int(monster['hp'])
+        self.monster_max_hp = int(monster['max_hp'])
+        self.monster_attack = int(monster['attack'])
+        self.monster_defense = int(monster['defense'])
+        self.keep_log = keep_log
+        self.report_rounds = report_rounds if keep_log else 0
+
+        self.round_num = 1
+        self.is_berserk = False
+        self.player_total_damage = 0
+        self.monster_total_damage = 0
+        # 任意一方一开始就没有生命值时不进行战斗
+        self.finished = self.player_hp <= 0 or self.monster_hp <= 0
+        self.log = []
+        self.important_events = []
+
+    def run(self) -> dict:
+        """
+        执行战斗。
+
+        :return: {'round_num', 'player_hp', 'monster_hp', 'player_total_damage',
+                  'monster_total_damage', 'is_berserk', 'log', 'important_events'}
+        """
+        player_base = base_damage(self.player_attack, self.monster_defense)
+        # 预估战斗回合数，之后不够再翻倍追加(怪物每回合至少造成1点伤害，回合数不会超过玩家生命值)
+        estimate = min(
+            math.ceil(self.monster_hp / player_base),
+            math.ceil(self.player_hp / base_damage(self.monster_attack, self.player_defense))
+        )
+        count = max(8, 2 * estimate)
+        while not self.finished:
+            count = max(1, min(count, self.player_hp))
+            chunk = _PveChunk(self.rng, count, player_base)
+            index = 0
+            while index < count and not self.finished:
+                if not chunk.vectorized or self.round_num <= self.report_rounds:
+                    self._step(chunk, index)
+                    index += 1
+                else:
+                    index = self._advance(chunk, index)
+            count *= 2
+
+        return {
+            'round_num': self.round_num,
+            'player_hp': self.player_hp,
+            'monster_hp': self.monster_hp,
+            'player_total_damage': self.player_total_damage,
+            'monster_total_damage': self.monster_total_damage,
+            'is_berserk': self.is_berserk,
+            'log': self.log,
+            'important_events': self.important_events,
+        }
+
+    def _monster_base(self) -> int:
+        return base_damage(self.monster_attack, self.player_defense)
+
+    def _enter_berserk(self, report: bool) -> None:
+        self.is_berserk = True
+        # 提升怪物伤害
+        self.monster_attack = int(self.monster_attack * BERSERK_ATTACK_MULTIPLIER)
+        if report:
+            self.log.append(f"💢 {self.monster_name}进入狂暴状态！")
+        elif self.keep_log:
+            self.important_events.append(f"第{self.round_num}回合: {self.monster_name}进入狂暴状态！")
+
+    def _step(self, chunk: _PveChunk, index: int) -> None:
+        """逐回合结算一个回合"""
+        report = self.round_num <= self.report_rounds
+        if report:
+            self.log.append(f"\n第{self.round_num}回合")
+
+        # 玩家攻击
+        damage = int(chunk.player[index])
+        self.monster_hp -= damage
+        self.player_total_damage += damage
+        if report:
+            self.log.append(f"{chunk.player_rolls.explain(index)} [{self.player_name}] 对 [{self.monster_name}] 造成 {damage} 点伤害")
+        if self.monster_hp <= 0:
+            self.finished = True
+            return
+
+        # 检查怪物是否进入狂暴状态
+        if (not self.is_berserk and self.monster_hp < self.monster_max_hp * BERSERK_HP_RATIO
+                and chunk.chances[index] < BERSERK_PROBABILITY):
+            self._enter_berserk(report)
+
+        # 怪物反击
+        damage = int(chunk.monster(self._monster_base())[index])
+        self.player_hp -= damage
+        self.monster_total_damage += damage
+        if self.is_berserk:
+            # 狂暴状态下吸血
+            life_steal = int(damage * LIFE_STEAL_RATIO)
+            self.monster_hp = min(self.monster_max_hp, self.monster_hp + life_steal)
+            if report:
+                self.log.append(f"{chunk.monster_rolls.explain(index)} [{self.monster_name}] 对 [{self.player_name}] 造成 {damage} 点伤害，并吸取了 {life_steal} 点生命值")
+        elif report:
+            self.log.append(f"{chunk.monster_rolls.explain(index)} [{self.monster_name}] 对 [{self.player_name}] 造成 {damage} 点伤害")
+
+        self.round_num += 1
+        if self.player_hp <= 0:
+            self.finished = True
+
+    def _advance(self, chunk: _PveChunk, index: int) -> int:
+        """
+        使用累加和一次性结算 chunk[index:] 中的回合，直到出现需要逐回合处理的事件。
+
+        :return: 下一个待结算的下标
+        """
+        player = chunk.player[index:]
+        monster = chunk.monster(self._monster_base())[index:]
+        player_sum = np.cumsum(player)
+        monster_sum = np.cumsum(monster)
+        # 玩家攻击后怪物的生命值 / 怪物攻击后玩家的生命值
+        player_after = self.player_hp - monster_sum
+
+        if not self.is_berserk:
+            monster_after = self.monster_hp - player_sum
+            monster_dead = _first(monster_after <= 0)
+            berserk = _first((monster_after < self.monster_max_hp * BERSERK_HP_RATIO)
+                             & (chunk.chances[index:] < BERSERK_PROBABILITY))
+            player_dead = _first(player_after <= 0)
+            # 同一回合内的先后顺序：怪物死亡 -> 狂暴 -> 玩家死亡
+            events = [(k, order) for order, k in enumerate((monster_dead, berserk, player_dead)) if k is not None]
+            life_steal = None
+        else:
+            life_steal = np.floor(monster * LIFE_STEAL_RATIO).astype(np.int64)
+            steal_sum = np.cumsum(life_steal)
+            monster_after = self.monster_hp - player_sum + (steal_sum - life_steal)
+            monster_dead = _first(monster_after <= 0)
+            player_dead = _first(player_after <= 0)
+            # 吸血后超过生命上限的回合需要截断，之后的累加和不再成立
+            capped = _first(monster_after + life_steal > self.monster_max_hp)
+            # 同一回合内的先后顺序：怪物死亡 -> 玩家死亡 -> 吸血截断
+            events = [(k, order) for order, k in enumerate((monster_dead, player_dead, capped)) if k is not None]
+
+        if not events:
+            # 这一批回合内没有任何事件
+            last = len(player) - 1
+            self._settle(player_sum, monster_sum, last, last)
+            self.monster_hp = int(monster_after[last])
+            if life_steal is not None:
+                self.monster_hp += int(life_steal[last])
+            self.player_hp = int(player_after[last])
+            self.round_num += last + 1
+            return chunk.count
+
+        k, order = min(events)
+        if order == 0:
+            # 玩家在第 k 个回合击败怪物，怪物没有反击
+            self._settle(player_sum, monster_sum, k, k - 1)
+            self.monster_hp = int(monster_after[k])
+            if k > 0:
+                self.player_hp = int(player_after[k - 1])
+            self.round_num += k
+            self.finished = True
+            return index + k + 1
+
+        if not self.is_berserk and order == 1:
+            # 第 k 个回合进入狂暴，该回合之后的伤害基数改变，交给逐回合结算
+            if k > 0:
+                self._settle(player_sum, monster_sum, k - 1, k - 1)
+                self.monster_hp = int(monster_after[k - 1])
+                self.player_hp = int(player_after[k - 1])
+                self.round_num += k
+            self._step(chunk, index + k)
+            return index + k + 1
+
+        self._settle(player_sum, monster_sum, k, k)
+        self.player_hp = int(player_after[k])
+        self.monster_hp = int(monster_after[k])
+        if life_steal is not None:
+            self.monster_hp = min(self.monster_max_hp, self.monster_hp + int(life_steal[k]))
+        self.round_num += k + 1
+        if self.player_hp <= 0:
+            self.finished = True
+        return index + k + 1
+
+    def _settle(self, player_sum, monster_sum, player_last: int, monster_last: int) -> None:
+        """累加玩家/怪物在已结算回合内造成的伤害"""
+        if player_last >= 0:
+            self.player_total_damage += int(player_sum[player_last])
+        if monster_last >= 0:
+            self.monster_total_damage += int(monster_sum[monster_last])
+
+
+class _DuelChunk:
+    """一批回合的预抽随机数(双方伤害 + 先手)"""
+
+    def __init__(self, rng, count: int, base_1: int, base_2: int):
+        self.count = count
+        self.rolls_1 = DamageRolls(rng, count)
+        self.rolls_2 = DamageRolls(rng, count)
+        self.vectorized = self.rolls_1.vectorized
+        self.damage_1 = self.rolls_1.damages(base_1)
+        self.damage_2 = self.rolls_2.damages(base_2)
+        if self.vectorized:
+            self.first_1 = np.random.default_rng(rng.getrandbits(64)).random(count) < 0.5
+        else:
+            self.first_1 = array('b', (rng.random() < 0.5 for _ in range(count)))
+
+
+class PvpDuel:
+    """
+    玩家之间的对决结算：
+        1) 按批次预先抽取双方每回合的伤害判定与先手判定
+        2) 只有需要写入战报的前几个回合逐回合结算并生成文字
+        3) 其余回合使用累加和(numpy)直接定位第一个致命回合，同一回合双方都致命时由先手决定胜负
+    不记录日志时可以直接用于批量模拟(例如锦标赛)。
+    """
+
+    def __init__(self, rng, fighter_1: dict, fighter_2: dict, keep_log: bool = True, report_rounds: int = 0):
+        """
+        :param rng: random.Random 实例(来自随机数服务)
+        :param fighter_1: 发起挑战的玩家属性 {'name', 'hp', 'attack', 'defense'}
+        :param fighter_2: 接受挑战的玩家属性 {'name', 'hp', 'attack', 'defense'}
+        :param keep_log: 是否记录战斗日志
+        :param report_rounds: 写入战报的回合数
+        """
+        self.rng = rng
+        self.names = (fighter_1['name'], fighter_2['name'])
+        self.hp = [int(fighter_1['hp']), int(fighter_2['hp'])]
+        self.total_damage = [0, 0]
+        self.base_1 = base_damage(int(fighter_1['attack']), int(fighter_2['defense']))
+        self.base_2 = base_damage(int(fighter_2['attack']), int(fighter_1['defense']))
+        self.report_rounds = report_rounds if keep_log else 0
+
+        self.round_num = 1
+        # 任意一方一开始就没有生命值时不进行战斗
+        self.winner = None
+        if self.hp[0] <= 0 or self.hp[1] <= 0:
+            self.winner = 1 if self.hp[1] <= 0 else 2
+        self.log = []
+
+    def run(self) -> dict:
+        """
+        执行对决。
+
+        :return: {'round_num', 'winner'(1 或 2), 'hp_1', 'hp_2', 'total_damage_1', 'total_damage_2', 'log'}
+        """
+        # 预估回合数，之后不够再翻倍追加(每次攻击至少造成1点伤害，回合数不会超过双方较低的生命值)
+        estimate = min(math.ceil(self.hp[1] / self.base_1), math.ceil(self.hp[0] / self.base_2))
+        count = max(8, 2 * estimate)
+        while self.winner is None:
+            count = max(1, min(count, self.hp[0], self.hp[1]))
+            chunk = _DuelChunk(self.rng, count, self.base_1, self.base_2)
+            index = 0
+            while index < count and self.winner is None:
+                if not chunk.vectorized or self.round_num <= self.report_rounds:
+                    self._step(chunk, index)
+                    index += 1
+                else:
+                    index = self._advance(chunk, index)
+            count *= 2
+
+        return {
+            'round_num': self.round_num,
+            'winner': self.winner,
+            'hp_1': self.hp[0],
+            'hp_2': self.hp[1],
+            'total_damage_1': self.total_damage[0],
+            'total_damage_2': self.total_damage[1],
+            'log': self.log,
+        }
+
+    def _hit(self, chunk: _DuelChunk, index: int, attacker: int, report: bool) -> bool:
+        """attacker(0/1) 发动一次攻击，返回对方是否被击败"""
+        defender = 1 - attacker
+        if attacker == 0:
+            damage, rolls = int(chunk.damage_1[index]), chunk.rolls_1
+        else:
+            damage, rolls = int(chunk.damage_2[index]), chunk.rolls_2
+        self.hp[defender] -= damage
+        self.total_damage[attacker] += damage
+        if report:
+            self.log.append(f"{rolls.explain(index)}{self.names[attacker]}对{self.names[defender]}造成 {damage} 点伤害")
+        if self.hp[defender] <= 0:
+            self.winner = attacker + 1
+            return True
+        return False
+
+    def _step(self, chunk: _DuelChunk, index: int) -> None:
+        """逐回合结算一个回合"""
+        report = self.round_num <= self.report_rounds
+        if report:
+            self.log.append(f"\n第{self.round_num}回合")
+        first = 0 if chunk.first_1[index] else 1
+        if self._hit(chunk, index, first, report) or self._hit(chunk, index, 1 - first, report):
+            return
+        self.round_num += 1
+
+    def _advance(self, chunk: _DuelChunk, index: int) -> int:
+        """
+        使用累加和一次性结算 chunk[index:] 中的回合，直到有一方被击败。
+
+        :return: 下一个待结算的下标
+        """
+        damage_sum_1 = np.cumsum(chunk.damage_1[index:])
+        damage_sum_2 = np.cumsum(chunk.damage_2[index:])
+        hp_1 = self.hp[0] - damage_sum_2
+        hp_2 = self.hp[1] - damage_sum_1
+        dead_1 = _first(hp_1 <= 0)
+        dead_2 = _first(hp_2 <= 0)
+
+        if dead_1 is None and dead_2 is None:
+            last = len(hp_1) - 1
+            self.hp = [int(hp_1[last]), int(hp_2[last])]
+            self.total_damage[0] += int(damage_sum_1[last])
+            self.total_damage[1] += int(damage_sum_2[last])
+            self.round_num += last + 1
+            return chunk.count
+
+        # 第一个致命回合，双方在同一回合都会被击败时由先手决定
+        k = min(k for k in (dead_1, dead_2) if k is not None)
+        first_1 = bool(chunk.first_1[index + k])
+        if dead_2 == k and (dead_1 != k or first_1):
+            # 玩家1胜利：玩家2只有先手时才能在该回合出手
+            struck = k if not first_1 else k - 1
+            self.winner = 1
+            self.hp[1] = int(hp_2[k])
+            self.total_damage[0] += int(damage_sum_1[k])
+            if struck >= 0:
+                self.hp[0] = int(hp_1[struck])
+                self.total_damage[1] += int(damage_sum_2[struck])
+        else:
+            # 玩家2胜利：玩家1只有先手时才能在该回合出手
+            struck = k if first_1 else k - 1
+            self.winner = 2
+            self.hp[0] = int(hp_1[k])
+            self.total_damage[1] += int(damage_sum_2[k])
+            if struck >= 0:
+                self.hp[1] = int(hp_2[struck])
+                self.total_damage[0] += int(damage_sum_1[struck])
+        self.round_num += k
+        return index + k + 1
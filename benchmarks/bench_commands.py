@@ -0,0 +1,287 @@
+"""
+指令吞吐量与延迟基准测试：
+    将插件源码复制到临时目录(游戏数据也写在临时目录中)，使用 stubs 中的 common.log / plugins / bridge 替身，
+    通过 textGame.game_system_handle 驱动常用指令，统计每个指令的 ops/sec 与 p50/p95/p99 延迟，
+    结果以 JSON 输出，便于对比不同版本之间的性能变化。
+
+    python benchmarks/bench_commands.py --players 1000,10000 --ops 2000 --output result.json
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import importlib
+import threading
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PLUGIN_DIR = os.path.dirname(BENCH_DIR)
+STUBS_DIR = os.path.join(BENCH_DIR, "stubs")
+# 复制到临时目录后的包名
+PACKAGE = "game"
+
+# 被测指令
+COMMANDS = ["签到", "钓鱼", "冒险", "外出", "背包", "出售 所有鱼", "排行榜", "地图"]
+
+# 指令出错时 game_system_handle 返回的提示
+ERROR_REPLY = "⚠️ 处理您的指令时发生错误"
+
+
+class Message:
+    """模拟 chatgpt-on-wechat 的消息对象(只包含 game_system_handle 用到的属性)"""
+    __slots__ = ("content", "kwargs")
+
+    def __init__(self, user_id, content):
+        self.content = content
+        self.kwargs = {"receiver": user_id}
+
+
+def percentile(sorted_values, percent):
+    """已排序数据的百分位数(最近秩法)"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(percent / 100 * len(sorted_values))
+    return sorted_values[max(0, rank - 1)]
+
+
+def summarize(latencies, elapsed, errors):
+    """
+    :param latencies: 每次调用的延迟(纳秒)
+    :param elapsed: 指令执行的总耗时(秒，多线程时为各线程的平均耗时)
+    :param errors: 出错次数
+    """
+    values = sorted(latencies)
+    to_ms = 1 / 1e6
+    return {
+        "ops": len(values),
+        "errors": errors,
+        "ops_per_sec": len(values) / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": sum(values) / len(values) * to_ms if values else 0.0,
+        "p50_ms": percentile(values, 50) * to_ms,
+        "p95_ms": percentile(values, 95) * to_ms,
+        "p99_ms": percentile(values, 99) * to_ms,
+        "max_ms": values[-1] * to_ms if values else 0.0,
+    }
+
+
+class Benchmark:
+    """单个玩家规模下的一轮基准测试"""
+
+    def __init__(self, players, inventory_size, ops, threads, seed):
+        self.players = players
+        self.inventory_size = inventory_size
+        self.ops = ops
+        self.threads = threads
+        self.rng = random.Random(seed)
+        self.workdir = None
+        self.game = None
+        self.user_ids = []
+
+    def __enter__(self):
+        self.workdir = tempfile.mkdtemp(prefix="textgame-bench-")
+        self.game = self._load_game()
+        return self
+
+    def __exit__(self, *exc):
+        write_behind = getattr(self.game, "write_behind", None)
+        if write_behind is not None:
+            write_behind.stop()
+        database = sys.modules.get(f"{PACKAGE}.database")
+        if database is not None:
+            database.close_all()
+        # 卸载本轮导入的模块，下一轮从新的临时目录重新导入
+        for name in list(sys.modules):
+            if name == PACKAGE or name.startswith(PACKAGE + "."):
+                del sys.modules[name]
+        sys.path.remove(self.workdir)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def _load_game(self):
+        """复制插件源码到临时目录并创建 textGame 实例"""
+        shutil.copytree(
+            PLUGIN_DIR, os.path.join(self.workdir, PACKAGE),
+            ignore=shutil.ignore_patterns("data", "benchmarks", "__pycache__", ".git", "config.json")
+        )
+        if STUBS_DIR not in sys.path:
+            sys.path.insert(0, STUBS_DIR)
+        sys.path.insert(0, self.workdir)
+        main = importlib.import_module(f"{PACKAGE}.main")
+        constants = importlib.import_module(f"{PACKAGE}.constants")
+        # 关闭冷却时间，使每次调用都走完整的指令逻辑
+        constants.FISH_COOLDOWN = 0
+        constants.ADVENTURE_COOLDOWN = 0
+        constants.GO_OUT_CD = 0
+        return main.textGame()
+
+    def call(self, user_id, content):
+        """执行一条指令，返回 (延迟纳秒, 是否出错)"""
+        message = Message(user_id, content)
+        start = time.perf_counter_ns()
+        reply = self.game.game_system_handle(message)
+        latency = time.perf_counter_ns() - start
+        return latency, reply is None or reply.startswith(ERROR_REPLY)
+
+    # ---------------- 数据准备(不计时) ----------------
+
+    def _make_inventory(self):
+        """生成一份背包：商店物品与鱼类随机组合"""
+        catalog = list(self.game.shop_system.shop_items) + list(self.game.fishing_system.fish_items)
+        inventory = {}
+        for item in self.rng.sample(catalog, min(self.inventory_size, len(catalog))):
+            entry = {key: value for key, value in item.items() if key != "name"}
+            entry["amount"] = self.rng.randint(1, 5)
+            inventory[item["name"]] = entry
+        return inventory
+
+    def _fishing_rod(self):
+        for item in self.game.shop_system.shop_items:
+            if item["type"] == "fishing_rod":
+                return dict(item)
+        return None
+
+    def prepare(self, user_id, command):
+        """为下一次调用恢复玩家状态(生命、租金、签到、鱼竿、背包)"""
+        game = self.game
+        with game.player_locks.hold(user_id):
+            self._prepare(user_id, command)
+
+    def _prepare(self, user_id, command):
+        game = self.game
+        if command in ("冒险", "外出"):
+            player = game.get_player(user_id)
+            game._update_player_data(user_id, {"hp": player.max_hp, "is_pay_rent": 0})
+        elif command == "签到":
+            game._update_player_data(user_id, {"sign_in_timestamp": 0})
+        elif command == "钓鱼":
+            game._update_player_data(user_id, {"equipment_fishing_rod": self._fishing_rod()})
+        elif command.startswith("出售"):
+            game._update_player_data(user_id, {"inventory": self._make_inventory()})
+
+    # ---------------- 测试阶段 ----------------
+
+    def register_players(self):
+        """注册全部玩家(注册本身也是被测指令)"""
+        latencies = []
+        errors = 0
+        for index in range(self.players):
+            user_id = f"bench_{index}"
+            latency, failed = self.call(user_id, f"注册 玩家{index}")
+            latencies.append(latency)
+            errors += failed
+            self.user_ids.append(user_id)
+        return summarize(latencies, sum(latencies) / 1e9, errors)
+
+    def seed_inventories(self):
+        """给所有玩家填充背包，每批玩家在一个事务中写入"""
+        for offset in range(0, len(self.user_ids), 1000):
+            with self.game.transaction():
+                for user_id in self.user_ids[offset:offset + 1000]:
+                    self.game._update_player_data(user_id, {"inventory": self._make_inventory()})
+
+    def run_command(self, command):
+        """对随机玩家重复执行指令"""
+        users = [self.rng.choice(self.user_ids) for _ in range(self.ops)]
+        shards = [users[index::self.threads] for index in range(self.threads)]
+        results = [None] * self.threads
+
+        def worker(slot, shard):
+            latencies = []
+            errors = 0
+            for user_id in shard:
+                self.prepare(user_id, command)
+                latency, failed = self.call(user_id, command)
+                latencies.append(latency)
+                errors += failed
+            results[slot] = (latencies, errors)
+
+        if self.threads == 1:
+            worker(0, shards[0])
+        else:
+            workers = [threading.Thread(target=worker, args=(slot, shard)) for slot, shard in enumerate(shards)]
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+        # 吞吐量只统计指令本身的耗时(准备数据的时间不计入)
+        latencies = [latency for result in results for latency in result[0]]
+        elapsed = sum(latencies) / 1e9 / self.threads
+        return summarize(latencies, elapsed, sum(result[1] for result in results))
+
+    def run(self, commands):
+        report = {"register": self.register_players()}
+        self.seed_inventories()
+        for command in commands:
+            report[command] = self.run_command(command)
+        return report
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PLUGIN_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_table(results):
+    lines = []
+    for players, report in results.items():
+        lines.append(f"\n玩家数: {players}")
+        lines.append(f"{'指令':<12}{'ops/sec':>12}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'errors':>8}")
+        for command, stats in report.items():
+            lines.append(
+                f"{command:<12}{stats['ops_per_sec']:>12.1f}{stats['p50_ms']:>10.3f}"
+                f"{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}{stats['errors']:>8}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="textGame 指令吞吐量与延迟基准测试")
+    parser.add_argument("--players", default="1000,10000,100000", help="玩家规模，逗号分隔")
+    parser.add_argument("--inventory-size", type=int, default=20, help="每个玩家背包中的物品种类数")
+    parser.add_argument("--ops", type=int, default=2000, help="每个指令的调用次数")
+    parser.add_argument("--threads", type=int, default=1, help="并发线程数")
+    parser.add_argument("--commands", default=",".join(COMMANDS), help="被测指令，逗号分隔")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    parser.add_argument("--output", help="JSON 结果输出文件，默认输出到标准输出")
+    args = parser.parse_args(argv)
+
+    commands = [command.strip() for command in args.commands.split(",") if command.strip()]
+    results = {}
+    for players in (int(value) for value in args.players.split(",")):
+        with Benchmark(players, args.inventory_size, args.ops, max(1, args.threads), args.seed) as bench:
+            results[str(players)] = bench.run(commands)
+        print(format_table({players: results[str(players)]}), file=sys.stderr)
+
+    document = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": int(time.time()),
+        "config": {
+            "inventory_size": args.inventory_size,
+            "ops": args.ops,
+            "threads": args.threads,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    text = json.dumps(document, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+# 基准测试用的 bridge.reply 替身
+from enum import Enum
+
+
+class ReplyType(Enum):
+    TEXT = 1
+
+
+class Reply:
+    def __init__(self, type=None, content=None):
+        self.type = type
+        self.content = content
@@ -0,0 +1,7 @@
+# 基准测试用的 common.log 替身：只输出警告及以上级别，避免日志拖慢测试
+import logging
+
+logger = logging.getLogger("textGame.benchmark")
+logger.setLevel(logging.WARNING)
+if not logger.handlers:
+    logger.addHandler(logging.StreamHandler())
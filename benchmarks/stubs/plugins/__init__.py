@@ -0,0 +1,47 @@
+# 基准测试用的 plugins 替身：只提供插件基类与注册装饰器
+import os
+import sys
+
+
+class Event:
+    ON_HANDLE_CONTEXT = "on_handle_context"
+
+
+class EventAction:
+    CONTINUE = "continue"
+    BREAK = "break"
+    BREAK_PASS = "break_pass"
+
+
+class EventContext:
+    def __init__(self, event=None, econtext=None):
+        self.event = event
+        self.econtext = econtext if econtext is not None else {}
+        self.action = EventAction.CONTINUE
+
+    def __getitem__(self, key):
+        return self.econtext[key]
+
+    def __setitem__(self, key, value):
+        self.econtext[key] = value
+
+
+class Plugin:
+    def __init__(self):
+        self.handlers = {}
+        # 插件目录(用于读取 config.json.template)
+        self.path = os.path.dirname(os.path.abspath(sys.modules[type(self).__module__].__file__))
+
+    def load_config(self):
+        # 没有 config.json，插件会退回读取配置模板
+        return None
+
+
+def register(**kwargs):
+    def wrapper(cls):
+        cls.name = kwargs.get("name")
+        return cls
+    return wrapper
+
+
+__all__ = ["Plugin", "Event", "EventAction", "EventContext"]
@@ -0,0 +1,78 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from common.log import logger
+
+
+class CommandExecutor:
+    """
+    指令的异步执行器：
+        1) 使用有界线程池执行指令，不阻塞消息通道的线程
+        2) 每名玩家一个 FIFO 队列，同一玩家的指令按到达顺序依次执行，不同玩家的指令并行执行
+        3) 每执行完一条指令就把线程让给其他玩家，避免刷屏的玩家长期占用线程
+        4) 玩家排队(含正在执行)的指令达到上限时拒绝新的指令
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        """
+        :param max_workers: 线程池大小
+        :param max_pending: 每名玩家最多排队的指令数(含正在执行的指令)
+        """
+        self.max_pending = max(1, max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="textGame")
+        # user_id -> 待执行的任务队列，队首为正在执行的任务
+        self._queues = {}
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def submit(self, user_id: str, task) -> bool:
+        """
+        提交玩家的指令。
+
+        :param user_id: 玩家ID
+        :param task: 无参数的可调用对象
+        :return: 玩家队列已满时返回 False
+        """
+        with self._lock:
+            queue = self._queues.get(user_id)
+            if queue is None:
+                queue = self._queues[user_id] = deque()
+            elif len(queue) >= self.max_pending:
+                self.rejected += 1
+                return False
+            queue.append(task)
+            idle = len(queue) == 1
+        if idle:
+            self._executor.submit(self._run_next, user_id)
+        return True
+
+    def _run_next(self, user_id: str) -> None:
+        """执行玩家队首的任务，完成后把后续任务重新排到线程池末尾"""
+        with self._lock:
+            task = self._queues[user_id][0]
+        try:
+            task()
+        except Exception as e:
+            logger.exception(f"执行玩家 {user_id} 的指令时出错: {e}")
+        finally:
+            with self._lock:
+                queue = self._queues[user_id]
+                queue.popleft()
+                if not queue:
+                    del self._queues[user_id]
+                    queue = None
+            if queue is not None:
+                try:
+                    self._executor.submit(self._run_next, user_id)
+                except RuntimeError:
+                    # 线程池已关闭，在当前线程中执行完剩余的指令
+                    self._run_next(user_id)
+
+    def pending(self) -> int:
+        """所有玩家排队中的指令总数"""
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def shutdown(self, wait: bool = True) -> None:
+        """停止接收新任务，wait 为 True 时等待已提交的任务执行完毕"""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,196 @@
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from . import constants
+
+
+class CommandSample:
+    """单次指令执行期间累计的数据(只由执行该指令的线程修改)"""
+    __slots__ = ('lock_wait', 'statements', 'rows_read', 'rows_written', 'failed')
+
+    def __init__(self):
+        self.lock_wait = 0.0
+        self.statements = 0
+        self.rows_read = 0
+        self.rows_written = 0
+        self.failed = False
+
+
+class CommandStats:
+    """
+    按指令统计性能数据：
+        1) 调用次数、失败次数与耗时直方图
+        2) 等待玩家锁的时间
+        3) 执行的 SQL 语句数以及读取/写入的行数
+    指令执行期间的锁等待与 SQL 通过线程本地的当前样本归属到对应指令。
+    """
+
+    def __init__(self, buckets=None):
+        """
+        :param buckets: 耗时直方图的桶上界(毫秒，升序)，超过最后一个上界的计入溢出桶
+        """
+        self.buckets = tuple(buckets or constants.COMMAND_LATENCY_BUCKETS)
+        # 指令 -> 统计数据
+        self._commands = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started = time.time()
+
+    def _new_entry(self) -> dict:
+        return {
+            'count': 0,
+            'errors': 0,
+            'total_time': 0.0,
+            'max_time': 0.0,
+            'histogram': [0] * (len(self.buckets) + 1),
+            'lock_wait': 0.0,
+            'statements': 0,
+            'rows_read': 0,
+            'rows_written': 0,
+        }
+
+    @contextmanager
+    def track(self, cmd: str):
+        """
+        统计一次指令执行，范围内当前线程的锁等待与 SQL 都计入该指令。
+
+        :param cmd: 指令
+        :return: 本次执行的样本，出错时调用方应设置 failed
+        """
+        previous = getattr(self._local, 'sample', None)
+        sample = CommandSample()
+        self._local.sample = sample
+        start = time.perf_counter()
+        try:
+            yield sample
+        finally:
+            elapsed = time.perf_counter() - start
+            self._local.sample = previous
+            self._commit(cmd, sample, elapsed)
+
+    def _commit(self, cmd: str, sample: CommandSample, elapsed: float) -> None:
+        bucket = bisect.bisect_left(self.buckets, elapsed * 1000)
+        with self._lock:
+            entry = self._commands.get(cmd)
+            if entry is None:
+                entry = self._commands[cmd] = self._new_entry()
+            entry['count'] += 1
+            entry['errors'] += sample.failed
+            entry['total_time'] += elapsed
+            if elapsed > entry['max_time']:
+                entry['max_time'] = elapsed
+            entry['histogram'][bucket] += 1
+            entry['lock_wait'] += sample.lock_wait
+            entry['statements'] += sample.statements
+            entry['rows_read'] += sample.rows_read
+            entry['rows_written'] += sample.rows_written
+
+    def record_lock_wait(self, seconds: float) -> None:
+        """记录当前线程等待玩家锁的时间"""
+        sample = getattr(self._local, 'sample', None)
+        if sample is not None:
+            sample.lock_wait += seconds
+
+    def record_sql(self, statements: int = 0, rows_read: int = 0, rows_written: int = 0) -> None:
+        """记录当前线程执行的 SQL 语句与读写行数"""
+        sample = getattr(self._local, 'sample', None)
+        if sample is not None:
+            sample.statements += statements
+            sample.rows_read += rows_read
+            sample.rows_written += rows_written
+
+    def reset(self) -> None:
+        """清空统计数据"""
+        with self._lock:
+            self._commands.clear()
+            self._started = time.time()
+
+    def percentile(self, histogram: list, percent: float) -> float:
+        """
+        根据直方图估算百分位耗时(返回所在桶的上界，毫秒)，落在溢出桶时返回 inf。
+        """
+        total = sum(histogram)
+        if not total:
+            return 0.0
+        threshold = total * percent / 100
+        cumulative = 0
+        for index, count in enumerate(histogram):
+            cumulative += count
+            if cumulative >= threshold:
+                return self.buckets[index] if index < len(self.buckets) else float('inf')
+        return float('inf')
+
+    def get_stats(self) -> dict:
+        """获取统计数据的快照"""
+        with self._lock:
+            commands = {
+                cmd: dict(entry, histogram=list(entry['histogram']))
+                for cmd, entry in self._commands.items()
+            }
+            started = self._started
+        return {
+            'since': started,
+            'buckets_ms': list(self.buckets),
+            'commands': commands,
+        }
+
+    def export_json(self) -> str:
+        """以 JSON 格式导出统计数据(附带估算的 p50/p95/p99，单位毫秒)"""
+        stats = self.get_stats()
+        for entry in stats['commands'].values():
+            for percent in (50, 95, 99):
+                value = self.percentile(entry['histogram'], percent)
+                entry[f'p{percent}_ms'] = None if value == float('inf') else value
+        return json.dumps(stats, ensure_ascii=False, indent=2)
+
+    def get_stats_report(self, limit: int = 15) -> str:
+        """格式化统计数据，按总耗时从高到低列出指令"""
+        stats = self.get_stats()
+        commands = sorted(stats['commands'].items(), key=lambda item: item[1]['total_time'], reverse=True)
+        report = [
+            "📈 指令性能统计",
+            "──────────────",
+            f"🕒 统计开始: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats['since']))}",
+        ]
+        if not commands:
+            report.append("🤷‍♂️ 暂无数据")
+            return "\n".join(report)
+        for cmd, entry in commands[:limit]:
+            count = entry['count']
+            p95 = self.percentile(entry['histogram'], 95)
+            p95_str = f"≤{p95:g}ms" if p95 != float('inf') else f">{self.buckets[-1]:g}ms"
+            report.append(
+                f"\n🔹 {cmd} x{count}" + (f" (失败 {entry['errors']})" if entry['errors'] else "")
+            )
+            report.append(
+                f"  ⏱️ 平均 {entry['total_time'] / count * 1000:.2f}ms | p95 {p95_str} | 最长 {entry['max_time'] * 1000:.1f}ms"
+            )
+            report.append(
+                f"  🔒 锁等待 {entry['lock_wait'] / count * 1000:.2f}ms/次 | "
+                f"🗄️ SQL {entry['statements'] / count:.1f}条/次 | "
+                f"读 {entry['rows_read'] / count:.1f}行 写 {entry['rows_written'] / count:.1f}行"
+            )
+        if len(commands) > limit:
+            report.append(f"\n… 其余 {len(commands) - limit} 个指令请使用 [性能统计 导出] 查看")
+        return "\n".join(report)
+
+
+# 默认的指令统计
+_stats = CommandStats()
+
+
+def get_command_stats() -> CommandStats:
+    """获取全局的指令统计"""
+    return _stats
+
+
+def record_lock_wait(seconds: float) -> None:
+    """将锁等待时间计入当前线程正在执行的指令"""
+    _stats.record_lock_wait(seconds)
+
+
+def record_sql(statements: int = 0, rows_read: int = 0, rows_written: int = 0) -> None:
+    """将 SQL 语句与读写行数计入当前线程正在执行的指令"""
+    _stats.record_sql(statements, rows_read, rows_written)
@@ -11,6 +11,9 @@ PLAYER_BASE_DEFENSE = 20
 PLAYER_BASE_EXP = 200
 PLAYER_BASE_GOLD = 5000
 
+# 经验曲线：升级所需经验 = PLAYER_BASE_EXP * 等级 ** 增长因子，每 10 级一档(1-10 级使用第一档，之后依次递增)
+PLAYER_EXP_GROWTH_FACTORS = (1.1, 1.2, 1.3, 1.4, 1.5, 1.6, 1.7, 1.8, 1.9, 2.0)
+
 # 玩家升级时三维的成长
 PLAYER_LEVEL_UP_APPEND_HP = 50
 PLAYER_LEVEL_UP_APPEND_ATTACK = 10
@@ -974,6 +977,145 @@ ADVENTURE_MAP = {
     "☠️枯骨之地": "沼泽深处堆满了枯骨，传说这里是强大怪物的狩猎场。"
 }
 
+# 冒险怪物图鉴: 场景 -> [名称, 生命, 攻击, 防御, 经验, 金币]
+# 实际属性随怪物等级成长: 等级因子 = 1 + (等级 - 1) * 0.3，
+# 生命/防御/经验 = 基础值 * 等级因子，攻击 = 1.3 * 基础值 * 等级因子，金币 = 10 * 基础值 * 等级因子
+ADVENTURE_MONSTERS = {
+    "👹怪物巢穴": [
+        ['森林史莱姆🍄', 60, 10, 6, 20, 30],
+        ['潜伏狼蛛🕷️', 80, 15, 8, 25, 35],
+        ['巢穴蝙蝠🦇', 50, 12, 5, 18, 28],
+        ['毒刺蜂🐝', 70, 18, 7, 22, 32],
+        ['黑影潜伏者🌑', 100, 20, 10, 30, 40]
+    ],
+    "🌳古树之心": [
+        ['树精守卫🌳', 120, 25, 15, 35, 50],
+        ['魔化藤蔓🌿', 90, 20, 12, 28, 45],
+        ['树灵幽影🌲', 80, 22, 10, 30, 42],
+        ['腐化树妖🌳', 150, 30, 18, 40, 60],
+        ['古树之魂🌌', 200, 35, 20, 50, 70]
+    ],
+    "🌫️迷雾谷地": [
+        ['雾影幽魂👻', 70, 18, 8, 25, 35],
+        ['迷雾猎手🏹', 90, 22, 10, 30, 45],
+        ['隐匿毒蛇🐍', 60, 20, 6, 22, 32],
+        ['雾中行者🚶', 110, 28, 12, 35, 50],
+        ['迷雾巨兽🐺', 150, 32, 18, 45, 65]
+    ],
+    "👻幽灵空地": [
+        ['幽灵战士💀', 100, 25, 12, 35, 50],
+        ['亡灵弓手🏹', 80, 28, 10, 32, 48],
+        ['怨灵法师🧙', 90, 30, 8, 38, 52],
+        ['幽魂骑士🏇', 140, 35, 15, 45, 65],
+        ['复仇亡灵💀', 160, 40, 18, 50, 70]
+    ],
+    "🌳腐烂树林": [
+        ['腐朽树妖🌳', 120, 20, 15, 35, 45],
+        ['毒液史莱姆🟢', 70, 18, 8, 25, 35],
+        ['腐化狼蛛🕷️', 80, 22, 10, 30, 40],
+        ['腐木傀儡🌳', 150, 28, 18, 40, 55],
+        ['树根潜伏者🌳', 100, 25, 12, 35, 50]
+    ],
+    "🦌灵兽栖息地": [
+        ['灵气鹿🦌', 80, 15, 12, 25, 40],
+        ['守护灵兽🦄', 120, 30, 18, 45, 55],
+        ['灵狐幻影🦊', 70, 22, 10, 28, 38],
+        ['秘境猛虎🐯', 140, 35, 15, 50, 65],
+        ['灵域飞龙🐉', 180, 40, 20, 60, 80]
+    ],
+    "🟢毒沼密林": [
+        ['毒液巨蛛🕷️', 100, 25, 12, 35, 50],
+        ['毒气史莱姆🟢', 80, 20, 10, 28, 38],
+        ['瘴气妖藤🌿', 120, 28, 15, 40, 55],
+        ['毒雾蜥蜴🦎', 90, 22, 10, 30, 42],
+        ['瘴气守护者🗿', 160, 35, 20, 50, 70]
+    ],
+    "🌙月光草原": [
+        ['草原狼群🐺', 80, 20, 10, 28, 40],
+        ['隐匿猎手🏹', 90, 25, 12, 35, 50],
+        ['月光幽灵👻', 100, 30, 10, 40, 55],
+        ['夜影刺客🔪', 110, 35, 15, 45, 60],
+        ['草原巨熊🐻', 200, 50, 25, 60, 80]
+    ],
+    "🏚️荒弃村落": [
+        ['村落幽魂👻', 90, 20, 10, 30, 40],
+        ['腐化村民💀', 100, 25, 15, 35, 50],
+        ['废墟潜伏者🕵️', 80, 22, 12, 28, 38],
+        ['憎恶尸鬼💀', 150, 30, 18, 50, 65],
+        ['村落恶鬼👹', 120, 35, 15, 45, 60]
+    ],
+    "🌳暗影森林": [
+        ['暗影猎手🔪', 100, 30, 15, 40, 55],
+        ['黑暗幽灵👻', 90, 25, 12, 35, 45],
+        ['夜行毒蛇🐍', 80, 20, 10, 28, 38],
+        ['暗影潜伏者🔪', 120, 35, 18, 45, 65],
+        ['黑暗树妖🌳', 150, 40, 20, 55, 75]
+    ],
+    "⛰️绝壁险峰": [
+        ['山崖猛禽🦅', 80, 25, 10, 30, 50],
+        ['岩石巨人🗿', 150, 40, 30, 60, 70],
+        ['爬山毒蛇🐍', 70, 15, 10, 25, 35],
+        ['峭壁蝙蝠🦇', 60, 10, 8, 20, 30],
+        ['崖顶恶鹰🦅', 130, 35, 12, 50, 65]
+    ],
+    "🔥熔岩洞窟": [
+        ['火焰元素🔥', 100, 30, 12, 40, 60],
+        ['熔岩巨人🗿', 180, 50, 20, 70, 90],
+        ['火焰蝙蝠🦇', 80, 25, 10, 35, 50],
+        ['熔岩魔蛇🐍', 90, 20, 15, 30, 42],
+        ['炎爆恶魔😈', 200, 60, 25, 80, 100]
+    ],
+    "🏜️流沙之地": [
+        ['流沙巨蟒🐍', 120, 30, 10, 40, 55],
+        ['沙漠蝎子🦂', 100, 25, 12, 35, 50],
+        ['沙尘潜伏者🔪', 80, 20, 8, 28, 40],
+        ['沙之傀儡🗿', 160, 40, 20, 60, 70],
+        ['沙漠猎犬🐕', 90, 22, 10, 32, 45]
+    ],
+    "☀烈日废墟": [
+        ['炎蝎🦂', 100, 30, 10, 40, 55],
+        ['废墟幽魂👻', 120, 28, 15, 45, 60],
+        ['火焰殉教者🧕', 140, 40, 20, 60, 75],
+        ['石化蜥蜴🦎', 80, 25, 12, 35, 50],
+        ['烈日幻影👻', 70, 23, 8, 28, 40]
+    ],
+    "🌪️沙暴迷城": [
+        ['沙暴刺客🔪', 90, 28, 12, 35, 50],
+        ['废墟守卫👮‍♂️', 150, 35, 18, 50, 70],
+        ['迷城幽魂👻', 110, 25, 10, 38, 55],
+        ['黄沙巫师🧙', 80, 22, 8, 30, 45],
+        ['沙暴元素🌪️', 130, 40, 15, 55, 65]
+    ],
+    "❄️寒冰峡谷": [
+        ['极地狼群🐺', 120, 28, 15, 40, 55],
+        ['冰原独角兽🦄', 150, 35, 18, 50, 65],
+        ['寒霜飞鹰🦅', 90, 22, 10, 32, 45],
+        ['冰霜元素❄️', 130, 30, 12, 45, 55],
+        ['极寒古龙🐲', 200, 50, 25, 80, 100]
+    ],
+    "🧊冻土遗迹": [
+        ['遗迹守护者🗿', 140, 40, 20, 60, 75],
+        ['冰冻骷髅💀', 120, 30, 15, 45, 55],
+        ['冻土游魂👻', 100, 25, 12, 38, 50],
+        ['霜冻教徒🧙', 80, 22, 10, 30, 42],
+        ['寒霜傀儡❄️', 160, 35, 18, 50, 65]
+    ],
+    "🟢毒雾沼泽": [
+        ['毒鳞鱼人🧜‍♂️', 90, 20, 12, 32, 42],
+        ['腐臭鳄鱼🐊', 120, 30, 15, 45, 60],
+        ['瘴气魔鹰🦅', 70, 18, 8, 25, 38],
+        ['泥潭刺客🎭', 150, 40, 20, 60, 75],
+        ['沼泽魔神👹', 200, 50, 25, 80, 100]
+    ],
+    "☠️枯骨之地": [
+        ['枯骨战士☠️', 100, 28, 12, 38, 50],
+        ['沼泽骷髅💀', 90, 20, 10, 30, 45],
+        ['不死巫师🧙', 130, 35, 18, 50, 65],
+        ['亡灵巨兽🐺', 160, 40, 20, 60, 75],
+        ['骨堆恶灵👹', 200, 50, 25, 80, 100]
+    ]
+}
+
 # 全部鱼类
 FISH_ITEMS = [
     ['海龙王', '我有时候真的会怕它打我一巴掌', 4500, 5],
@@ -1072,3 +1214,51 @@ SHOP_ITEMS = [
     ['双倍经验卡', 'double_exp_card', '让你获得的经验翻倍！有效期20分钟。', 5000, 3, {'time': 1200}],
     ['双倍金币卡', 'double_gold_card', '让你获得的金币翻倍！有效期20分钟。', 5000, 3, {'time': 1200}],
 ]
+
+# 玩家缓存容量(人数，0 表示禁用)
+PLAYER_CACHE_SIZE = 1000
+
+# 玩家缓存有效期(秒，0 表示永不过期)
+PLAYER_CACHE_TTL = 300
+
+# SQLite 内存映射大小(字节)
+SQLITE_MMAP_SIZE = 64 * 1024 * 1024
+
+# SQLite 页缓存大小(负数表示 KiB)
+SQLITE_CACHE_SIZE = -8000
+
+# SQLite 数据库被锁定时的等待时间(毫秒)
+SQLITE_BUSY_TIMEOUT = 5000
+
+# 随机数种子(None 表示使用系统熵源，指定后结果可复现，仅用于测试与回放)
+RNG_SEED = None
+
+# 指令耗时直方图的桶上界(毫秒)
+COMMAND_LATENCY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# 是否在线程池中异步执行指令(回复由通道直接发送，不阻塞消息处理线程)
+ASYNC_COMMANDS = False
+
+# 异步执行指令的线程数
+COMMAND_WORKERS = 4
+
+# 每名玩家最多排队的指令数(含正在执行的指令)，超过时提示稍后再试
+COMMAND_QUEUE_LIMIT = 5
+
+# 延迟写入的间隔(毫秒，0 表示不延迟、每次直接写入数据库)
+WRITE_BEHIND_INTERVAL = 1000
+
+# 允许延迟写入的玩家字段(冷却时间戳与位置，只修改这些字段时不会单独提交事务)
+WRITE_BEHIND_FIELDS = ('last_fishing', 'last_attack', 'adventure_last_attack', 'position')
+
+# 装备数据库的压缩间隔(秒，0 表示不压缩)，压缩时删除没有被任何玩家引用的装备
+EQUIPMENT_COMPACT_INTERVAL = 3600
+
+# 写入不足该时间(秒)的装备不会被压缩删除(所在的玩家事务可能还没有提交)
+EQUIPMENT_RETENTION_GRACE = 600
+
+# 每次压缩后最多归还给文件系统的空闲页数(增量 VACUUM)
+EQUIPMENT_VACUUM_PAGES = 2000
+
+# 装备缓存容量(件，0 表示禁用缓存)
+EQUIPMENT_CACHE_SIZE = 2048
@@ -0,0 +1,179 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from . import constants
+from . import command_stats
+from common.log import logger
+
+
+class TracedCursor(sqlite3.Cursor):
+    """统计执行的语句数与读写行数，并计入当前线程正在执行的指令"""
+
+    def execute(self, sql, parameters=()):
+        super().execute(sql, parameters)
+        command_stats.record_sql(statements=1, rows_written=max(self.rowcount, 0))
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        super().executemany(sql, seq_of_parameters)
+        command_stats.record_sql(statements=1, rows_written=max(self.rowcount, 0))
+        return self
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            command_stats.record_sql(rows_read=1)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        command_stats.record_sql(rows_read=len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        command_stats.record_sql(rows_read=len(rows))
+        return rows
+
+    def __next__(self):
+        row = super().__next__()
+        command_stats.record_sql(rows_read=1)
+        return row
+
+
+class TracedConnection(sqlite3.Connection):
+    """所有语句都通过 TracedCursor 执行(包括 Connection.execute 快捷方式)"""
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class SQLitePool:
+    """
+    单个 SQLite 数据库的连接池：
+        1) 每个线程使用独立的只读连接，读取互不阻塞
+        2) 所有写入共用一个写连接，并通过 write_lock 串行化
+        3) 所有连接都启用 WAL 模式，读取不会被写入阻塞
+    """
+
+    def __init__(self, db_path: str, mmap_size: int, cache_size: int, busy_timeout: int):
+        """
+        :param db_path: 数据库文件路径
+        :param mmap_size: 内存映射大小(字节)
+        :param cache_size: 页缓存大小(SQLite cache_size 语义，负数表示 KiB)
+        :param busy_timeout: 数据库被锁定时的等待时间(毫秒)
+        """
+        self.db_path = db_path
+        self.mmap_size = mmap_size
+        self.cache_size = cache_size
+        self.busy_timeout = busy_timeout
+        # 写入锁(写连接在多个线程之间共享)
+        self.write_lock = threading.RLock()
+        # 线程 ident -> (线程, 读连接)
+        self._readers = {}
+        self._readers_lock = threading.Lock()
+        self._local = threading.local()
+        self.writer = self._open(readonly=False)
+        logger.debug(f"数据库连接池已创建: {db_path}")
+
+    def _open(self, readonly: bool) -> sqlite3.Connection:
+        """创建连接并设置 PRAGMA"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout / 1000,
+            check_same_thread=False,
+            factory=TracedConnection
+        )
+        # 通过列名访问数据
+        conn.row_factory = sqlite3.Row
+        if not readonly:
+            # WAL 是持久化设置，由写连接开启即可
+            conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size={int(self.cache_size)}")
+        if readonly:
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def reader(self) -> sqlite3.Connection:
+        """获取当前线程的读连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open(readonly=True)
+            self._local.conn = conn
+            current = threading.current_thread()
+            with self._readers_lock:
+                # 顺便关闭已经退出的线程遗留的连接
+                for ident, (thread, reader) in list(self._readers.items()):
+                    if not thread.is_alive():
+                        reader.close()
+                        del self._readers[ident]
+                self._readers[current.ident] = (current, conn)
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """持有写入锁并在写连接上开启事务，正常退出时提交，异常时回滚"""
+        with self.write_lock:
+            with self.writer:
+                yield self.writer
+
+    def close(self) -> None:
+        """关闭所有连接"""
+        with self._readers_lock:
+            for _, reader in self._readers.values():
+                reader.close()
+            self._readers.clear()
+        with self.write_lock:
+            self.writer.close()
+
+
+# 数据库路径 -> 连接池
+_pools = {}
+_pools_lock = threading.Lock()
+_settings = {
+    'mmap_size': constants.SQLITE_MMAP_SIZE,
+    'cache_size': constants.SQLITE_CACHE_SIZE,
+    'busy_timeout': constants.SQLITE_BUSY_TIMEOUT,
+}
+
+
+def configure(**settings) -> None:
+    """
+    修改之后创建的连接池使用的 PRAGMA 参数(mmap_size / cache_size / busy_timeout)，
+    值为 None 的参数保持默认。
+    """
+    for key, value in settings.items():
+        if key not in _settings:
+            raise ValueError(f"未知的数据库参数: {key}")
+        if value is not None:
+            _settings[key] = int(value)
+
+
+def get_pool(db_path: str) -> SQLitePool:
+    """获取(必要时创建)数据库文件对应的连接池，同一个文件只会创建一个连接池"""
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = SQLitePool(db_path, **_settings)
+            _pools[db_path] = pool
+        return pool
+
+
+def close_all() -> None:
+    """关闭所有连接池"""
+    with _pools_lock:
+        for pool in _pools.values():
+            try:
+                pool.close()
+            except sqlite3.Error as e:
+                logger.error(f"关闭数据库连接失败: {e}")
+        _pools.clear()
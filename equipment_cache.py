@@ -0,0 +1,101 @@
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Optional
+
+
+class EquipmentCache:
+    """
+    装备数据的 LRU 缓存：
+        1) 以装备 ID 为键缓存已解析的装备记录(技能 JSON 已解码)
+        2) 装备写入后不会再修改，缓存的记录为只读映射，调用方共享同一份数据
+        3) 装备被删除(压缩)时使缓存失效，超过容量时淘汰最久未使用的装备
+    """
+
+    def __init__(self, max_size: int = 2048):
+        """
+        :param max_size: 最多缓存的装备数量，小于等于 0 时禁用缓存
+        """
+        self.max_size = max_size
+        # 装备ID -> 只读装备记录
+        self._entries = OrderedDict()
+        # 失效序号，用于丢弃读取期间已被删除的装备
+        self._generation = 0
+        self._lock = threading.Lock()
+        # 统计
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def freeze(cls, value: Any) -> Any:
+        """把装备记录转换为只读结构(字典 -> 只读映射，列表 -> 元组)"""
+        if isinstance(value, dict):
+            return MappingProxyType({key: cls.freeze(item) for key, item in value.items()})
+        if isinstance(value, list):
+            return tuple(cls.freeze(item) for item in value)
+        return value
+
+    def read_token(self) -> int:
+        """在查询数据库之前获取读取序号，配合 put 使用"""
+        with self._lock:
+            return self._generation
+
+    def get(self, equipment_id: str) -> Optional[MappingProxyType]:
+        """
+        获取缓存的装备记录。
+
+        :return: 只读装备记录，未命中时返回 None
+        """
+        if self.max_size <= 0:
+            return None
+        with self._lock:
+            equipment = self._entries.get(equipment_id)
+            if equipment is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(equipment_id)
+            self.hits += 1
+            return equipment
+
+    def put(self, equipment_id: str, equipment: MappingProxyType, token: int) -> None:
+        """
+        写入从数据库读取的装备记录。
+
+        :param equipment_id: 装备ID
+        :param equipment: 只读装备记录(freeze 的结果)
+        :param token: 查询前通过 read_token 获取的序号，期间发生过删除则放弃写入
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if token != self._generation:
+                return
+            self._entries[equipment_id] = equipment
+            self._entries.move_to_end(equipment_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, equipment_id: str) -> None:
+        """移除指定装备的缓存(删除装备时)"""
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(equipment_id, None)
+
+    def clear(self) -> None:
+        """清空缓存(批量删除装备时)"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        """获取缓存统计"""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -1,11 +1,12 @@
 import uuid
 import math
-import random
 from .utils import get_multiple
 from . import constants
 import os
 import sqlite3
 from common.log import logger
+from . import database
+from . import random_service
 
 
 class FishingSystem:
@@ -31,14 +32,19 @@ class FishingSystem:
             logger.error(f"初始化鱼的系统出错: {e}")
             raise
 
+    @property
+    def rng(self):
+        """当前线程(请求)使用的随机数生成器"""
+        return random_service.get_rng()
+
     def _connect(self) -> None:
         """
-        连接到 SQLite 数据库，启用 WAL 模式以提高并发性，并启用外键约束。
+        从连接池获取 SQLite 数据库连接(WAL 模式，每个线程独立读连接，写入串行化)。
         """
         try:
-            self.conn = sqlite3.connect(self.shop_fish_path, check_same_thread=False)
-            # 通过列名访问数据
-            self.conn.row_factory = sqlite3.Row
+            self.db = database.get_pool(self.shop_fish_path)
+            # 写连接
+            self.conn = self.db.writer
             logger.debug("成功连接到鱼类数据库。")
         except sqlite3.Error as e:
             logger.error(f"连接数据库失败: {e}")
@@ -62,7 +68,7 @@ class FishingSystem:
             for item in constants.FISH_ITEMS
         ]
         try:
-            with self.conn:
+            with self.db.write_lock, self.conn:
                 # 创建数据表
                 self.conn.execute('''
                 CREATE TABLE IF NOT EXISTS fish (
@@ -104,7 +110,7 @@ class FishingSystem:
         :return: 返回查询到的所有条目（列表形式）
         """
         try:
-            cursor = self.conn.cursor()
+            cursor = self.db.reader().cursor()
 
             # 构造查询语句，读取所有条目
             query = f"SELECT * FROM {table_name}"
@@ -145,9 +151,9 @@ class FishingSystem:
         gold_bonus = fishing_rod_description['gold_bonus']
         exp_bonus = fishing_rod_description['exp_bonus']
         # 随机判断是否钓到鱼
-        if random.random() < lucky:
+        if self.rng.random() < lucky:
             # 随机选择一条鱼
-            caught_fish = random.choice(self.fish_items)
+            caught_fish = self.rng.choice(self.fish_items)
 
             # 获取鱼的基本价值
             base_reward = int(caught_fish.get('price', 0))
@@ -177,7 +183,7 @@ class FishingSystem:
             ]
 
             stars = "⭐" * int(caught_fish.get('rarity', 1))
-            message = f"{random.choice(fishing_messages)}\n"
+            message = f"{self.rng.choice(fishing_messages)}\n"
             message += f"──────────────\n"
             message += f"🎣 你钓到了 {caught_fish['name']}\n"
             message += f"      \"{caught_fish['explain']}\"\n"
@@ -204,7 +210,7 @@ class FishingSystem:
                 "🎣 下次一定能钓到！"
             ]
 
-            message = f"{random.choice(fail_messages)}\n"
+            message = f"{self.rng.choice(fail_messages)}\n"
             message += f"──────────────\n"
 
             return {
@@ -214,18 +220,9 @@ class FishingSystem:
 
     def show_collection(self, player, page=1, search_term=""):
         """显示鱼类图鉴"""
-        # 读取玩家背包
-        inventory = player.inventory
-
-        # 预初始化鱼的数量
-        fish_counts = 0
-
-        # 读取所有鱼类信息
-        fish_data = {}
-        for item_name in inventory:
-            if inventory[item_name]['type'] == 'fish':
-                fish_data[item_name] = inventory[item_name]
-                fish_counts += 1
+        # 读取背包中的所有鱼类信息
+        fish_data = player.game.inventory_store.get_items(player.user_id, 'fish')
+        fish_counts = len(fish_data)
 
         # 按稀有度排序
         sorted_fish = sorted(fish_data.items(), key=lambda x: (-x[1]['rarity'], x[0]))
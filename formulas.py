@@ -0,0 +1,128 @@
+"""
+游戏数值公式：怪物成长与变异、装备稀有度与属性、玩家成长、冒险奖励。
+游戏(main.py、rouge_equipment.py)与数值平衡模拟器(simulator.py)共用这些函数，
+只依赖 constants，不需要 chatgpt-on-wechat 运行环境。
+"""
+if __package__:
+    from . import constants
+else:
+    # 以脚本方式运行模拟器时插件目录就是模块搜索路径
+    import constants
+
+
+# 怪物变异概率与变异后的属性倍率
+MUTATION_PROBABILITY = 0.15
+MUTATION_MULTIPLIERS = {'hp': 1.5, 'attack': 1.3, 'defense': 1.2, 'exp': 1.5, 'gold': 1.5}
+
+
+def monster_level_factor(monster_level: int) -> float:
+    """怪物属性的等级因子：每高一级属性增加 30%"""
+    return 1 + (monster_level - 1) * 0.3
+
+
+def scale_monster(base: tuple, monster_level: int) -> dict:
+    """
+    计算怪物在指定等级下的属性
+
+    :param base: ADVENTURE_MONSTERS 中的一项 (名称, 生命, 攻击, 防御, 经验, 金币)
+    :param monster_level: 怪物等级
+    :return: 怪物属性字典
+    """
+    name, hp, attack, defense, exp, gold = base
+    level_factor = monster_level_factor(monster_level)
+    return {
+        'name': name,
+        'hp': int(hp * level_factor),
+        'attack': int(1.3 * attack * level_factor),
+        'defense': int(defense * level_factor),
+        'exp': int(exp * level_factor),
+        'gold': int(10 * gold * level_factor),
+        'level': monster_level
+    }
+
+
+def is_mutant(rng) -> bool:
+    """判断怪物是否变异"""
+    return rng.random() < MUTATION_PROBABILITY
+
+
+def mutate_monster(monster: dict) -> dict:
+    """
+    对怪物应用变异属性
+
+    :return: 变异后的怪物字典(新的字典，不修改原怪物数据)
+    """
+    mutant = dict(monster)
+    mutant['name'] = f"变异的{monster['name']}"
+    for field, multiplier in MUTATION_MULTIPLIERS.items():
+        mutant[field] = int(monster[field] * multiplier)
+    return mutant
+
+
+def pick_rarity(rng) -> tuple:
+    """
+    按 RARITY_DATA 的概率随机抽取装备稀有度
+
+    :return: (稀有度名称, 技能数量, 属性系数)
+    """
+    rand_val = rng.random()
+    cumulative = 0.0
+    for (name, prob, skill_count, factor) in constants.RARITY_DATA:
+        cumulative += prob
+        if rand_val <= cumulative:
+            return (name, skill_count, factor)
+    # 浮点误差的兜底
+    return constants.RARITY_DATA[-1][0], constants.RARITY_DATA[-1][2], constants.RARITY_DATA[-1][3]
+
+
+def equipment_level(rng, level: int) -> int:
+    """掉落装备的等级：在玩家等级上下 10 级内浮动"""
+    return rng.randint(max(1, level - 10), min(100, level + 10))
+
+
+def weapon_attributes(rng, level: int, factor: float) -> tuple:
+    """
+    武器属性
+
+    :return: (攻击, 防御, 生命, 价格)
+    """
+    attack = int(round((10 + 5 * level) * factor * (1 + rng.uniform(-0.1, 0.2))))
+    price = int(round((100 * level) * factor * 5))
+    return attack, 0, 0, price
+
+
+def armor_attributes(rng, level: int, factor: float) -> tuple:
+    """
+    防具属性
+
+    :return: (攻击, 防御, 生命, 价格)
+    """
+    defense = int(round((10 + 5 * level) * factor * (1 + rng.uniform(-0.1, 0.2))))
+    max_hp = int(round((10 + 10 * level) * factor * (1 + rng.uniform(-0.1, 0.2))))
+    price = int(round((150 * level) * factor * 5))
+    return 0, defense, max_hp, price
+
+
+def player_base_attributes(level: int) -> tuple:
+    """
+    玩家在指定等级下不含装备与加成的属性
+
+    :return: (攻击, 防御, 最大生命)
+    """
+    attack = level * constants.PLAYER_LEVEL_UP_APPEND_ATTACK + constants.PLAYER_BASE_ATTACK
+    defense = level * constants.PLAYER_LEVEL_UP_APPEND_DEFENSE + constants.PLAYER_BASE_DEFENSE
+    max_hp = level * constants.PLAYER_LEVEL_UP_APPEND_HP + constants.PLAYER_BASE_MAX_HP
+    return attack, defense, max_hp
+
+
+def battle_rewards(player_level: int, monster: dict, exp_multiple=1, gold_multiple=1) -> tuple:
+    """
+    冒险胜利的奖励：每高一级经验增加 4%，金币按等级(10 级封顶)折算
+
+    :param exp_multiple: 经验加成倍率
+    :param gold_multiple: 金币加成倍率
+    :return: (经验, 金币)
+    """
+    award_exp = int(monster['exp'] * (1 + player_level * 0.04) * exp_multiple)
+    award_gold = int(min(player_level * 0.1, 1) * monster['gold'] * gold_multiple)
+    return award_exp, award_gold
@@ -0,0 +1,371 @@
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from . import database
+from common.log import logger
+from typing import Optional
+
+
+class InventoryStore:
+    """
+    玩家背包，每件物品在 players.db 的 inventory_items 表中占一行：
+        1) 增减物品只读写对应的一行，不再整体解析和序列化背包 JSON
+        2) 事务内的修改记录在线程本地，读取时合并，提交时与玩家数据在同一个数据库事务中写入
+        3) 初始化时把 players.inventory 列中的旧版 JSON 背包迁移到数据表
+    """
+
+    # 单独成列的物品属性，其余属性以 JSON 保存在 data 列中
+    COLUMNS = ('type', 'rarity', 'amount', 'uuid', 'price')
+
+    def __init__(self, db_path: str):
+        """
+        :param db_path: players.db 的路径(与玩家数据同库，便于在同一个事务中提交)
+        """
+        self.db = database.get_pool(db_path)
+        # 事务内的修改: pending 为 (user_id, 物品名) -> 物品信息，None 表示删除；
+        # bulk_deletes 为按条件批量删除的 (user_id, 类型, 最高稀有度)
+        self.local = threading.local()
+        self._init_table()
+
+    def _init_table(self):
+        """创建背包数据表，并迁移 players.inventory 中的 JSON 背包"""
+        create_table_query = """
+        CREATE TABLE IF NOT EXISTS inventory_items (
+            id INTEGER PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            type TEXT,
+            rarity INTEGER,
+            amount INTEGER NOT NULL DEFAULT 0,
+            uuid TEXT,
+            price INTEGER,
+            data TEXT NOT NULL DEFAULT '{}',
+            UNIQUE (user_id, name)
+        )
+        """
+        create_index_query = "CREATE INDEX IF NOT EXISTS idx_inventory_type_rarity ON inventory_items(user_id, type, rarity);"
+        try:
+            with self.db.transaction() as conn:
+                conn.execute(create_table_query)
+                conn.execute(create_index_query)
+                self._migrate_json(conn)
+        except sqlite3.Error as e:
+            logger.error(f"初始化背包数据表失败: {e}")
+            raise
+
+    def _migrate_json(self, conn):
+        """将 players.inventory 中的 JSON 背包拆分为数据行，迁移完成后清空该列"""
+        rows = conn.execute(
+            "SELECT user_id, inventory FROM players WHERE inventory IS NOT NULL AND inventory NOT IN ('', '{}')"
+        ).fetchall()
+        if not rows:
+            return
+        migrated = 0
+        # 成功迁移的玩家，只清空这些玩家的 inventory 列；无法解析的背包保留原值
+        migrated_users = []
+        for row in rows:
+            try:
+                items = json.loads(row["inventory"])
+            except (TypeError, json.JSONDecodeError):
+                logger.error(f"无法解析玩家 {row['user_id']} 的背包，跳过迁移: {row['inventory']}")
+                continue
+            if not isinstance(items, dict):
+                logger.error(f"玩家 {row['user_id']} 的背包不是字典，跳过迁移: {row['inventory']}")
+                continue
+            complete = True
+            for name, item in items.items():
+                if isinstance(item, dict):
+                    # 已存在的行说明之前迁移过，以数据表为准
+                    self._write_item(conn, row["user_id"], name, item, overwrite=False)
+                    migrated += 1
+                else:
+                    logger.error(f"玩家 {row['user_id']} 的物品 {name} 格式错误，保留原背包数据: {item}")
+                    complete = False
+            if complete:
+                migrated_users.append((row["user_id"],))
+        conn.executemany("UPDATE players SET inventory = '{}' WHERE user_id = ?", migrated_users)
+        logger.info(f"已将 {len(migrated_users)} 位玩家的 {migrated} 件背包物品迁移到 inventory_items 表")
+
+    @classmethod
+    def _encode(cls, item: dict) -> tuple:
+        """物品信息 -> (type, rarity, amount, uuid, price, data)"""
+        extra = {}
+        values = dict.fromkeys(cls.COLUMNS)
+        for key, value in item.items():
+            if key in values and value is not None:
+                values[key] = value
+            else:
+                extra[key] = value
+        if values['amount'] is None:
+            values['amount'] = 0
+        return (*values.values(), json.dumps(extra, ensure_ascii=False))
+
+    @classmethod
+    def _decode(cls, row) -> dict:
+        """数据行 -> 物品信息"""
+        item = json.loads(row["data"]) if row["data"] else {}
+        for column in cls.COLUMNS:
+            value = row[column]
+            if value is not None:
+                item[column] = value
+        return item
+
+    def _write_item(self, conn, user_id: str, name: str, item: Optional[dict], overwrite: bool = True):
+        """写入(或删除)单件物品"""
+        if item is None:
+            conn.execute("DELETE FROM inventory_items WHERE user_id = ? AND name = ?", (user_id, name))
+            return
+        conflict = """
+            DO UPDATE SET type = excluded.type, rarity = excluded.rarity, amount = excluded.amount,
+                          uuid = excluded.uuid, price = excluded.price, data = excluded.data
+        """ if overwrite else "DO NOTHING"
+        conn.execute(
+            f"""
+            INSERT INTO inventory_items (user_id, name, type, rarity, amount, uuid, price, data)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(user_id, name) {conflict}
+            """,
+            (user_id, name, *self._encode(item))
+        )
+
+    def _pending(self) -> Optional[dict]:
+        return getattr(self.local, 'pending', None)
+
+    def _bulk_deleted(self, user_id: str, item_type, rarity) -> bool:
+        """数据库中的物品是否已被当前事务中的批量删除移除"""
+        for owner, deleted_type, max_rarity in getattr(self.local, 'bulk_deletes', None) or ():
+            if owner == user_id and item_type == deleted_type and rarity is not None and rarity <= max_rarity:
+                return True
+        return False
+
+    # ---------------- 读取 ----------------
+
+    def get_item(self, user_id: str, name: str) -> Optional[dict]:
+        """
+        获取单件物品(包含当前事务中尚未提交的修改)。
+
+        :return: 物品信息(副本)，没有该物品时返回 None
+        """
+        pending = self._pending()
+        if pending and (user_id, name) in pending:
+            item = pending[(user_id, name)]
+            return dict(item) if item is not None else None
+        row = self.db.reader().execute(
+            "SELECT type, rarity, amount, uuid, price, data FROM inventory_items WHERE user_id = ? AND name = ?",
+            (user_id, name)
+        ).fetchone()
+        if row is None or self._bulk_deleted(user_id, row["type"], row["rarity"]):
+            return None
+        return self._decode(row)
+
+    def is_empty(self, user_id: str) -> bool:
+        """
+        玩家背包是否为空(包含当前事务中尚未提交的修改)，只查询一行，不加载物品。
+        """
+        query = "SELECT 1 FROM inventory_items WHERE user_id = ?"
+        params = [user_id]
+        pending = self._pending()
+        if pending:
+            deleted_names = []
+            for (owner, name), item in pending.items():
+                if owner != user_id:
+                    continue
+                if item is not None:
+                    # 事务中新增或修改过的物品
+                    return False
+                deleted_names.append(name)
+            if deleted_names:
+                query += f" AND name NOT IN ({', '.join('?' * len(deleted_names))})"
+                params.extend(deleted_names)
+        for owner, item_type, max_rarity in getattr(self.local, 'bulk_deletes', None) or ():
+            if owner == user_id:
+                query += " AND NOT (type = ? AND rarity <= ?)"
+                params.extend((item_type, max_rarity))
+        return self.db.reader().execute(query + " LIMIT 1", params).fetchone() is None
+
+    def get_items(self, user_id: str, item_type: Optional[str] = None) -> dict:
+        """
+        获取玩家的全部物品(包含当前事务中尚未提交的修改)。
+
+        :param item_type: 只获取指定类型的物品
+        :return: 物品名 -> 物品信息，按获得顺序排列
+        """
+        query = "SELECT name, type, rarity, amount, uuid, price, data FROM inventory_items WHERE user_id = ?"
+        params = [user_id]
+        if item_type is not None:
+            query += " AND type = ?"
+            params.append(item_type)
+        rows = self.db.reader().execute(query + " ORDER BY id", params).fetchall()
+        items = {
+            row["name"]: self._decode(row) for row in rows
+            if not self._bulk_deleted(user_id, row["type"], row["rarity"])
+        }
+        pending = self._pending()
+        if pending:
+            for (owner, name), item in pending.items():
+                if owner != user_id:
+                    continue
+                if item is None:
+                    items.pop(name, None)
+                elif item_type is None or item.get('type') == item_type:
+                    items[name] = dict(item)
+        return items
+
+    # ---------------- 修改 ----------------
+
+    def _persist(self, user_id: str, name: str, item: Optional[dict]):
+        """保存单件物品，事务内延迟到提交时与玩家数据一起写入"""
+        pending = self._pending()
+        if pending is not None:
+            pending[(user_id, name)] = item
+            return
+        try:
+            with self.db.transaction() as conn:
+                self._write_item(conn, user_id, name, item)
+        except sqlite3.Error as e:
+            logger.error(f"保存玩家 {user_id} 的物品 {name} 失败: {e}")
+            raise
+
+    def add(self, user_id: str, name: str, item: dict, amount: int = 1) -> dict:
+        """
+        增加物品：已有同名物品时只增加数量，否则以 item 的属性新建一行。
+
+        :return: 修改后的物品信息
+        """
+        current = self.get_item(user_id, name)
+        if current is None:
+            current = dict(item)
+            current['amount'] = amount
+        else:
+            current['amount'] += amount
+        self._persist(user_id, name, current)
+        return current
+
+    def remove(self, user_id: str, name: str, amount: int = 1) -> Optional[dict]:
+        """
+        减少物品数量，数量减到 0 时删除该物品。
+
+        :return: 修改前的物品信息，没有该物品时返回 None
+        """
+        current = self.get_item(user_id, name)
+        if current is None:
+            return None
+        remain = current['amount'] - amount
+        self._persist(user_id, name, dict(current, amount=remain) if remain > 0 else None)
+        return current
+
+    def put(self, user_id: str, name: str, item: dict):
+        """放入物品，覆盖同名物品的全部属性"""
+        self._persist(user_id, name, dict(item))
+
+    def delete(self, user_id: str, name: str):
+        """删除物品"""
+        self._persist(user_id, name, None)
+
+    def replace(self, user_id: str, items: dict):
+        """
+        用完整的背包字典替换玩家背包(兼容整体写入背包的旧接口)，只写入有变化的物品。
+        """
+        current = self.get_items(user_id)
+        for name in current.keys() - items.keys():
+            self._persist(user_id, name, None)
+        for name, item in items.items():
+            if current.get(name) != item:
+                self._persist(user_id, name, dict(item))
+
+    def delete_matching(self, user_id: str, item_type: str, max_rarity: int) -> list:
+        """
+        按条件批量删除物品(批量出售)：通过 (user_id, type, rarity) 索引选出类型为 item_type、
+        稀有度不高于 max_rarity 的物品，再用一条 DELETE 语句删除，不解析物品的其余属性。
+        事务内的删除在提交时与玩家数据在同一个数据库事务中执行。
+
+        :return: 被删除物品的 (物品名, 数量, 单价) 列表，按获得顺序排列
+        """
+        query = """
+            SELECT name, rarity, amount, price FROM inventory_items
+            WHERE user_id = ? AND type = ? AND rarity <= ? ORDER BY id
+        """
+        delete_query = "DELETE FROM inventory_items WHERE user_id = ? AND type = ? AND rarity <= ?"
+        params = (user_id, item_type, max_rarity)
+        pending = self._pending()
+        if pending is None:
+            try:
+                with self.db.transaction() as conn:
+                    rows = conn.execute(query, params).fetchall()
+                    conn.execute(delete_query, params)
+            except sqlite3.Error as e:
+                logger.error(f"批量删除玩家 {user_id} 的物品失败: {e}")
+                raise
+            return [(row["name"], row["amount"], row["price"] or 0) for row in rows]
+
+        # 数据库中的物品(不含已在事务中修改或删除的)
+        deleted = [
+            (row["name"], row["amount"], row["price"] or 0)
+            for row in self.db.reader().execute(query, params)
+            if (user_id, row["name"]) not in pending
+            and not self._bulk_deleted(user_id, item_type, row["rarity"])
+        ]
+        # 事务中新增或修改过的物品
+        for (owner, name), item in pending.items():
+            if owner != user_id or item is None or item.get('type') != item_type:
+                continue
+            rarity = item.get('rarity')
+            if rarity is not None and rarity <= max_rarity:
+                deleted.append((name, item['amount'], item.get('price') or 0))
+                pending[(owner, name)] = None
+        self.local.bulk_deletes.append(params)
+        return deleted
+
+    def delete_all(self, conn, user_id: str):
+        """在调用方的事务中删除玩家的全部物品(注销时)"""
+        conn.execute("DELETE FROM inventory_items WHERE user_id = ?", (user_id,))
+        pending = self._pending()
+        if pending:
+            for key in [key for key in pending if key[0] == user_id]:
+                del pending[key]
+        bulk_deletes = getattr(self.local, 'bulk_deletes', None)
+        if bulk_deletes:
+            bulk_deletes[:] = [entry for entry in bulk_deletes if entry[0] != user_id]
+
+    # ---------------- 事务 ----------------
+
+    def write_pending(self, conn):
+        """
+        在调用方的数据库事务中写入当前事务内修改过的物品。
+
+        :param conn: players.db 的写连接(调用方持有写入锁并负责提交)
+        """
+        bulk_deletes = getattr(self.local, 'bulk_deletes', None)
+        if bulk_deletes:
+            # 先执行批量删除，之后写入的单件物品(例如售出后又获得的同名物品)不受影响
+            conn.executemany(
+                "DELETE FROM inventory_items WHERE user_id = ? AND type = ? AND rarity <= ?",
+                bulk_deletes
+            )
+            bulk_deletes.clear()
+        pending = self._pending()
+        if pending:
+            for (user_id, name), item in pending.items():
+                self._write_item(conn, user_id, name, item)
+            pending.clear()
+
+    @contextmanager
+    def transaction(self):
+        """
+        背包事务：范围内修改的物品在退出时统一写入(或由 write_pending 并入玩家数据的事务)，
+        发生异常时全部放弃。嵌套调用时并入外层事务。
+        """
+        if self._pending() is not None:
+            yield
+            return
+        self.local.pending = {}
+        self.local.bulk_deletes = []
+        try:
+            yield
+            if self.local.pending or self.local.bulk_deletes:
+                with self.db.transaction() as conn:
+                    self.write_pending(conn)
+        finally:
+            self.local.pending = None
+            self.local.bulk_deletes = None
@@ -0,0 +1,168 @@
+import bisect
+import threading
+from typing import Optional
+
+
+class Leaderboard:
+    """
+    内存排行榜：
+        1) 金币榜按 (金币, 注册顺序) 排序，等级榜按 (等级, 经验, 注册顺序) 排序
+        2) 使用有序列表 + 二分查找维护名次，玩家数据变化时只调整该玩家的位置
+        3) 启动时从数据库重建，之后随玩家数据的写入增量更新
+    """
+
+    BOARD_GOLD = "金币"
+    BOARD_LEVEL = "等级"
+    # 影响排行榜的字段
+    FIELDS = ('nickname', 'gold', 'level', 'exp')
+
+    def __init__(self):
+        # user_id -> 玩家数据(nickname, gold, level, exp, seq)
+        self._entries = {}
+        # 各排行榜的有序键列表，键越小排名越靠前
+        self._boards = {self.BOARD_GOLD: [], self.BOARD_LEVEL: []}
+        self._lock = threading.Lock()
+        # 是否已从数据库构建
+        self.ready = False
+
+    @staticmethod
+    def _to_int(value) -> int:
+        try:
+            return int(float(value))
+        except (ValueError, TypeError):
+            return 0
+
+    def _key(self, board: str, user_id: str, entry: dict) -> tuple:
+        """生成玩家在排行榜中的排序键"""
+        if board == self.BOARD_GOLD:
+            return (-entry['gold'], entry['seq'], user_id)
+        return (-entry['level'], -entry['exp'], entry['seq'], user_id)
+
+    def _insert(self, user_id: str, entry: dict) -> None:
+        self._entries[user_id] = entry
+        for board, keys in self._boards.items():
+            bisect.insort(keys, self._key(board, user_id, entry))
+
+    def _remove(self, user_id: str) -> Optional[dict]:
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            for board, keys in self._boards.items():
+                key = self._key(board, user_id, entry)
+                index = bisect.bisect_left(keys, key)
+                if index < len(keys) and keys[index] == key:
+                    del keys[index]
+        return entry
+
+    def rebuild(self, rows) -> None:
+        """
+        使用数据库中的全部玩家重建排行榜。
+
+        :param rows: 可迭代的 (seq, user_id, nickname, gold, level, exp)，seq 为注册顺序(rowid)
+        """
+        entries = {}
+        for seq, user_id, nickname, gold, level, exp in rows:
+            entries[user_id] = {
+                'nickname': nickname,
+                'gold': self._to_int(gold),
+                'level': self._to_int(level),
+                'exp': self._to_int(exp),
+                'seq': seq,
+            }
+        boards = {
+            board: sorted(self._key(board, user_id, entry) for user_id, entry in entries.items())
+            for board in self._boards
+        }
+        with self._lock:
+            self._entries = entries
+            self._boards = boards
+            self.ready = True
+
+    def add(self, user_id: str, seq: int, nickname: str, gold, level, exp) -> None:
+        """新增玩家(注册)"""
+        entry = {
+            'nickname': nickname,
+            'gold': self._to_int(gold),
+            'level': self._to_int(level),
+            'exp': self._to_int(exp),
+            'seq': seq,
+        }
+        with self._lock:
+            self._remove(user_id)
+            self._insert(user_id, entry)
+
+    def update(self, user_id: str, fields: dict) -> None:
+        """
+        玩家数据写入后更新排行榜，不涉及排行榜字段时直接返回。
+
+        :param user_id: 玩家ID
+        :param fields: 已写入的字段
+        """
+        if not any(field in fields for field in self.FIELDS):
+            return
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            entry = dict(entry)
+            for field in self.FIELDS:
+                if field in fields:
+                    entry[field] = fields[field] if field == 'nickname' else self._to_int(fields[field])
+            self._remove(user_id)
+            self._insert(user_id, entry)
+
+    def remove(self, user_id: str) -> None:
+        """移除玩家(注销)"""
+        with self._lock:
+            self._remove(user_id)
+
+    def _row(self, user_id: str, entry: dict) -> dict:
+        return {
+            'user_id': user_id,
+            'nickname': entry['nickname'],
+            'gold': entry['gold'],
+            'level': entry['level'],
+            'exp': entry['exp'],
+        }
+
+    def top(self, board: str, limit: int = 10) -> list:
+        """
+        获取排行榜前 N 名。
+
+        :return: 玩家数据列表
+        """
+        with self._lock:
+            return [self._row(key[-1], self._entries[key[-1]]) for key in self._boards[board][:limit]]
+
+    def rank(self, user_id: str, board: str):
+        """
+        获取玩家的名次。
+
+        :return: (名次, 玩家数据)，玩家不存在时返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            index = bisect.bisect_left(self._boards[board], self._key(board, user_id, entry))
+            return index + 1, self._row(user_id, entry)
+
+    def around(self, user_id: str, board: str, radius: int = 2) -> list:
+        """
+        获取玩家前后各 radius 名的玩家。
+
+        :return: [(名次, 玩家数据), ...]，玩家不存在时返回空列表
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return []
+            keys = self._boards[board]
+            index = bisect.bisect_left(keys, self._key(board, user_id, entry))
+            start = max(0, index - radius)
+            return [
+                (start + offset + 1, self._row(key[-1], self._entries[key[-1]]))
+                for offset, key in enumerate(keys[start:index + radius + 1])
+            ]
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,160 @@
+import time
+import threading
+from contextlib import contextmanager
+from . import command_stats
+from common.log import logger
+
+
+class LockOrderConflict(BaseException):
+    """
+    当线程已持有玩家锁、又需要一个排序更靠前且被占用的玩家锁时抛出。
+    调用方应释放全部锁，并按 user_ids 重新按序加锁后重试整个指令。
+    继承 BaseException(与 KeyboardInterrupt 相同)，处理函数中的 except Exception 不会拦截，
+    保证冲突能传到 game_system_handle 的重试循环。
+    """
+    def __init__(self, user_ids):
+        super().__init__(f"需要按顺序重新获取玩家锁: {sorted(user_ids)}")
+        self.user_ids = set(user_ids)
+
+
+class PlayerLockManager:
+    """
+    按 user_id 划分的玩家锁管理器：
+        1) 不同玩家的指令互不阻塞，可以并行执行
+        2) 涉及多名玩家的指令按 user_id 排序后依次加锁，避免死锁
+        3) 统计锁的争用次数与等待时间，便于观察高负载下的表现
+    """
+
+    def __init__(self):
+        # user_id -> 锁
+        self._locks = {}
+        # 保护锁表本身
+        self._table_lock = threading.Lock()
+        # 每个线程当前持有的锁(按加锁顺序)
+        self._local = threading.local()
+        # 争用统计
+        self._stats_lock = threading.Lock()
+        self._acquisitions = 0
+        self._contentions = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _get_lock(self, user_id: str) -> threading.Lock:
+        """获取(必要时创建) user_id 对应的锁"""
+        lock = self._locks.get(user_id)
+        if lock is None:
+            with self._table_lock:
+                lock = self._locks.setdefault(user_id, threading.Lock())
+        return lock
+
+    def _held(self) -> list:
+        """当前线程持有的 user_id 列表"""
+        held = getattr(self._local, 'held', None)
+        if held is None:
+            held = []
+            self._local.held = held
+        return held
+
+    def _record(self, contended: bool, wait: float) -> None:
+        with self._stats_lock:
+            self._acquisitions += 1
+            if contended:
+                self._contentions += 1
+                self._total_wait += wait
+                if wait > self._max_wait:
+                    self._max_wait = wait
+
+    def _acquire_one(self, user_id: str) -> None:
+        """阻塞获取单个玩家锁，并记录是否发生争用"""
+        lock = self._get_lock(user_id)
+        if lock.acquire(blocking=False):
+            self._record(False, 0.0)
+        else:
+            start = time.perf_counter()
+            lock.acquire()
+            wait = time.perf_counter() - start
+            self._record(True, wait)
+            command_stats.record_lock_wait(wait)
+        self._held().append(user_id)
+
+    def _release_to(self, depth: int) -> None:
+        """释放当前线程在 depth 之后获取的所有锁"""
+        held = self._held()
+        while len(held) > depth:
+            self._locks[held.pop()].release()
+
+    def acquire(self, *user_ids) -> None:
+        """
+        在已有的 hold() 范围内追加玩家锁，锁会在该范围结束时统一释放。
+
+        :param user_ids: 需要追加的玩家ID，已持有的会被忽略
+        :raises LockOrderConflict: 新锁排序靠前且已被其他线程占用
+        """
+        held = self._held()
+        if not getattr(self._local, 'depth', 0):
+            raise RuntimeError("acquire() 必须在 hold() 范围内调用")
+        pending = sorted({str(uid) for uid in user_ids if uid} - set(held))
+        if not pending:
+            return
+        highest = max(held) if held else None
+        depth = len(held)
+        for user_id in pending:
+            if highest is None or user_id > highest:
+                # 顺序正确，可以放心阻塞等待
+                self._acquire_one(user_id)
+                highest = user_id
+            elif self._get_lock(user_id).acquire(blocking=False):
+                # 顺序不正确但锁空闲，直接占用
+                self._record(False, 0.0)
+                held.append(user_id)
+            else:
+                # 顺序不正确且锁被占用，阻塞会有死锁风险，退回重新按序加锁
+                self._release_to(depth)
+                raise LockOrderConflict(set(held) | set(pending))
+
+    @contextmanager
+    def hold(self, *user_ids):
+        """
+        按 user_id 排序依次获取玩家锁，退出时释放范围内获取的全部锁(包括 acquire 追加的锁)。
+
+        :param user_ids: 需要加锁的玩家ID
+        """
+        depth = len(self._held())
+        self._local.depth = getattr(self._local, 'depth', 0) + 1
+        try:
+            self.acquire(*user_ids)
+            yield
+        finally:
+            self._release_to(depth)
+            self._local.depth -= 1
+
+    def get_stats(self) -> dict:
+        """获取锁争用统计"""
+        with self._stats_lock:
+            return {
+                'players': len(self._locks),
+                'acquisitions': self._acquisitions,
+                'contentions': self._contentions,
+                'total_wait': self._total_wait,
+                'max_wait': self._max_wait,
+            }
+
+    def get_stats_report(self) -> str:
+        """格式化锁争用统计"""
+        stats = self.get_stats()
+        acquisitions = stats['acquisitions']
+        contentions = stats['contentions']
+        rate = contentions / acquisitions if acquisitions else 0
+        avg_wait = stats['total_wait'] / contentions if contentions else 0
+        report = [
+            "🔒 玩家锁统计",
+            "──────────────",
+            f"👥 锁数量: {stats['players']}",
+            f"🔁 加锁次数: {acquisitions}",
+            f"⏳ 争用次数: {contentions} ({rate:.2%})",
+            f"⏱️ 总等待: {stats['total_wait'] * 1000:.1f} ms",
+            f"⏱️ 平均等待: {avg_wait * 1000:.2f} ms",
+            f"⏱️ 最长等待: {stats['max_wait'] * 1000:.2f} ms",
+        ]
+        logger.debug(f"玩家锁统计: {stats}")
+        return "\n".join(report)
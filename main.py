@@ -1,12 +1,14 @@
 import os
 import re
+import atexit
 import time
 import json
-import random
 import sqlite3
 import datetime
 import threading
+from contextlib import contextmanager
 from . import constants
+from . import formulas
 from .shop import Shop
 from .player import Player
 from typing import Dict
@@ -16,7 +18,17 @@ from datetime import datetime, time as datetime_time
 from typing import Optional, Dict
 from .rouge_equipment import RougeEquipment
 from .monopoly import MonopolySystem
+from .inventory import InventoryStore
 from .fishing_system import FishingSystem
+from .battle_engine import PveBattle, PvpDuel
+from .lock_manager import PlayerLockManager, LockOrderConflict
+from .command_executor import CommandExecutor
+from .player_cache import PlayerCache
+from .write_behind import WriteBehindBuffer
+from .leaderboard import Leaderboard
+from . import database
+from . import random_service
+from . import command_stats
 import plugins
 from plugins import *
 from bridge.reply import Reply, ReplyType
@@ -33,8 +45,13 @@ from bridge.reply import Reply, ReplyType
 class textGame(Plugin):
     def __init__(self):
         super().__init__()
-        # 初始化锁
-        self.lock = threading.Lock()
+        # 初始化玩家锁(按 user_id 加锁，不同玩家的指令可以并行执行)
+        self.player_locks = PlayerLockManager()
+        # 指令性能统计(耗时、锁等待、SQL 语句数与读写行数)
+        self.command_stats = command_stats.get_command_stats()
+        # 指令分发表(只构建一次)及所有指令的首字符，用于快速忽略非游戏指令的消息
+        self.command_table = self._build_command_table()
+        self.command_initials = frozenset(name[0] for name in self.command_table)
         # 使用线程本地存储
         self.local = threading.local()
         # 注册处理上下文的事件
@@ -45,6 +62,23 @@ class textGame(Plugin):
             # 加载配置模板
             if not self.config:
                 self.config = self._load_config_template()
+            # 数据库连接参数
+            database.configure(
+                mmap_size=self.config.get("sqlite_mmap_size"),
+                cache_size=self.config.get("sqlite_cache_size"),
+                busy_timeout=self.config.get("sqlite_busy_timeout")
+            )
+            # 异步执行指令(有界线程池，每名玩家的指令按顺序执行)
+            self.command_executor = None
+            # 不支持修饰回复的通道类型(已提示过)
+            self._undecorated_channels = set()
+            if self.config.get("async_commands", constants.ASYNC_COMMANDS):
+                self.command_executor = CommandExecutor(
+                    max_workers=int(self.config.get("command_workers", constants.COMMAND_WORKERS)),
+                    max_pending=int(self.config.get("command_queue_limit", constants.COMMAND_QUEUE_LIMIT))
+                )
+            # 随机数种子(未配置时使用系统熵源)
+            random_service.seed(self.config.get("rng_seed", constants.RNG_SEED))
             # 检查data目录
             self.data_dir = os.path.join(os.path.dirname(__file__), "data")
             os.makedirs(self.data_dir, exist_ok=True)
@@ -52,6 +86,13 @@ class textGame(Plugin):
             self.player_db_path = os.path.join(self.data_dir, "players.db")
             # 加载管理员密码
             self.admin_password = self.config.get("admin_password", "7301")
+            # 初始化玩家缓存
+            self.player_cache = PlayerCache(
+                max_size=int(self.config.get("player_cache_size", constants.PLAYER_CACHE_SIZE)),
+                ttl=int(self.config.get("player_cache_ttl", constants.PLAYER_CACHE_TTL))
+            )
+            # 初始化内存排行榜
+            self.leaderboard = Leaderboard()
             # 初始化管理员列表
             self.admin_list = []
             # 游戏系统状态
@@ -63,13 +104,40 @@ class textGame(Plugin):
             # 初始化玩家类中的静态变量
             Player.set_game_handle(self)
             # 初始化随机装备系统
-            self.rouge_equipment_system = RougeEquipment(self.data_dir)
+            self.rouge_equipment_system = RougeEquipment(
+                self.data_dir,
+                cache_size=int(self.config.get("equipment_cache_size", constants.EQUIPMENT_CACHE_SIZE))
+            )
             # 初始化大富翁系统
             self.monopoly = MonopolySystem(self.data_dir)
             # 连接到Player SQLite数据库
             try:
                 self._connect()
+                # 冷却时间、位置等字段延迟批量写入(间隔为 0 时直接写入)
+                self.write_behind = None
+                write_behind_interval = int(self.config.get("write_behind_interval", constants.WRITE_BEHIND_INTERVAL))
+                if write_behind_interval > 0:
+                    self.write_behind = WriteBehindBuffer(
+                        constants.WRITE_BEHIND_FIELDS,
+                        self._flush_write_behind,
+                        write_behind_interval,
+                        write_lock=self.db_lock
+                    )
+                    self.write_behind.start()
+                    # 进程退出前写入剩余的更新
+                    atexit.register(self.write_behind.stop)
                 self._initialize_database()
+                # 玩家背包(每件物品一行，与玩家数据同库)
+                self.inventory_store = InventoryStore(self.player_db_path)
+                # 定期删除没有被任何玩家引用的装备(间隔为 0 时不压缩)
+                equipment_compact_interval = int(self.config.get("equipment_compact_interval", constants.EQUIPMENT_COMPACT_INTERVAL))
+                if equipment_compact_interval > 0:
+                    self.rouge_equipment_system.start_compaction(self.player_db_path, equipment_compact_interval)
+                    atexit.register(self.rouge_equipment_system.stop_compaction)
+                if self.command_executor is not None:
+                    # 进程退出前执行完排队中的指令(atexit 后注册先执行，指令执行完后才停止延迟写入)
+                    atexit.register(self.command_executor.shutdown)
+                self._rebuild_leaderboard()
                 logger.debug(f"玩家数据库连接成功！")
             except sqlite3.Error as e:
                 logger.error(f"玩家数据库连接或初始化失败: {e}")
@@ -80,6 +148,71 @@ class textGame(Plugin):
             self.game_status = False
             raise
 
+    # 指令别名 -> 指令(维护模式判断、性能统计等均使用指令本名)
+    COMMAND_ALIASES = {
+        "菜单": "游戏菜单",
+        "排行": "排行榜",
+        "鉴权": "认证",
+        "auth": "认证",
+        "购买地产": "购买地块",
+        "升级地产": "升级地块",
+        "我的地块": "我的地产",
+        "支付房租": "支付租金",
+    }
+
+    def _build_command_table(self) -> dict:
+        """
+        构建指令分发表：指令或别名 -> (指令, 处理函数)，处理函数的参数统一为 (user_id, content)。
+        """
+        handlers = {
+            "注册": self.register_player,
+            "注销": lambda user_id, content: self.unregister_player(user_id),
+            "改名": self.change_nickname,
+            "状态": lambda user_id, content: self.get_player_status(user_id, False),
+            "详细状态": lambda user_id, content: self.get_player_status(user_id, True),
+            "签到": lambda user_id, content: self.daily_checkin(user_id),
+            "商店": lambda user_id, content: self.shop_system.show_shop(content),
+            "购买": lambda user_id, content: self.shop_system.buy_item(user_id, content),
+            "背包": self.show_inventory,
+            "装备": self.equip_from_inventory,
+            "游戏菜单": lambda user_id, content: self.game_help(),
+            "赠送": self.give_item,
+            "钓鱼": lambda user_id, content: self.fishing(user_id),
+            "图鉴": self.show_fish_collection,
+            "出售": lambda user_id, content: self.shop_system.sell_item(user_id, content),
+            "下注": self.gamble,
+            "外出": lambda user_id, content: self.go_out(user_id),
+            "冒险": lambda user_id, content: self.go_adventure(user_id),
+            "使用": self.use_item,
+            "排行榜": self.show_leaderboard,
+            "挑战": self.attack_player,
+            "接受挑战": lambda user_id, content: self.accept_challenge(user_id),
+            "拒绝挑战": lambda user_id, content: self.refuse_challenge(user_id),
+            # 认证指令需要知道用户输入的是哪个别名，才能截取出密码
+            "认证": lambda user_id, content: self.authenticate(content.split(maxsplit=1)[0], user_id, content),
+            "开机": lambda user_id, content: self.toggle_game_system(user_id, 'start'),
+            "关机": lambda user_id, content: self.toggle_game_system(user_id, 'stop'),
+            "充值": self.toggle_recharge,
+            "购买地块": lambda user_id, content: self.buy_property(user_id),
+            "升级地块": lambda user_id, content: self.upgrade_property(user_id),
+            "我的地产": self.show_properties,
+            "收购": lambda user_id, content: self.acquisition_of_property(user_id),
+            "支付租金": lambda user_id, content: self.pay_the_rent(user_id),
+            "地图": self.show_map,
+            "锁统计": lambda user_id, content: self.show_lock_stats(user_id),
+            "缓存统计": lambda user_id, content: self.show_cache_stats(user_id),
+            "性能统计": self.show_command_stats,
+        }
+        table = {cmd: (cmd, handler) for cmd, handler in handlers.items()}
+        for alias, cmd in self.COMMAND_ALIASES.items():
+            table[alias] = (cmd, handlers[cmd])
+        return table
+
+    @property
+    def rng(self):
+        """当前线程(请求)使用的随机数生成器"""
+        return random_service.get_rng()
+
     def _load_config_template(self):
         logger.debug("No textGame plugin config.json, use plugins/game/config.json.template")
         try:
@@ -93,25 +226,28 @@ class textGame(Plugin):
 
     def _get_connection(self) -> sqlite3.Connection:
         """
-        获取数据库连接，如果连接不存在则创建。
+        获取当前线程的只读数据库连接，写入请使用 _get_write_connection。
         """
-        if not hasattr(self, 'conn') or self.conn is None:
-            try:
-                self.conn = sqlite3.connect(
-                    self.player_db_path, check_same_thread=False
-                )
-                self.conn.row_factory = sqlite3.Row
-                logger.debug("数据库连接已创建并保持打开状态。")
-            except sqlite3.Error as e:
-                logger.error(f"创建数据库连接失败: {e}")
-                raise
-        return self.conn
+        return self.player_db.reader()
+
+    def _get_write_connection(self) -> sqlite3.Connection:
+        """
+        获取共享的写连接，使用时必须持有 self.db_lock。
+        """
+        return self.player_db.writer
 
     def _connect(self) -> None:
         """
-        初始化连接（通过 _get_connection 实现）。
+        初始化玩家数据库的连接池(WAL 模式，每个线程独立读连接，写入串行化)。
         """
-        self._get_connection()
+        try:
+            self.player_db = database.get_pool(self.player_db_path)
+            # 玩家数据库写入锁(多个线程共享同一个写连接)
+            self.db_lock = self.player_db.write_lock
+            logger.debug("数据库连接已创建并保持打开状态。")
+        except sqlite3.Error as e:
+            logger.error(f"创建数据库连接失败: {e}")
+            raise
 
     def _initialize_database(self) -> None:
         """
@@ -144,16 +280,33 @@ class textGame(Plugin):
         )
         """
         create_index_query = "CREATE UNIQUE INDEX IF NOT EXISTS idx_nickname ON players(nickname);"
+        # 排行榜使用的索引
+        create_gold_index_query = "CREATE INDEX IF NOT EXISTS idx_gold ON players(gold);"
+        create_level_index_query = "CREATE INDEX IF NOT EXISTS idx_level_exp ON players(level, exp);"
         try:
-            conn = self._get_connection()
-            with conn:
+            conn = self._get_write_connection()
+            with self.db_lock, conn:
                 conn.execute(create_table_query)
                 conn.execute(create_index_query)
+                conn.execute(create_gold_index_query)
+                conn.execute(create_level_index_query)
             logger.debug("成功初始化数据库表和索引。")
         except sqlite3.Error as e:
             logger.error(f"初始化数据库表或索引失败: {e}")
             raise
 
+    def _rebuild_leaderboard(self) -> None:
+        """
+        从数据库重建内存排行榜。
+        """
+        try:
+            conn = self._get_connection()
+            rows = conn.execute("SELECT rowid, user_id, nickname, gold, level, exp FROM players").fetchall()
+            self.leaderboard.rebuild(tuple(row) for row in rows)
+            logger.debug(f"内存排行榜构建完成，共 {len(self.leaderboard)} 位玩家。")
+        except sqlite3.Error as e:
+            logger.error(f"构建内存排行榜失败，将使用数据库查询排行榜: {e}")
+
     def get_player_data(self, name, *fields):
         """
         根据 name 检索指定数据条目，并返回指定字段的值。
@@ -165,6 +318,11 @@ class textGame(Plugin):
         if not fields:
             raise ValueError("必须指定至少一个字段名进行查询。")
 
+        # 优先从玩家缓存中读取
+        cached = self.player_cache.get_by_nickname(name)
+        if cached is not None and all(field in cached for field in fields):
+            return tuple(cached[field] for field in fields)
+
         fields_str = ", ".join(fields)  # 动态拼接字段名
         msg = f"SELECT {fields_str} FROM players WHERE nickname = ?"
 
@@ -185,7 +343,7 @@ class textGame(Plugin):
         将玩家对象插入到数据库中
         :param player: Player 类的实例
         """
-        player_data = player.data
+        player_data = player.to_dict()
         standard_fields = [
             'user_id',
             'nickname',
@@ -249,9 +407,21 @@ class textGame(Plugin):
         )
         """
         try:
-            conn = self._get_connection()
-            with conn:
-                conn.execute(insert_query, complete_player_data)
+            conn = self._get_write_connection()
+            with self.db_lock:
+                with conn:
+                    cursor = conn.execute(insert_query, complete_player_data)
+                self.player_cache.invalidate(complete_player_data['user_id'])
+                if self.write_behind is not None:
+                    self.write_behind.discard(complete_player_data['user_id'])
+                self.leaderboard.add(
+                    complete_player_data['user_id'],
+                    cursor.lastrowid,
+                    complete_player_data['nickname'],
+                    complete_player_data['gold'],
+                    complete_player_data['level'],
+                    complete_player_data['exp']
+                )
             logger.info(f"玩家 {complete_player_data['nickname']} 已成功插入数据库！")
         except sqlite3.IntegrityError as e:
             logger.error(f"插入玩家数据时发生完整性错误（可能是重复的 user_id 或 nickname）: {e} | 数据: {complete_player_data}")
@@ -277,6 +447,43 @@ class textGame(Plugin):
             logger.error(f"查询昵称 '{nickname}' 时出错: {e}")
             return False  # 出现错误时返回 False
 
+    def _fetch_player_row(self, field: str, value: str) -> Optional[dict]:
+        """
+        从数据库查询玩家的原始行数据，并写入玩家缓存。
+
+        :param field: 查询字段(user_id 或 nickname)
+        :param value: 查询值
+        :return: 原始行数据，如果未找到则返回 None
+        """
+        # 查询前获取读取序号，查询期间该玩家被改写时不会写入旧数据
+        token = self.player_cache.read_token()
+        conn = self._get_connection()
+        cursor = conn.execute(f"SELECT * FROM players WHERE {field} = ?", (value,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        player_data = {key: row[key] for key in row.keys()}
+        self.player_cache.put(player_data['user_id'], player_data, token)
+        return player_data
+
+    def _decode_player_row(self, player_data: dict) -> dict:
+        """
+        处理原始行数据中的 inventory 字段，确保它是字典。
+
+        :param player_data: 原始行数据(原地修改)
+        :return: 处理后的玩家数据
+        """
+        if 'inventory' in player_data:
+            inventory_str = player_data['inventory']
+            if isinstance(inventory_str, str):
+                try:
+                    # 解析为字典
+                    player_data['inventory'] = json.loads(inventory_str)
+                except json.JSONDecodeError:
+                    logger.error(f"无法解析 inventory 字符串: {inventory_str}，将使用默认空字典。")
+                    player_data['inventory'] = {}
+        return player_data
+
     def get_player_by_user_id(self, user_id: str) -> dict:  # 更改参数类型为 str
         """
         通过 user_id 获取对应的玩家数据条目。
@@ -284,23 +491,13 @@ class textGame(Plugin):
         :param user_id: 玩家唯一标识符
         :return: 包含玩家数据的字典，如果未找到则返回 None
         """
-        msg = "SELECT * FROM players WHERE user_id = ?"
         try:
-            conn = self._get_connection()
-            cursor = conn.execute(msg, (user_id,))
-            row = cursor.fetchone()
-            if row:
-                player_data = {key: row[key] for key in row.keys()}
-                # 处理 inventory 字段，确保它是字典
-                if 'inventory' in player_data:
-                    inventory_str = player_data['inventory']
-                    if isinstance(inventory_str, str):
-                        try:
-                            # 解析为字典
-                            player_data['inventory'] = json.loads(inventory_str)
-                        except json.JSONDecodeError:
-                            logger.error(f"无法解析 inventory 字符串: {inventory_str}，将使用默认空字典。")
-                            player_data['inventory'] = {}
+            player_data = self.player_cache.get(user_id)
+            if player_data is None:
+                player_data = self._fetch_player_row('user_id', user_id)
+            if player_data:
+                self._apply_pending_updates(player_data)
+                self._decode_player_row(player_data)
                 logger.debug(f"成功获取 user_id 为 {user_id} 的玩家数据。")
                 return player_data
             else:
@@ -310,6 +507,35 @@ class textGame(Plugin):
             logger.error(f"查询玩家数据失败: {e}")
             raise
 
+    def get_nicknames(self, user_ids) -> Dict[str, str]:
+        """
+        批量获取玩家昵称，优先使用玩家缓存，其余的通过一次 IN 查询获取。
+
+        :param user_ids: 玩家ID集合
+        :return: user_id -> nickname，未找到的玩家不在结果中
+        """
+        nicknames = {}
+        missing = []
+        for user_id in set(user_ids):
+            if not user_id:
+                continue
+            cached = self.player_cache.get(user_id)
+            if cached is not None:
+                nicknames[user_id] = cached['nickname']
+            else:
+                missing.append(user_id)
+        if missing:
+            placeholders = ", ".join("?" * len(missing))
+            msg = f"SELECT user_id, nickname FROM players WHERE user_id IN ({placeholders})"
+            try:
+                conn = self._get_connection()
+                for row in conn.execute(msg, missing):
+                    nicknames[row['user_id']] = row['nickname']
+            except sqlite3.Error as e:
+                logger.error(f"批量查询玩家昵称失败: {e}")
+                raise
+        return nicknames
+
     def get_all_players(self) -> list:
         """
         获取所有玩家的数据条目。
@@ -323,17 +549,7 @@ class textGame(Plugin):
             cursor = conn.execute(msg)
             rows = cursor.fetchall()  # 获取所有行
             for row in rows:
-                player_data = {key: row[key] for key in row.keys()}
-                # 处理 inventory 字段，确保它是字典
-                if 'inventory' in player_data:
-                    inventory_str = player_data['inventory']
-                    if isinstance(inventory_str, str):
-                        try:
-                            # 解析为字典
-                            player_data['inventory'] = json.loads(inventory_str)
-                        except json.JSONDecodeError:
-                            logger.error(f"无法解析 inventory 字符串: {inventory_str}，将使用默认空字典。")
-                            player_data['inventory'] = {}
+                player_data = self._decode_player_row({key: row[key] for key in row.keys()})
                 players_data.append(player_data)  # 将玩家数据添加到列表中
 
             logger.info(f"成功获取所有玩家数据，共 {len(players_data)} 位玩家。")
@@ -350,23 +566,13 @@ class textGame(Plugin):
         :param nickname: 玩家昵称
         :return: 包含玩家数据的字典，如果未找到则返回 None
         """
-        msg = "SELECT * FROM players WHERE nickname = ?"
         try:
-            conn = self._get_connection()
-            cursor = conn.execute(msg, (nickname,))
-            row = cursor.fetchone()
-            if row:
-                player_data = {key: row[key] for key in row.keys()}
-                # 处理 inventory 字段，确保它是字典
-                if 'inventory' in player_data:
-                    inventory_str = player_data['inventory']
-                    if isinstance(inventory_str, str):
-                        try:
-                            # 解析为字典
-                            player_data['inventory'] = json.loads(inventory_str)
-                        except json.JSONDecodeError:
-                            logger.error(f"无法解析 inventory 字符串: {inventory_str}，将使用默认空字典。")
-                            player_data['inventory'] = {}
+            player_data = self.player_cache.get_by_nickname(nickname)
+            if player_data is None:
+                player_data = self._fetch_player_row('nickname', nickname)
+            if player_data:
+                self._apply_pending_updates(player_data)
+                self._decode_player_row(player_data)
                 logger.debug(f"成功获取 nickname 为 {nickname} 的玩家数据。")
                 return player_data
             else:
@@ -386,83 +592,106 @@ class textGame(Plugin):
             logger.debug("消息内容为空，不处理")
             return None
 
+        # 非游戏指令直接忽略
+        entry = self._match_command(content)
+        if entry is None:
+            return None
+        cmd, handler = entry
+
         if not self.game_status and content not in ['注册', '注销', '开机', '关机', '充值']:
             return "游戏系统当前已关闭"
 
         logger.debug(f"当前用户信息 - current_id: {current_id}")
 
-        # 修改这里：更新 lambda 函数定义，使其接受两个参数
-        cmd_handlers = {
-            "注册": lambda id: self.register_player(id, content),
-            "注销": lambda id: self.unregister_player(id),
-            "改名": lambda id: self.change_nickname(id, content),
-            "状态": lambda id: self.get_player_status(id, False),
-            "详细状态": lambda id: self.get_player_status(id, True),
-            "签到": lambda id: self.daily_checkin(id),
-            "商店": lambda id: self.shop_system.show_shop(content),
-            "购买": lambda id: self.shop_system.buy_item(id, content),
-            "背包": lambda id: self.show_inventory(id, content),
-            "装备": lambda id: self.equip_from_inventory(id, content),
-            "游戏菜单": lambda id: self.game_help(),
-            "菜单": lambda id: self.game_help(),
-            "赠送": lambda id: self.give_item(id, content),
-            "钓鱼": lambda id: self.fishing(id),
-            "图鉴": lambda id: self.show_fish_collection(id, content),
-            "出售": lambda id: self.shop_system.sell_item(id, content),
-            "下注": lambda id: self.gamble(id, content),
-            "外出": lambda id: self.go_out(id),
-            "冒险": lambda id: self.go_adventure(id),
-            "使用": lambda id: self.use_item(id, content),
-            "排行": lambda id: self.show_leaderboard(id, content),
-            "排行榜": lambda id: self.show_leaderboard(id, content),
-            "挑战": lambda id: self.attack_player(id, content),
-            "接受挑战": lambda id: self.accept_challenge(id),
-            "拒绝挑战": lambda id: self.refuse_challenge(id),
-            "鉴权": lambda id: self.authenticate("鉴权", id, content),
-            "认证": lambda id: self.authenticate("认证", id, content),
-            "auth": lambda id: self.authenticate("auth", id, content),
-            "开机": lambda id: self.toggle_game_system(id, 'start'),
-            "关机": lambda id: self.toggle_game_system(id, 'stop'),
-            "充值": lambda id: self.toggle_recharge(id, content),
-            "购买地块": lambda id: self.buy_property(id),
-            "购买地产": lambda id: self.buy_property(id),
-            "升级地块": lambda id: self.upgrade_property(id),
-            "升级地产": lambda id: self.upgrade_property(id),
-            "我的地块": lambda id: self.show_properties(id, content),
-            "我的地产": lambda id: self.show_properties(id, content),
-            "收购": lambda id: self.acquisition_of_property(id),
-            "支付租金": lambda id: self.pay_the_rent(id),
-            "支付房租": lambda id: self.pay_the_rent(id),
-            "地图": lambda id: self.show_map(id, content),
-        }
-
-        cmd = content.split()[0]
-        with self.lock:  # 获取锁
-            if cmd in cmd_handlers:
+        with self.command_stats.track(cmd) as sample:
+            # 获取本次指令涉及的所有玩家，按固定顺序加锁
+            participants = self._command_participants(cmd, current_id, content)
+            while True:
                 try:
-                    if constants.SYSTEM_MAINTENANCE:
-                        # 仅在维护时支持的指令(认证)
-                        if cmd in ["auth", "认证", "鉴权"]:
-                            reply_str = cmd_handlers[cmd](current_id)
-                        else:
-                            if self.is_admin(current_id):
-                                # 系统维护期间仅管理员可使用
-                                reply_str = cmd_handlers[cmd](current_id)
-                            else:
-                                reply_str = f"🚧 内部维护中，暂不支持[{cmd}]功能!"
-                    else:
-                        # 公测
-                        reply_str = cmd_handlers[cmd](current_id)
-                except Exception as e:
-                    logger.error(f"处理指令 '{cmd}' 时出错: {e}")
-                    reply_str = "⚠️ 处理您的指令时发生错误，请稍后再试。"
-            else :
-                return None
+                    with self.player_locks.hold(*participants):
+                        try:
+                            # 一条指令内的所有玩家数据更新合并为一个事务提交
+                            with self.transaction():
+                                if constants.SYSTEM_MAINTENANCE:
+                                    # 仅在维护时支持的指令(认证)
+                                    if cmd == "认证":
+                                        reply_str = handler(current_id, content)
+                                    else:
+                                        if self.is_admin(current_id):
+                                            # 系统维护期间仅管理员可使用
+                                            reply_str = handler(current_id, content)
+                                        else:
+                                            reply_str = f"🚧 内部维护中，暂不支持[{cmd}]功能!"
+                                else:
+                                    # 公测
+                                    reply_str = handler(current_id, content)
+                        except Exception as e:
+                            logger.error(f"处理指令 '{cmd}' 时出错: {e}")
+                            reply_str = "⚠️ 处理您的指令时发生错误，请稍后再试。"
+                            sample.failed = True
+                    break
+                except LockOrderConflict as e:
+                    # 指令执行中需要额外的玩家锁，释放后按顺序重新加锁再执行
+                    logger.debug(f"指令 '{cmd}' 需要重新加锁: {e}")
+                    participants = e.user_ids | set(participants)
         return reply_str
 
+    def _command_participants(self, cmd, user_id, content) -> set:
+        """
+        在加锁前预先解析指令会修改到的玩家，以便按固定顺序一次性加锁。
+        此处的读取不加锁，处理函数内部仍会通过 player_locks.acquire 补齐遗漏的玩家。
+
+        :param cmd: 指令
+        :param user_id: 发起指令的玩家ID
+        :param content: 指令内容
+        :return: 玩家ID集合
+        """
+        participants = {user_id}
+        try:
+            if cmd in ["赠送", "挑战"]:
+                parts = content.split()
+                if len(parts) > 1:
+                    target = self.get_player_data(parts[1], 'user_id')
+                    if target:
+                        participants.add(target[0])
+            elif cmd == "充值":
+                target_name, _ = self.extract_username_and_amount(content)
+                if target_name:
+                    target = self.get_player_data(target_name, 'user_id')
+                    if target:
+                        participants.add(target[0])
+            elif cmd == "接受挑战":
+                player = self.get_player(user_id)
+                if player and player.challenge_proposal:
+                    participants.add(player.challenge_proposal)
+            elif cmd in ["收购", "支付租金"]:
+                player = self.get_player(user_id)
+                if player:
+                    property_info = self.monopoly.get_property_owner(player.position)
+                    if property_info and property_info.get('owner'):
+                        participants.add(property_info['owner'])
+        except Exception as e:
+            logger.warning(f"预解析指令 '{cmd}' 的参与玩家失败: {e}")
+        return participants
+
+
+    def _match_command(self, content: str):
+        """
+        查找消息对应的指令：先按首字符过滤，再按第一个词查分发表。
+
+        :param content: 去除首尾空白后的消息内容(非空)
+        :return: (指令, 处理函数)，不是游戏指令时返回 None
+        """
+        if content[0] not in self.command_initials:
+            return None
+        return self.command_table.get(content.split(maxsplit=1)[0])
 
     def on_text_message(self, e_context: EventContext):
         """处理私聊消息"""
+        channel = e_context.econtext.get('channel')
+        if self.command_executor is not None and channel is not None:
+            self._submit_command(e_context, channel)
+            return
         reply_str = self.game_system_handle(e_context['context'])
         reply = Reply()
         reply.type = ReplyType.TEXT
@@ -471,7 +700,46 @@ class textGame(Plugin):
             e_context['reply'] = reply
             # 事件结束，并跳过处理context的默认逻辑
             e_context.action = EventAction.BREAK_PASS
-        
+
+    def _submit_command(self, e_context: EventContext, channel):
+        """
+        异步模式：把游戏指令提交到线程池，执行完毕后由通道直接发送回复。
+        """
+        context = e_context['context']
+        content = context.content.strip()
+        if not content or self._match_command(content) is None:
+            # 不是游戏指令，交给其他插件处理
+            return
+        accepted = self.command_executor.submit(
+            context.kwargs['receiver'],
+            lambda: self._send_async_reply(channel, context)
+        )
+        if not accepted:
+            reply = Reply()
+            reply.type = ReplyType.TEXT
+            reply.content = "⏳ 您的指令太多啦，请等待前面的指令处理完毕后再试~"
+            e_context['reply'] = reply
+        # 回复由线程池发送，跳过处理context的默认逻辑
+        e_context.action = EventAction.BREAK_PASS
+
+    def _send_async_reply(self, channel, context):
+        """在线程池中执行指令并发送回复"""
+        reply_str = self.game_system_handle(context)
+        if reply_str is None:
+            return
+        reply = Reply()
+        reply.type = ReplyType.TEXT
+        reply.content = reply_str
+        # 与同步回复一样经过通道的修饰(例如群聊中@发送者)
+        decorate = getattr(channel, '_decorate_reply', None)
+        if decorate is not None:
+            reply = decorate(context, reply)
+        elif type(channel) not in self._undecorated_channels:
+            # 每种通道只提示一次
+            self._undecorated_channels.add(type(channel))
+            logger.warning(f"通道 {type(channel).__name__} 不支持 _decorate_reply，异步回复未经修饰(群聊中不会@发送者)")
+        channel.send(reply, context)
+
     def game_help(self):
         return """
 🎮 游戏指令大全 🎮
@@ -530,6 +798,9 @@ class textGame(Plugin):
 🔧 开机 - 开启游戏系统
 🔧 关机 - 关闭游戏系统
 💴 充值 [用户名] 数额 - 为指定用户充值指定数额的金币
+🔒 锁统计 - 查看玩家锁争用情况
+🗃️ 缓存统计 - 查看玩家缓存命中情况
+📈 性能统计 [重置/导出] - 查看各指令的耗时与数据库访问
 
 系统时间: {}
 """.format(time.strftime('%Y-%m-%d %H:%M:%S', time.localtime()))
@@ -589,9 +860,15 @@ class textGame(Plugin):
         """
 
         try:
-            conn = self._get_connection()
-            with conn:
-                cursor = conn.execute(delete_query, {'user_id': user_id})
+            conn = self._get_write_connection()
+            with self.db_lock:
+                with conn:
+                    cursor = conn.execute(delete_query, {'user_id': user_id})
+                    self.inventory_store.delete_all(conn, user_id)
+                self.player_cache.invalidate(user_id)
+                if self.write_behind is not None:
+                    self.write_behind.discard(user_id)
+                self.leaderboard.remove(user_id)
                 if cursor.rowcount > 0:
                     logger.info(f"用户 {user_id} 的数据已成功删除！")
                 else:
@@ -642,13 +919,8 @@ class textGame(Plugin):
         if not nickname:
             return f"❌ 请提供一个有效的用户名！\n\n💡 格式: 改名 [用户名]"
 
-        inventory = player.inventory
-
-        if property_name not in inventory:
+        if self.inventory_store.get_item(user_id, property_name) is None:
             return "❌ 您的背包中没有改名卡，无法更改用户名！"
-        else:
-            # 获取改名卡
-            item = inventory[property_name]
 
         # 检查昵称是否已被占用
         if self.nickname_exists(nickname):
@@ -657,12 +929,8 @@ class textGame(Plugin):
         # 更改昵称
         try:
             # 扣除改名卡
-            if item['amount'] == 1:
-                inventory.pop(property_name)
-            else:
-                item['amount'] -= 1
-
-            self._update_player_data(user_id, {'inventory': inventory, 'nickname': nickname})
+            self.inventory_store.remove(user_id, property_name, 1)
+            self._update_player_data(user_id, {'nickname': nickname})
             return f"✅ 用户名已更改为 [{nickname}]"
         except Exception as e:
             logger.error(f"更改昵称出错: {e}")
@@ -695,31 +963,8 @@ class textGame(Plugin):
             raise
 
     def check_player_upgrade(self, player: Player, exp_award):
-        # 初始化当前等级、经验和最大经验
-        current_level = player.level
-        current_exp = player.exp
-        # 更新总经验
-        total_exp = current_exp + exp_award
-
-        # 循环，通过获得的经验尝试进行升级
-        while True:
-            # 获取当前等级所需的升级经验
-            max_exp = player.get_exp_for_next_level(current_level)
-
-            # 检查当前等级是否已达到上限
-            if current_level >= constants.PLAYER_MAX_LEVEL:
-                # 如果已达到100级，限制经验为最大经验
-                total_exp = min(total_exp, max_exp)
-                break
-
-            # 检查当前总经验是否达到升级所需的经验
-            if total_exp >= max_exp:
-                # 升级
-                total_exp -= max_exp
-                current_level += 1
-            else:
-                # 如果未达到升级要求，退出循环
-                break
+        # 通过累计经验表一次算出升级后的等级和剩余经验
+        current_level, total_exp = Player.resolve_level(player.level, player.exp + exp_award)
 
         # 返回包含等级、剩余的经验和下一级所需的最大经验的字典
         return {
@@ -761,10 +1006,10 @@ class textGame(Plugin):
             defense_bonus = 0
             max_hp_bonus = 0
         # 计算新的攻击力
-        new_attack = int(((new_level * constants.PLAYER_LEVEL_UP_APPEND_ATTACK + constants.PLAYER_BASE_ATTACK) + attack_bonus) * attack_multiple)
+        new_attack = int((formulas.player_base_attributes(new_level)[0] + attack_bonus) * attack_multiple)
         # 计算新的防御/生命
-        new_defense = int(((new_level * constants.PLAYER_LEVEL_UP_APPEND_DEFENSE + constants.PLAYER_BASE_DEFENSE) + defense_bonus) * defense_multiple)
-        new_max_hp = int(((new_level * constants.PLAYER_LEVEL_UP_APPEND_HP + constants.PLAYER_BASE_MAX_HP) + max_hp_bonus) * max_hp_multiple)
+        new_defense = int((formulas.player_base_attributes(new_level)[1] + defense_bonus) * defense_multiple)
+        new_max_hp = int((formulas.player_base_attributes(new_level)[2] + max_hp_bonus) * max_hp_multiple)
         # 更新玩家数据
         updates['level'] = new_level
         updates['exp'] = new_exp
@@ -796,9 +1041,6 @@ class textGame(Plugin):
         if not player.equipment_fishing_rod:
             return "🤷‍♂️ 您必须先装备一个鱼竿才能钓鱼"
 
-        # 获取背包
-        inventory = player.inventory
-
         # 检查冷却时间
         current_time = int(time.time())
         last_fishing = player.last_fishing
@@ -824,15 +1066,8 @@ class textGame(Plugin):
         if result['success']:
             # 获取鱼
             fish_item = result['fish']
-            # 检查背包是否易经有该种类的鱼，如果有，仅仅增加数量即可
-            if fish_item['name'] in inventory:
-                inventory[fish_item['name']]['amount'] += 1
-            else:
-                fish_item['amount'] = 1
-                # 将鱼添加到背包
-                inventory[result['fish']['name']] = result['fish']
-
-            updates['inventory'] = inventory
+            # 将鱼添加到背包(已有该种类的鱼时仅增加数量)
+            self.inventory_store.add(user_id, fish_item['name'], fish_item, 1)
             # 添加金币奖励
             new_gold = int(player.gold) + result['coins_reward']
             updates['gold'] = new_gold
@@ -895,11 +1130,6 @@ class textGame(Plugin):
             player_gold = updates_info['gold']
         else:
             player_gold = player.gold
-        # 获取背包
-        if 'inventory' in updates_info:
-            inventory = updates_info['inventory']
-        else:
-            inventory = player.inventory
         # 检查玩家当前加成情况
         attack_multiple = 1
         defense_multiple = 1
@@ -923,9 +1153,11 @@ class textGame(Plugin):
         drop_name = drop_dict['name']
         drop_type = drop_dict['type']
         report = []
-        if drop_name in inventory:
+        # 背包中的同名物品
+        inventory_item = self.inventory_store.get_item(player.user_id, drop_name)
+        if inventory_item is not None:
             # 掉落物与背包物品同名
-            inventory_equipment_rarity = inventory[drop_name]["rarity"]
+            inventory_equipment_rarity = inventory_item["rarity"]
             if drop_equipment_rarity <= inventory_equipment_rarity:
                 # 背包中的品质更好，掉落物直接折算为金币
                 player_get_gold = int(drop_dict['price'] * 0.8)
@@ -934,13 +1166,11 @@ class textGame(Plugin):
             else:
                 # 掉落物与背包物品同名，但掉落物品质更好
                 # 将背包物品折算为金币
-                player_get_gold = int(inventory[drop_name]['price'] * 0.8)
+                player_get_gold = int(inventory_item['price'] * 0.8)
                 player_gold += player_get_gold
-                # 删除背包已有的同名物品
-                inventory.pop(drop_name)
-                # 将掉落物放进背包
-                inventory[drop_name] = drop_dict
-                updates_info['inventory'] = inventory
+                # 用掉落物替换背包已有的同名物品(被保留的掉落物才写入装备数据库)
+                self.rouge_equipment_system.insert_equipment(drop_equipment)
+                self.inventory_store.put(player.user_id, drop_name, drop_dict)
                 report.append(f"{drop_item_explain}\n\n❗️ 这件[{drop_name}]比你背包中的品质更好，已将背包中的[{drop_name}]折算为金币奖励！\n💰 获得金币：{player_get_gold}")
         else:
             if drop_type == 'weapon':
@@ -961,7 +1191,8 @@ class textGame(Plugin):
                     # 掉落物与已装备物品同名，但掉落物品质更好，已装备的物品折算为金币
                     player_get_gold = int(is_equipped_prop['price'] * 0.8)
                     player_gold += player_get_gold
-                    # 将掉落物装备
+                    # 将掉落物装备(被保留的掉落物才写入装备数据库)
+                    self.rouge_equipment_system.insert_equipment(drop_equipment)
                     if drop_type == 'weapon':
                         updates_info['equipment_weapon'] = drop_dict['uuid']
                         # 获取玩家加成
@@ -969,7 +1200,7 @@ class textGame(Plugin):
                             # 计算加成
                             attack_multiple = get_multiple('attack', multiple)[0]
                         # 新的攻击力 = 武器加成 + 等级加成 + 玩家基本数值
-                        new_attack = (drop_dict['attack_bonus'] + (player_level * constants.PLAYER_LEVEL_UP_APPEND_ATTACK + constants.PLAYER_BASE_ATTACK)) * attack_multiple
+                        new_attack = (drop_dict['attack_bonus'] + formulas.player_base_attributes(player_level)[0]) * attack_multiple
                         # 更新玩家数据
                         updates_info['attack'] = new_attack
                     elif drop_type == 'armor':
@@ -979,17 +1210,17 @@ class textGame(Plugin):
                             defense_multiple = get_multiple('defense', multiple)[0]
                             max_hp_multiple = get_multiple('max_hp', multiple)[0]
                         # 新的防御力 = 防具加成 + 等级加成 + 玩家基本数值
-                        new_defense = (drop_dict['defense_bonus'] + (player_level * constants.PLAYER_LEVEL_UP_APPEND_DEFENSE + constants.PLAYER_BASE_DEFENSE)) * defense_multiple
+                        new_defense = (drop_dict['defense_bonus'] + formulas.player_base_attributes(player_level)[1]) * defense_multiple
                         # 新的最大生命值 = 防具加成 + 等级加成 + 玩家基本数值
-                        new_max_hp = (drop_dict['max_hp_bonus'] + (player_level * constants.PLAYER_LEVEL_UP_APPEND_HP + constants.PLAYER_BASE_MAX_HP)) * max_hp_multiple
+                        new_max_hp = (drop_dict['max_hp_bonus'] + formulas.player_base_attributes(player_level)[2]) * max_hp_multiple
                         # 更新玩家数据
                         updates_info['max_hp'] = new_max_hp
                         updates_info['defense'] = new_defense
                     report.append(f"{drop_item_explain}\n\n❗️ 已为你装备了更好品质的[{drop_name}]，属性更差的[{drop_name}]将被折算为金币奖励！\n💰 获得金币：{player_get_gold}")
             else:
                 # 掉落物与已装备物品和背包物品都不同名，直接加入背包即可
-                inventory[drop_name] = drop_dict
-                updates_info['inventory'] = inventory
+                self.rouge_equipment_system.insert_equipment(drop_equipment)
+                self.inventory_store.put(player.user_id, drop_name, drop_dict)
                 report.append(f"{drop_item_explain}")
         updates_info['gold'] = player_gold
         return "\n".join(report)
@@ -998,21 +1229,14 @@ class textGame(Plugin):
         result = []
         # 随机获得消耗品
         while (num > 0):
-            consumable = random.choice(self.shop_system.shop_items)
+            consumable = self.rng.choice(self.shop_system.shop_items)
             item_name = consumable['name']
             item_type = consumable['type']
             # 自动跳过非消耗品
             if item_type not in ['consumable', 'boor_potion', 'coward_potion']:
                 continue
-            # 获取背包
-            if 'inventory' in updates_info:
-                inventory = updates_info['inventory']
-            else:
-                inventory = player.inventory
-            # 使用当前时间作为随机数种子
-            random.seed(time.time_ns())
             # 生成[0.0, 1.0)之间的随机数
-            rand = random.random()
+            rand = self.rng.random()
             if rand < 0.8:
                 # 80%的概率得到一个
                 item_num = 1
@@ -1020,14 +1244,9 @@ class textGame(Plugin):
                 # 20%的概率得到两个
                 item_num = 2
             # 如果背包已经有这个物品,则增加数量
-            if item_name in inventory:
-                inventory[item_name]["amount"] += item_num
-            else:
-                consumable["amount"] = item_num
-                inventory[item_name] = consumable
+            self.inventory_store.add(player.user_id, item_name, consumable, item_num)
             result.append(f"📦 {consumable['name']} x{item_num}")
             num -= 1
-            updates_info['inventory'] = inventory
         return "\n".join(result)
 
     #  外出打怪
@@ -1064,6 +1283,11 @@ class textGame(Plugin):
         # 获取地块信息
         block = self.monopoly.get_block_info(new_position)
 
+        # 落在地产上时先锁定地主(必须在写入任何数据之前，加锁冲突时整个指令会重新执行)
+        property_info = None
+        if block['type'] in ['空地', '特别行政区', '直辖市', '省会', '地级市', '县城']:
+            property_info = self._lock_property_owner(new_position)
+
         # 更新玩家位置
         self._update_player_data(user_id, {
             'position': str(new_position),
@@ -1101,11 +1325,6 @@ class textGame(Plugin):
                 gold_multiple = get_multiple('gold', multiple)[0]
             if 'effect' in event:
                 for key, value in event['effect'].items():
-                    # 获取背包
-                    if 'inventory' in updates_info:
-                        inventory = updates_info['inventory']
-                    else:
-                        inventory = player.inventory
                     # 检查事件
                     if key == 'gold':
                         if value > 0:
@@ -1153,10 +1372,8 @@ class textGame(Plugin):
                             # 没升级，更新经验即可
                             updates_info['exp'] = level_up_result['exp']
                     elif key == 'lost_item':
-                        # 使用当前时间作为随机数种子
-                        random.seed(time.time_ns())
                         # 生成[0.0, 1.0)之间的随机数
-                        rand = random.random()
+                        rand = self.rng.random()
                         if rand < 0.8:
                             # 80%的概率失去一个
                             lost_num = 1
@@ -1165,14 +1382,11 @@ class textGame(Plugin):
                             lost_num = 2
                         while lost_num > 0:
                             # 随机失去一件物品
-                            lost_item_name = random.choice(list(inventory.keys()))
-                            lost_item = inventory[lost_item_name]
-                            # 判断此物品剩余数量
-                            if lost_item['amount'] == 1:
-                                inventory.pop(lost_item_name)
-                            else:
-                                lost_item['amount'] -= 1
-                            updates_info['inventory'] = inventory
+                            item_names = list(self.inventory_store.get_items(user_id).keys())
+                            if not item_names:
+                                break
+                            lost_item_name = self.rng.choice(item_names)
+                            self.inventory_store.remove(user_id, lost_item_name, 1)
                             result.append(f"🗑️ 丢失了: {lost_item_name} x1")
                             logger.debug(f"玩家 {user_id} 丢失 {lost_item_name} x1")
                             lost_num -= 1
@@ -1189,23 +1403,17 @@ class textGame(Plugin):
                     elif key == 'consumable':
                         # 随机获得消耗品
                         while (value > 0):
-                            consumable = random.choice(self.shop_system.shop_items)
+                            consumable = self.rng.choice(self.shop_system.shop_items)
                             item_name = consumable['name']
                             # 如果背包已经有这个物品,则增加数量
-                            if item_name in inventory:
-                                inventory[item_name]["amount"] += 1
-                            else:
-                                consumable["amount"] = 1
-                                inventory[item_name] = consumable
+                            self.inventory_store.add(user_id, item_name, consumable, 1)
                             result.append(f"📦 获得了 {consumable['name']}")
                             logger.debug(f"玩家 {user_id} 获得了 {consumable['name']}")
                             value -= 1
-                        updates_info['inventory'] = inventory
                     else:
                         # 暂未支持的key
                         result.append(f"暂不支持的事件: {key}")
         elif block['type'] in ['空地', '特别行政区', '直辖市', '省会', '地级市', '县城']:
-            property_info = self.monopoly.get_property_owner(new_position)
             if property_info is None or 'owner' not in property_info:
                 # 可以购买
                 price = self.monopoly.calculate_property_price(new_position)
@@ -1294,7 +1502,7 @@ class textGame(Plugin):
         string_array = constants.ADVENTURE_MAP
 
         # 随机选择一个场景
-        random_pos = random.choice(list(string_array))
+        random_pos = self.rng.choice(list(string_array))
 
         # 获取对应值
         random_value = string_array[random_pos]
@@ -1320,161 +1528,16 @@ class textGame(Plugin):
         # 校验传入的玩家等级合法性
         player_level = max(1, int(player.level))
 
-        # 使用毫秒级时间戳作为随机数种子
-        current_time_ms = int(time.time_ns())
-        random.seed(current_time_ms)
         # 怪物的等级随机(根据玩家等级上下浮动)
-        random_level = random.randint(-2, 2)
+        random_level = self.rng.randint(-2, 2)
         # 计算怪物等级
         monster_level = max(1, player_level + random_level)
-        # 计算等级因子
-        level_factor = 1 + (monster_level - 1) * 0.3
-
-        # 定义怪物库
-        monsters = {
-            "👹怪物巢穴": [
-                {'name': '森林史莱姆🍄', 'hp': int(60 * level_factor), 'attack': int(1.3 * 10 * level_factor), 'defense': int(6 * level_factor), 'exp': int(20 * level_factor), 'gold': int(10 * 30 * level_factor)},
-                {'name': '潜伏狼蛛🕷️', 'hp': int(80 * level_factor), 'attack': int(1.3 * 15 * level_factor), 'defense': int(8 * level_factor), 'exp': int(25 * level_factor), 'gold': int(10 * 35 * level_factor)},
-                {'name': '巢穴蝙蝠🦇', 'hp': int(50 * level_factor), 'attack': int(1.3 * 12 * level_factor), 'defense': int(5 * level_factor), 'exp': int(18 * level_factor), 'gold': int(10 * 28 * level_factor)},
-                {'name': '毒刺蜂🐝', 'hp': int(70 * level_factor), 'attack': int(1.3 * 18 * level_factor), 'defense': int(7 * level_factor), 'exp': int(22 * level_factor), 'gold': int(10 * 32 * level_factor)},
-                {'name': '黑影潜伏者🌑', 'hp': int(100 * level_factor), 'attack': int(1.3 * 20 * level_factor), 'defense': int(10 * level_factor), 'exp': int(30 * level_factor), 'gold': int(10 * 40 * level_factor)}
-            ],
-            "🌳古树之心": [
-                {'name': '树精守卫🌳', 'hp': int(120 * level_factor), 'attack': int(1.3 * 25 * level_factor), 'defense': int(15 * level_factor), 'exp': int(35 * level_factor), 'gold': int(10 * 50 * level_factor)},
-                {'name': '魔化藤蔓🌿', 'hp': int(90 * level_factor), 'attack': int(1.3 * 20 * level_factor), 'defense': int(12 * level_factor), 'exp': int(28 * level_factor), 'gold': int(10 * 45 * level_factor)},
-                {'name': '树灵幽影🌲', 'hp': int(80 * level_factor), 'attack': int(1.3 * 22 * level_factor), 'defense': int(10 * level_factor), 'exp': int(30 * level_factor), 'gold': int(10 * 42 * level_factor)},
-                {'name': '腐化树妖🌳', 'hp': int(150 * level_factor), 'attack': int(1.3 * 30 * level_factor), 'defense': int(18 * level_factor), 'exp': int(40 * level_factor), 'gold': int(10 * 60 * level_factor)},
-                {'name': '古树之魂🌌', 'hp': int(200 * level_factor), 'attack': int(1.3 * 35 * level_factor), 'defense': int(20 * level_factor), 'exp': int(50 * level_factor), 'gold': int(10 * 70 * level_factor)}
-            ],
-            "🌫️迷雾谷地": [
-                {'name': '雾影幽魂👻', 'hp': int(70 * level_factor), 'attack': int(1.3 * 18 * level_factor), 'defense': int(8 * level_factor), 'exp': int(25 * level_factor), 'gold': int(10 * 35 * level_factor)},
-                {'name': '迷雾猎手🏹', 'hp': int(90 * level_factor), 'attack': int(1.3 * 22 * level_factor), 'defense': int(10 * level_factor), 'exp': int(30 * level_factor), 'gold': int(10 * 45 * level_factor)},
-                {'name': '隐匿毒蛇🐍', 'hp': int(60 * level_factor), 'attack': int(1.3 * 20 * level_factor), 'defense': int(6 * level_factor), 'exp': int(22 * level_factor), 'gold': int(10 * 32 * level_factor)},
-                {'name': '雾中行者🚶', 'hp': int(110 * level_factor), 'attack': int(1.3 * 28 * level_factor), 'defense': int(12 * level_factor), 'exp': int(35 * level_factor), 'gold': int(10 * 50 * level_factor)},
-                {'name': '迷雾巨兽🐺', 'hp': int(150 * level_factor), 'attack': int(1.3 * 32 * level_factor), 'defense': int(18 * level_factor), 'exp': int(45 * level_factor), 'gold': int(10 * 65 * level_factor)}
-            ],
-            "👻幽灵空地": [
-                {'name': '幽灵战士💀', 'hp': int(100 * level_factor), 'attack': int(1.3 * 25 * level_factor), 'defense': int(12 * level_factor), 'exp': int(35 * level_factor), 'gold': int(10 * 50 * level_factor)},
-                {'name': '亡灵弓手🏹', 'hp': int(80 * level_factor), 'attack': int(1.3 * 28 * level_factor), 'defense': int(10 * level_factor), 'exp': int(32 * level_factor), 'gold': int(10 * 48 * level_factor)},
-                {'name': '怨灵法师🧙', 'hp': int(90 * level_factor), 'attack': int(1.3 * 30 * level_factor), 'defense': int(8 * level_factor), 'exp': int(38 * level_factor), 'gold': int(10 * 52 * level_factor)},
-                {'name': '幽魂骑士🏇', 'hp': int(140 * level_factor), 'attack': int(1.3 * 35 * level_factor), 'defense': int(15 * level_factor), 'exp': int(45 * level_factor), 'gold': int(10 * 65 * level_factor)},
-                {'name': '复仇亡灵💀', 'hp': int(160 * level_factor), 'attack': int(1.3 * 40 * level_factor), 'defense': int(18 * level_factor), 'exp': int(50 * level_factor), 'gold': int(10 * 70 * level_factor)}
-            ],
-            "🌳腐烂树林": [
-                {'name': '腐朽树妖🌳', 'hp': int(120 * level_factor), 'attack': int(1.3 * 20 * level_factor), 'defense': int(15 * level_factor), 'exp': int(35 * level_factor), 'gold': int(10 * 45 * level_factor)},
-                {'name': '毒液史莱姆🟢', 'hp': int(70 * level_factor), 'attack': int(1.3 * 18 * level_factor), 'defense': int(8 * level_factor), 'exp': int(25 * level_factor), 'gold': int(10 * 35 * level_factor)},
-                {'name': '腐化狼蛛🕷️', 'hp': int(80 * level_factor), 'attack': int(1.3 * 22 * level_factor), 'defense': int(10 * level_factor), 'exp': int(30 * level_factor), 'gold': int(10 * 40 * level_factor)},
-                {'name': '腐木傀儡🌳', 'hp': int(150 * level_factor), 'attack': int(1.3 * 28 * level_factor), 'defense': int(18 * level_factor), 'exp': int(40 * level_factor), 'gold': int(10 * 55 * level_factor)},
-                {'name': '树根潜伏者🌳', 'hp': int(100 * level_factor), 'attack': int(1.3 * 25 * level_factor), 'defense': int(12 * level_factor), 'exp': int(35 * level_factor), 'gold': int(10 * 50 * level_factor)}
-            ],
-            "🦌灵兽栖息地": [
-                {'name': '灵气鹿🦌', 'hp': int(80 * level_factor), 'attack': int(1.3 * 15 * level_factor), 'defense': int(12 * level_factor), 'exp': int(25 * level_factor), 'gold': int(10 * 40 * level_factor)},
-                {'name': '守护灵兽🦄', 'hp': int(120 * level_factor), 'attack': int(1.3 * 30 * level_factor), 'defense': int(18 * level_factor), 'exp': int(45 * level_factor), 'gold': int(10 * 55 * level_factor)},
-                {'name': '灵狐幻影🦊', 'hp': int(70 * level_factor), 'attack': int(1.3 * 22 * level_factor), 'defense': int(10 * level_factor), 'exp': int(28 * level_factor), 'gold': int(10 * 38 * level_factor)},
-                {'name': '秘境猛虎🐯', 'hp': int(140 * level_factor), 'attack': int(1.3 * 35 * level_factor), 'defense': int(15 * level_factor), 'exp': int(50 * level_factor), 'gold': int(10 * 65 * level_factor)},
-                {'name': '灵域飞龙🐉', 'hp': int(180 * level_factor), 'attack': int(1.3 * 40 * level_factor), 'defense': int(20 * level_factor), 'exp': int(60 * level_factor), 'gold': int(10 * 80 * level_factor)}
-            ],
-            "🟢毒沼密林": [
-                {'name': '毒液巨蛛🕷️', 'hp': int(100 * level_factor), 'attack': int(1.3 * 25 * level_factor), 'defense': int(12 * level_factor), 'exp': int(35 * level_factor), 'gold': int(10 * 50 * level_factor)},
-                {'name': '毒气史莱姆🟢', 'hp': int(80 * level_factor), 'attack': int(1.3 * 20 * level_factor), 'defense': int(10 * level_factor), 'exp': int(28 * level_factor), 'gold': int(10 * 38 * level_factor)},
-                {'name': '瘴气妖藤🌿', 'hp': int(120 * level_factor), 'attack': int(1.3 * 28 * level_factor), 'defense': int(15 * level_factor), 'exp': int(40 * level_factor), 'gold': int(10 * 55 * level_factor)},
-                {'name': '毒雾蜥蜴🦎', 'hp': int(90 * level_factor), 'attack': int(1.3 * 22 * level_factor), 'defense': int(10 * level_factor), 'exp': int(30 * level_factor), 'gold': int(10 * 42 * level_factor)},
-                {'name': '瘴气守护者🗿', 'hp': int(160 * level_factor), 'attack': int(1.3 * 35 * level_factor), 'defense': int(20 * level_factor), 'exp': int(50 * level_factor), 'gold': int(10 * 70 * level_factor)}
-            ],
-            "🌙月光草原": [
-                {'name': '草原狼群🐺', 'hp': int(80 * level_factor), 'attack': int(1.3 * 20 * level_factor), 'defense': int(10 * level_factor), 'exp': int(28 * level_factor), 'gold': int(10 * 40 * level_factor)},
-                {'name': '隐匿猎手🏹', 'hp': int(90 * level_factor), 'attack': int(1.3 * 25 * level_factor), 'defense': int(12 * level_factor), 'exp': int(35 * level_factor), 'gold': int(10 * 50 * level_factor)},
-                {'name': '月光幽灵👻', 'hp': int(100 * level_factor), 'attack': int(1.3 * 30 * level_factor), 'defense': int(10 * level_factor), 'exp': int(40 * level_factor), 'gold': int(10 * 55 * level_factor)},
-                {'name': '夜影刺客🔪', 'hp': int(110 * level_factor), 'attack': int(1.3 * 35 * level_factor), 'defense': int(15 * level_factor), 'exp': int(45 * level_factor), 'gold': int(10 * 60 * level_factor)},
-                {'name': '草原巨熊🐻', 'hp': int(200 * level_factor), 'attack': int(1.3 * 50 * level_factor), 'defense': int(25 * level_factor), 'exp': int(60 * level_factor), 'gold': int(10 * 80 * level_factor)}
-            ],
-            "🏚️荒弃村落": [
-                {'name': '村落幽魂👻', 'hp': int(90 * level_factor), 'attack': int(1.3 * 20 * level_factor), 'defense': int(10 * level_factor), 'exp': int(30 * level_factor), 'gold': int(10 * 40 * level_factor)},
-                {'name': '腐化村民💀', 'hp': int(100 * level_factor), 'attack': int(1.3 * 25 * level_factor), 'defense': int(15 * level_factor), 'exp': int(35 * level_factor), 'gold': int(10 * 50 * level_factor)},
-                {'name': '废墟潜伏者🕵️', 'hp': int(80 * level_factor), 'attack': int(1.3 * 22 * level_factor), 'defense': int(12 * level_factor), 'exp': int(28 * level_factor), 'gold': int(10 * 38 * level_factor)},
-                {'name': '憎恶尸鬼💀', 'hp': int(150 * level_factor), 'attack': int(1.3 * 30 * level_factor), 'defense': int(18 * level_factor), 'exp': int(50 * level_factor), 'gold': int(10 * 65 * level_factor)},
-                {'name': '村落恶鬼👹', 'hp': int(120 * level_factor), 'attack': int(1.3 * 35 * level_factor), 'defense': int(15 * level_factor), 'exp': int(45 * level_factor), 'gold': int(10 * 60 * level_factor)}
-            ],
-            "🌳暗影森林": [
-                {'name': '暗影猎手🔪', 'hp': int(100 * level_factor), 'attack': int(1.3 * 30 * level_factor), 'defense': int(15 * level_factor), 'exp': int(40 * level_factor), 'gold': int(10 * 55 * level_factor)},
-                {'name': '黑暗幽灵👻', 'hp': int(90 * level_factor), 'attack': int(1.3 * 25 * level_factor), 'defense': int(12 * level_factor), 'exp': int(35 * level_factor), 'gold': int(10 * 45 * level_factor)},
-                {'name': '夜行毒蛇🐍', 'hp': int(80 * level_factor), 'attack': int(1.3 * 20 * level_factor), 'defense': int(10 * level_factor), 'exp': int(28 * level_factor), 'gold': int(10 * 38 * level_factor)},
-                {'name': '暗影潜伏者🔪', 'hp': int(120 * level_factor), 'attack': int(1.3 * 35 * level_factor), 'defense': int(18 * level_factor), 'exp': int(45 * level_factor), 'gold': int(10 * 65 * level_factor)},
-                {'name': '黑暗树妖🌳', 'hp': int(150 * level_factor), 'attack': int(1.3 * 40 * level_factor), 'defense': int(20 * level_factor), 'exp': int(55 * level_factor), 'gold': int(10 * 75 * level_factor)}
-            ],
-            "⛰️绝壁险峰": [
-                {'name': '山崖猛禽🦅', 'hp': int(80 * level_factor), 'attack': int(1.3 * 25 * level_factor), 'defense': int(10 * level_factor), 'exp': int(30 * level_factor), 'gold': int(10 * 50 * level_factor)},
-                {'name': '岩石巨人🗿', 'hp': int(150 * level_factor), 'attack': int(1.3 * 40 * level_factor), 'defense': int(30 * level_factor), 'exp': int(60 * level_factor), 'gold': int(10 * 70 * level_factor)},
-                {'name': '爬山毒蛇🐍', 'hp': int(70 * level_factor), 'attack': int(1.3 * 15 * level_factor), 'defense': int(10 * level_factor), 'exp': int(25 * level_factor), 'gold': int(10 * 35 * level_factor)},
-                {'name': '峭壁蝙蝠🦇', 'hp': int(60 * level_factor), 'attack': int(1.3 * 10 * level_factor), 'defense': int(8 * level_factor), 'exp': int(20 * level_factor), 'gold': int(10 * 30 * level_factor)},
-                {'name': '崖顶恶鹰🦅', 'hp': int(130 * level_factor), 'attack': int(1.3 * 35 * level_factor), 'defense': int(12 * level_factor), 'exp': int(50 * level_factor), 'gold': int(10 * 65 * level_factor)}
-            ],
-            "🔥熔岩洞窟": [
-                {'name': '火焰元素🔥', 'hp': int(100 * level_factor), 'attack': int(1.3 * 30 * level_factor), 'defense': int(12 * level_factor), 'exp': int(40 * level_factor), 'gold': int(10 * 60 * level_factor)},
-                {'name': '熔岩巨人🗿', 'hp': int(180 * level_factor), 'attack': int(1.3 * 50 * level_factor), 'defense': int(20 * level_factor), 'exp': int(70 * level_factor), 'gold': int(10 * 90 * level_factor)},
-                {'name': '火焰蝙蝠🦇', 'hp': int(80 * level_factor), 'attack': int(1.3 * 25 * level_factor), 'defense': int(10 * level_factor), 'exp': int(35 * level_factor), 'gold': int(10 * 50 * level_factor)},
-                {'name': '熔岩魔蛇🐍', 'hp': int(90 * level_factor), 'attack': int(1.3 * 20 * level_factor), 'defense': int(15 * level_factor), 'exp': int(30 * level_factor), 'gold': int(10 * 42 * level_factor)},
-                {'name': '炎爆恶魔😈', 'hp': int(200 * level_factor), 'attack': int(1.3 * 60 * level_factor), 'defense': int(25 * level_factor), 'exp': int(80 * level_factor), 'gold': int(10 * 100 * level_factor)}
-            ],
-            "🏜️流沙之地": [
-                {'name': '流沙巨蟒🐍', 'hp': int(120 * level_factor), 'attack': int(1.3 * 30 * level_factor), 'defense': int(10 * level_factor), 'exp': int(40 * level_factor), 'gold': int(10 * 55 * level_factor)},
-                {'name': '沙漠蝎子🦂', 'hp': int(100 * level_factor), 'attack': int(1.3 * 25 * level_factor), 'defense': int(12 * level_factor), 'exp': int(35 * level_factor), 'gold': int(10 * 50 * level_factor)},
-                {'name': '沙尘潜伏者🔪', 'hp': int(80 * level_factor), 'attack': int(1.3 * 20 * level_factor), 'defense': int(8 * level_factor), 'exp': int(28 * level_factor), 'gold': int(10 * 40 * level_factor)},
-                {'name': '沙之傀儡🗿', 'hp': int(160 * level_factor), 'attack': int(1.3 * 40 * level_factor), 'defense': int(20 * level_factor), 'exp': int(60 * level_factor), 'gold': int(10 * 70 * level_factor)},
-                {'name': '沙漠猎犬🐕', 'hp': int(90 * level_factor), 'attack': int(1.3 * 22 * level_factor), 'defense': int(10 * level_factor), 'exp': int(32 * level_factor), 'gold': int(10 * 45 * level_factor)}
-            ],
-            "☀烈日废墟": [
-                {'name': '炎蝎🦂', 'hp': int(100 * level_factor), 'attack': int(1.3 * 30 * level_factor), 'defense': int(10 * level_factor), 'exp': int(40 * level_factor), 'gold': int(10 * 55 * level_factor)},
-                {'name': '废墟幽魂👻', 'hp': int(120 * level_factor), 'attack': int(1.3 * 28 * level_factor), 'defense': int(15 * level_factor), 'exp': int(45 * level_factor), 'gold': int(10 * 60 * level_factor)},
-                {'name': '火焰殉教者🧕', 'hp': int(140 * level_factor), 'attack': int(1.3 * 40 * level_factor), 'defense': int(20 * level_factor), 'exp': int(60 * level_factor), 'gold': int(10 * 75 * level_factor)},
-                {'name': '石化蜥蜴🦎', 'hp': int(80 * level_factor), 'attack': int(1.3 * 25 * level_factor), 'defense': int(12 * level_factor), 'exp': int(35 * level_factor), 'gold': int(10 * 50 * level_factor)},
-                {'name': '烈日幻影👻', 'hp': int(70 * level_factor), 'attack': int(1.3 * 23 * level_factor), 'defense': int(8 * level_factor), 'exp': int(28 * level_factor), 'gold': int(10 * 40 * level_factor)}
-            ],
-            "🌪️沙暴迷城": [
-                {'name': '沙暴刺客🔪', 'hp': int(90 * level_factor), 'attack': int(1.3 * 28 * level_factor), 'defense': int(12 * level_factor), 'exp': int(35 * level_factor), 'gold': int(10 * 50 * level_factor)},
-                {'name': '废墟守卫👮‍♂️', 'hp': int(150 * level_factor), 'attack': int(1.3 * 35 * level_factor), 'defense': int(18 * level_factor), 'exp': int(50 * level_factor), 'gold': int(10 * 70 * level_factor)},
-                {'name': '迷城幽魂👻', 'hp': int(110 * level_factor), 'attack': int(1.3 * 25 * level_factor), 'defense': int(10 * level_factor), 'exp': int(38 * level_factor), 'gold': int(10 * 55 * level_factor)},
-                {'name': '黄沙巫师🧙', 'hp': int(80 * level_factor), 'attack': int(1.3 * 22 * level_factor), 'defense': int(8 * level_factor), 'exp': int(30 * level_factor), 'gold': int(10 * 45 * level_factor)},
-                {'name': '沙暴元素🌪️', 'hp': int(130 * level_factor), 'attack': int(1.3 * 40 * level_factor), 'defense': int(15 * level_factor), 'exp': int(55 * level_factor), 'gold': int(10 * 65 * level_factor)}
-            ],
-            "❄️寒冰峡谷": [
-                {'name': '极地狼群🐺', 'hp': int(120 * level_factor), 'attack': int(1.3 * 28 * level_factor), 'defense': int(15 * level_factor), 'exp': int(40 * level_factor), 'gold': int(10 * 55 * level_factor)},
-                {'name': '冰原独角兽🦄', 'hp': int(150 * level_factor), 'attack': int(1.3 * 35 * level_factor), 'defense': int(18 * level_factor), 'exp': int(50 * level_factor), 'gold': int(10 * 65 * level_factor)},
-                {'name': '寒霜飞鹰🦅', 'hp': int(90 * level_factor), 'attack': int(1.3 * 22 * level_factor), 'defense': int(10 * level_factor), 'exp': int(32 * level_factor), 'gold': int(10 * 45 * level_factor)},
-                {'name': '冰霜元素❄️', 'hp': int(130 * level_factor), 'attack': int(1.3 * 30 * level_factor), 'defense': int(12 * level_factor), 'exp': int(45 * level_factor), 'gold': int(10 * 55 * level_factor)},
-                {'name': '极寒古龙🐲', 'hp': int(200 * level_factor), 'attack': int(1.3 * 50 * level_factor), 'defense': int(25 * level_factor), 'exp': int(80 * level_factor), 'gold': int(10 * 100 * level_factor)}
-            ],
-            "🧊冻土遗迹": [
-                {'name': '遗迹守护者🗿', 'hp': int(140 * level_factor), 'attack': int(1.3 * 40 * level_factor), 'defense': int(20 * level_factor), 'exp': int(60 * level_factor), 'gold': int(10 * 75 * level_factor)},
-                {'name': '冰冻骷髅💀', 'hp': int(120 * level_factor), 'attack': int(1.3 * 30 * level_factor), 'defense': int(15 * level_factor), 'exp': int(45 * level_factor), 'gold': int(10 * 55 * level_factor)},
-                {'name': '冻土游魂👻', 'hp': int(100 * level_factor), 'attack': int(1.3 * 25 * level_factor), 'defense': int(12 * level_factor), 'exp': int(38 * level_factor), 'gold': int(10 * 50 * level_factor)},
-                {'name': '霜冻教徒🧙', 'hp': int(80 * level_factor), 'attack': int(1.3 * 22 * level_factor), 'defense': int(10 * level_factor), 'exp': int(30 * level_factor), 'gold': int(10 * 42 * level_factor)},
-                {'name': '寒霜傀儡❄️', 'hp': int(160 * level_factor), 'attack': int(1.3 * 35 * level_factor), 'defense': int(18 * level_factor), 'exp': int(50 * level_factor), 'gold': int(10 * 65 * level_factor)}
-            ],
-            "🟢毒雾沼泽": [
-                {'name': '毒鳞鱼人🧜‍♂️', 'hp': int(90 * level_factor), 'attack': int(1.3 * 20 * level_factor), 'defense': int(12 * level_factor), 'exp': int(32 * level_factor), 'gold': int(10 * 42 * level_factor)},
-                {'name': '腐臭鳄鱼🐊', 'hp': int(120 * level_factor), 'attack': int(1.3 * 30 * level_factor), 'defense': int(15 * level_factor), 'exp': int(45 * level_factor), 'gold': int(10 * 60 * level_factor)},
-                {'name': '瘴气魔鹰🦅', 'hp': int(70 * level_factor), 'attack': int(1.3 * 18 * level_factor), 'defense': int(8 * level_factor), 'exp': int(25 * level_factor), 'gold': int(10 * 38 * level_factor)},
-                {'name': '泥潭刺客🎭', 'hp': int(150 * level_factor), 'attack': int(1.3 * 40 * level_factor), 'defense': int(20 * level_factor), 'exp': int(60 * level_factor), 'gold': int(10 * 75 * level_factor)},
-                {'name': '沼泽魔神👹', 'hp': int(200 * level_factor), 'attack': int(1.3 * 50 * level_factor), 'defense': int(25 * level_factor), 'exp': int(80 * level_factor), 'gold': int(10 * 100 * level_factor)}
-            ],
-            "☠️枯骨之地": [
-                {'name': '枯骨战士☠️', 'hp': int(100 * level_factor), 'attack': int(1.3 * 28 * level_factor), 'defense': int(12 * level_factor), 'exp': int(38 * level_factor), 'gold': int(10 * 50 * level_factor)},
-                {'name': '沼泽骷髅💀', 'hp': int(90 * level_factor), 'attack': int(1.3 * 20 * level_factor), 'defense': int(10 * level_factor), 'exp': int(30 * level_factor), 'gold': int(10 * 45 * level_factor)},
-                {'name': '不死巫师🧙', 'hp': int(130 * level_factor), 'attack': int(1.3 * 35 * level_factor), 'defense': int(18 * level_factor), 'exp': int(50 * level_factor), 'gold': int(10 * 65 * level_factor)},
-                {'name': '亡灵巨兽🐺', 'hp': int(160 * level_factor), 'attack': int(1.3 * 40 * level_factor), 'defense': int(20 * level_factor), 'exp': int(60 * level_factor), 'gold': int(10 * 75 * level_factor)},
-                {'name': '骨堆恶灵👹', 'hp': int(200 * level_factor), 'attack': int(1.3 * 50 * level_factor), 'defense': int(25 * level_factor), 'exp': int(80 * level_factor), 'gold': int(10 * 100 * level_factor)}
-            ]
-        }
-
         # 校验场景是否有效
-        if scene not in monsters:
+        if scene not in constants.ADVENTURE_MONSTERS:
             raise ValueError(f"无效的场景名称：{scene}")
 
-        # 随机选择该场景中的一个怪物
-        monster = random.choice(monsters[scene])
-        # 增加怪物等级
-        monster['level'] = monster_level
+        # 随机选择该场景中的一个怪物(复制一份，避免修改缓存中的数据)
+        monster = dict(self.rng.choice(self._get_scene_monsters(scene, monster_level)))
 
         # 判断是否生成变异怪物
         if self._is_mutant():  # 使用抽象方法判断是否变异
@@ -1482,26 +1545,42 @@ class textGame(Plugin):
 
         return monster
 
+    # 场景+等级 -> 该等级下的怪物属性(等级范围有限，按需计算后缓存)
+    _monster_table = {}
+
+    @classmethod
+    def _get_scene_monsters(cls, scene, monster_level):
+        """
+        获取场景中所有怪物在指定等级下的属性，结果会被缓存
+
+        :param scene: 场景名称
+        :param monster_level: 怪物等级
+        :return: 怪物属性字典的元组(只读，使用前需复制)
+        """
+        key = (scene, monster_level)
+        monsters = cls._monster_table.get(key)
+        if monsters is None:
+            monsters = tuple(
+                formulas.scale_monster(base, monster_level)
+                for base in constants.ADVENTURE_MONSTERS[scene]
+            )
+            cls._monster_table[key] = monsters
+        return monsters
+
     def _is_mutant(self):
         """
         判断怪物是否变异
         :return: True if mutant, otherwise False
         """
-        return random.random() < 0.15  # 15% 的变异概率
+        return formulas.is_mutant(self.rng)
 
     def _apply_mutation(self, monster):
         """
         对怪物应用变异属性
         :param monster: 原怪物数据
-        :return: 变异后的怪物字典
-        """
-        monster['name'] = f"变异的{monster['name']}"
-        monster['hp'] = int(monster['hp'] * 1.5)
-        monster['attack'] = int(monster['attack'] * 1.3)
-        monster['defense'] = int(monster['defense'] * 1.2)
-        monster['exp'] = int(monster['exp'] * 1.5)
-        monster['gold'] = int(monster['gold'] * 1.5)
-        return monster
+        :return: 变异后的怪物字典(新的字典，不修改原怪物数据)
+        """
+        return formulas.mutate_monster(monster)
 
     def _battle(self, user_id, monster):
         """战斗系统"""
@@ -1532,7 +1611,6 @@ class textGame(Plugin):
         player_attack = int(player.attack)
         player_defense = int(player.defense)
         player_name = player.nickname
-        player_total_damage = 0
 
         # 怪物属性
         monster_level = monster['level']
@@ -1541,7 +1619,6 @@ class textGame(Plugin):
         monster_attack = monster['attack']
         monster_defense = monster['defense']
         monster_name = monster.get('name', '未知怪物')
-        monster_total_damage = 0
 
         #日志打印怪物属性
         logger.debug(f"玩家[{player_name}]属性: 生命值: {player_hp}/{player_max_hp}, 攻击力: {player_attack}, 防御力: {player_defense}")
@@ -1551,68 +1628,22 @@ class textGame(Plugin):
         battle_log.append(f"\n{player_name} Lv.{player_level}\n❤️[{player_hp}/{player_max_hp}]\n⚔️[{player_attack}]\n🛡️[{str(player_defense)}]")
         battle_log.append(f"\n{monster_name} Lv.{monster_level}\n❤️[{monster_hp}/{monster_max_hp}]\n⚔️[{monster_attack}]\n🛡️[{str(monster_defense)}]")
 
-        # 怪物是否狂暴状态
-        is_berserk = False
-
-        round_num = 1
-        important_events = []
-
-        while player_hp > 0 and monster_hp > 0:
-
-            if constants.WEATHER_TO_KEEP_A_BATTLE_LOG:
-                if round_num <= constants.REPORT_THE_NUMBER_OF_ROUNDS:
-                    battle_log.append(f"\n第{round_num}回合")
-
-            # 计算玩家伤害
-            player_final_damage, player_explain_str = self.damage_calculation(player_attack, monster_defense)
-
-            # 减少怪物血量
-            monster_hp -= player_final_damage
-            player_total_damage += player_final_damage
-
-            if constants.WEATHER_TO_KEEP_A_BATTLE_LOG:
-                # 记录战斗日志（前4回合）
-                if round_num <= constants.REPORT_THE_NUMBER_OF_ROUNDS:
-                    battle_log.append(f"{player_explain_str} [{player_name}] 对 [{monster_name}] 造成 {player_final_damage} 点伤害")
-
-            # 检查怪物是否死亡
-            if monster_hp <= 0:
-                break
-
-            # 检查怪物是否进入狂暴状态
-            if not is_berserk and monster_hp < monster_max_hp * 0.3 and random.random() < 0.4:
-                is_berserk = True
-                # 提升怪物伤害
-                monster_attack = int(monster_attack * 1.5)
-                if constants.WEATHER_TO_KEEP_A_BATTLE_LOG:
-                    if round_num <= constants.REPORT_THE_NUMBER_OF_ROUNDS:
-                        battle_log.append(f"💢 {monster['name']}进入狂暴状态！")
-                    else:
-                        important_events.append(f"第{round_num}回合: {monster['name']}进入狂暴状态！")
-
-            # 怪物反击
-            if monster_hp > 0:
-                # 计算怪物伤害
-                monster_final_damage, monster_explain_str = self.damage_calculation(monster_attack, player_defense)
-                # 减少玩家生命值
-                player_hp -= monster_final_damage
-                monster_total_damage += monster_final_damage
-
-                life_steal = 0
-
-                # 狂暴状态下吸血
-                if is_berserk:
-                    life_steal = int(monster_final_damage * 0.3)
-                    monster_hp = min(monster_max_hp, monster_hp + life_steal)
-                    if constants.WEATHER_TO_KEEP_A_BATTLE_LOG:
-                        if round_num <= constants.REPORT_THE_NUMBER_OF_ROUNDS:
-                            battle_log.append(f"{monster_explain_str} [{monster['name']}] 对 [{player_name}] 造成 {monster_final_damage} 点伤害，并吸取了 {life_steal} 点生命值")
-                else:
-                    if constants.WEATHER_TO_KEEP_A_BATTLE_LOG:
-                        if round_num <= constants.REPORT_THE_NUMBER_OF_ROUNDS:
-                            battle_log.append(f"{monster_explain_str} [{monster['name']}] 对 [{player_name}] 造成 {monster_final_damage} 点伤害")
-
-            round_num += 1
+        # 战斗结算(只有前 REPORT_THE_NUMBER_OF_ROUNDS 回合会生成战报)
+        result = PveBattle(
+            self.rng,
+            {'name': player_name, 'hp': player_hp, 'attack': player_attack, 'defense': player_defense},
+            {'name': monster_name, 'hp': monster_hp, 'max_hp': monster_max_hp,
+             'attack': monster_attack, 'defense': monster_defense},
+            keep_log=constants.WEATHER_TO_KEEP_A_BATTLE_LOG,
+            report_rounds=constants.REPORT_THE_NUMBER_OF_ROUNDS
+        ).run()
+        battle_log.extend(result['log'])
+        round_num = result['round_num']
+        player_hp = result['player_hp']
+        monster_hp = result['monster_hp']
+        player_total_damage = result['player_total_damage']
+        monster_total_damage = result['monster_total_damage']
+        important_events = result['important_events']
 
         if player_hp < 0:
             battle_log.append(f"\n[{player_name}] 被打败了！😵")
@@ -1642,15 +1673,8 @@ class textGame(Plugin):
         if player_hp > 0:
             drop_explain = None
             drop_consumables_str = None
-            # 获取怪物基础经验值
-            default_exp = monster['exp']
-
-            # 每高一级增加4%经验
-            exp_multiplier = 1 + (player.level * 0.04)
-
-            # 结算经验/金币
-            award_exp = int(default_exp * exp_multiplier * exp_multiple)
-            award_gold = int(min(player.level * 0.1, 1) * monster['gold'] * gold_multiple)
+            # 结算经验/金币(每高一级增加4%经验)
+            award_exp, award_gold = formulas.battle_rewards(player.level, monster, exp_multiple, gold_multiple)
             actual_gain_gold = player.gold + award_gold
             updates_info['gold'] = actual_gain_gold
 
@@ -1671,8 +1695,7 @@ class textGame(Plugin):
                 # 未升级，更新玩家血量
                 updates_info['hp'] = player_hp
             # 判断是否掉落物品
-            random.seed(time.time_ns())
-            drop_num = random.randint(1, 100)
+            drop_num = self.rng.randint(1, 100)
             if drop_num <= constants.EQUIPMENT_DROP_PROBABILITY:
                 # 掉落装备
                 drop_item = self.rouge_equipment_system.get_random_equipment(new_level)
@@ -1680,12 +1703,11 @@ class textGame(Plugin):
                 # 设置掉落标志
                 drop_flag = True
 
-            random.seed(time.time_ns())
-            drop_num = random.randint(1, 100)
+            drop_num = self.rng.randint(1, 100)
             if drop_num <= constants.CONSUMABLE_DROP_PROBABILITY:
                 # 随机掉落消耗品
                 # 生成[0.0, 1.0)之间的随机数
-                rand = random.random()
+                rand = self.rng.random()
                 if rand < 0.6:
                     # 60%的概率得到一种消耗品
                     num = 1
@@ -1755,14 +1777,12 @@ class textGame(Plugin):
         if not player:
             return "❌ 您还没注册,请先注册 "
 
-        # 获取背包字典
-        inventory = player.inventory
-
         # 获取物品信息
-        if item_name not in inventory:
+        item = self.inventory_store.get_item(user_id, item_name)
+        if item is None:
             return f"🤷‍♂️ 你没有物品 [{item_name}]"
 
-        item_type = inventory.get(item_name, {}).get("type", "other")
+        item_type = item.get("type", "other")
 
         # 判断物品类型
         if item_type not in ['consumable', 'boor_potion', 'coward_potion', 'double_exp_card', 'double_gold_card']:
@@ -1776,13 +1796,13 @@ class textGame(Plugin):
         multiple = player.multiple
 
         # 检查背包中是否有足够的物品
-        item_count = inventory[item_name]["amount"]
+        item_count = item["amount"]
         if item_count < amount:
             result.append(f"🎒 背包中只有 {item_count} 个 {item_name}\n")
             amount = item_count
 
         # 获取物品说明
-        item_description = inventory.get(item_name, {}).get("description", {})
+        item_description = item.get("description", {})
 
         if item_type == 'consumable':
             # 检查hp状态
@@ -1937,12 +1957,7 @@ class textGame(Plugin):
         updates_info['multiple'] = multiple
 
         # 从背包中移除物品
-        if real_item_count == item_count:
-            del inventory[item_name]
-        else:
-            inventory[item_name]["amount"] -= real_item_count
-
-        updates_info['inventory'] = inventory
+        self.inventory_store.remove(user_id, item_name, real_item_count)
 
         result.append(f"🔄 使用 {real_item_count} 个 {item_name}\n")
 
@@ -1959,7 +1974,7 @@ class textGame(Plugin):
             else:
                 attack_bonus = 0
             # 计算新的攻击力
-            new_attack = int(((player.level * constants.PLAYER_LEVEL_UP_APPEND_ATTACK + constants.PLAYER_BASE_ATTACK) + attack_bonus) * (1 + attack_multiple_value))
+            new_attack = int((formulas.player_base_attributes(player.level)[0] + attack_bonus) * (1 + attack_multiple_value))
             updates_info['attack'] = new_attack
             result.append(f"\n⚔️ 当前攻击力: {new_attack}")
         elif item_type == 'coward_potion':
@@ -1975,8 +1990,8 @@ class textGame(Plugin):
                 defense_bonus = 0
                 max_hp_bonus = 0
             # 计算新的防御/生命
-            new_defense = int(((player.level * constants.PLAYER_LEVEL_UP_APPEND_DEFENSE + constants.PLAYER_BASE_DEFENSE) + defense_bonus) * (1 + defense_multiple_value))
-            new_max_hp = int(((player.level * constants.PLAYER_LEVEL_UP_APPEND_HP + constants.PLAYER_BASE_MAX_HP) + max_hp_bonus) * (1 + max_hp_multiple_value))
+            new_defense = int((formulas.player_base_attributes(player.level)[1] + defense_bonus) * (1 + defense_multiple_value))
+            new_max_hp = int((formulas.player_base_attributes(player.level)[2] + max_hp_bonus) * (1 + max_hp_multiple_value))
             updates_info['defense'] = new_defense
             updates_info['max_hp'] = new_max_hp
             result.append(f"\n🛡️ 当前防御力: {new_defense}")
@@ -2038,9 +2053,7 @@ class textGame(Plugin):
             }
 
             # 随机选择吉的状态
-            current_time_ms = int(time.time_ns())
-            random.seed(current_time_ms)
-            fortune = random.choice(list(fortune_bonuses.keys()))
+            fortune = self.rng.choice(list(fortune_bonuses.keys()))
             bonus_multiplier = fortune_bonuses[fortune]
 
             # 计算奖励
@@ -2072,7 +2085,7 @@ class textGame(Plugin):
             logger.info(f"用户 {user_id} 数据更新成功: {updates}")
 
             # 随机选择一首诗
-            poem = random.choice(constants.SIGN_IN_POEMS[fortune])
+            poem = self.rng.choice(constants.SIGN_IN_POEMS[fortune])
 
             report_log.append(f"🎉 签到成功！")
             report_log.append(f"🍀 今日运势：{fortune}")
@@ -2101,6 +2114,8 @@ class textGame(Plugin):
         if not target_player:
             return "🔍 无法找到目标用户，请确保该用户已注册游戏"
         target_id = target_player.user_id
+        # 锁定接收者
+        self.player_locks.acquire(target_id)
 
         # 从命令中提取物品名称
         item_name = parts[2]
@@ -2126,35 +2141,16 @@ class textGame(Plugin):
             return "🙅‍♂️ 对方还没有注册游戏"
 
         # 检查发送者是否拥有该物品且数量足够
-        sender_inventory = sender.inventory
-        receiver_inventory = receiver.inventory
-        if item_name not in sender_inventory:
+        give_you_item = self.inventory_store.get_item(user_id, item_name)
+        if give_you_item is None:
             return f"🤷‍♂️ 您没有物品 {item_name}"
-        if sender_inventory[item_name]["amount"] < amount:
-            return f"🤷‍♂️ 您没有足够的 {item_name}\n当前拥有: {sender_inventory[item_name]['amount']}"
-
-        # 进行赠送操作
-        give_you_item = sender_inventory[item_name]
-        if sender_inventory[item_name]["amount"] == amount:
-            # 如果数量相等，直接删除该物品
-            sender_inventory.pop(item_name)
-        else:
-            sender_inventory[item_name]["amount"] -= amount
-
-        # 检查接收者是否已经拥有该物品，存在则增加数量，否则直接添加
-        if item_name in receiver_inventory:
-            receiver_inventory[item_name]["amount"] += amount
-        else:
-            # 将物品复制到接收方背包（保留其他属性信息）
-            receiver_inventory[item_name] = give_you_item
+        if give_you_item["amount"] < amount:
+            return f"🤷‍♂️ 您没有足够的 {item_name}\n当前拥有: {give_you_item['amount']}"
 
-        # 更新双方的背包数据
-        self._update_player_data(user_id, {
-            'inventory': sender_inventory
-        })
-        self._update_player_data(target_id, {
-            'inventory': receiver_inventory
-        })
+        # 进行赠送操作(数量相等时删除该物品)
+        self.inventory_store.remove(user_id, item_name, amount)
+        # 接收者已经拥有该物品时增加数量，否则复制到接收方背包（保留其他属性信息）
+        self.inventory_store.add(target_id, item_name, give_you_item, amount)
 
         return f"[{sender.nickname}] 成功将 {amount} 个 {item_name}🎁 赠送给了 {receiver.nickname}"
 
@@ -2169,27 +2165,21 @@ class textGame(Plugin):
             if board_type not in ["金币", "等级"]:
                 return "⚠️ 目前支持的排行榜类型：金币/等级"
 
-            # 读取所有玩家数据
-            players = self.get_all_players()
+            # 只读取前10名
+            if self.leaderboard.ready:
+                players = self.leaderboard.top(board_type, 10)
+            else:
+                players = self.get_leaderboard(board_type, 10)
 
             if not players:
                 return "🔍 暂无玩家数据"
 
-            # 根据类型排序
+            # 根据类型设置显示
             if board_type == "金币":
-                players.sort(key=lambda x: int(x.get('gold', 0)), reverse=True)
                 title = "金币排行榜"
                 value_key = 'gold'
                 suffix = "金币"
             else:  # 等级排行榜
-                # 使用元组排序，先按等级后按经验
-                players.sort(
-                    key=lambda x: (
-                        int(x.get('level', 1)),
-                        int(x.get('exp', 0))
-                    ),
-                    reverse=True
-                )
                 title = "等级排行榜"
                 value_key = 'level'
                 suffix = "级"
@@ -2198,8 +2188,7 @@ class textGame(Plugin):
             result = f"{title}:\n"
             result += "-" * 30 + "\n"
 
-            # 只显示前10名
-            for i, player in enumerate(players[:10], 1):
+            for i, player in enumerate(players, 1):
                 nickname = player['nickname']
                 value = int(player[value_key])
 
@@ -2211,15 +2200,30 @@ class textGame(Plugin):
 
                 result += f"{rank_mark} {nickname}: {value}{suffix}{exp_info}\n"
 
-            # 如果当前用户不在前10名，显示其排名
-            current_player = next((p for p in players if p['nickname'] == user_id), None)
-            if current_player:
-                current_rank = players.index(current_player) + 1
+            # 如果当前用户不在前10名，显示其排名及前后的玩家
+            if self.leaderboard.ready:
+                rank_info = self.leaderboard.rank(user_id, board_type)
+            else:
+                rank_info = self.get_player_rank(user_id, board_type)
+            if rank_info:
+                current_rank, current_player = rank_info
                 if current_rank > 10:
                     result += "-" * 30 + "\n"
-                    value = current_player[value_key]
-                    exp_info = f" (经验: {int(current_player.get('exp', '0'))})" if board_type == "等级" else ""
-                    result += f"你的排名: {current_rank}. {current_player['nickname']}: {value}{suffix}{exp_info}"
+                    if self.leaderboard.ready:
+                        window = self.leaderboard.around(user_id, board_type, 1)
+                    else:
+                        window = [rank_info]
+                    lines = []
+                    for rank, player in window:
+                        if rank <= 10:
+                            continue
+                        value = player[value_key]
+                        exp_info = f" (经验: {int(player.get('exp', '0'))})" if board_type == "等级" else ""
+                        if player['user_id'] == user_id:
+                            lines.append(f"你的排名: {rank}. {player['nickname']}: {value}{suffix}{exp_info}")
+                        else:
+                            lines.append(f"{rank}. {player['nickname']}: {value}{suffix}{exp_info}")
+                    result += "\n".join(lines)
 
             return result
 
@@ -2227,39 +2231,58 @@ class textGame(Plugin):
             logger.error(f"显示排行榜出错: {e}")
             return "⚠️ 显示排行榜时发生错误"
 
-    def damage_calculation(self, attack, defense):
-        """计算造成的实际伤害"""
-        damage_reduction = min(defense/1000, 0.8)
-        damage = int(attack * (1- damage_reduction))
-        # 玩家1伤害修正：确保减伤后伤害至少为1
-        damage = max(1, damage)
-
-        explain_str = ""
-
-        # 使用当前时间作为随机数种子
-        current_time_ms = int(time.time_ns())
-        random.seed(current_time_ms)
-
-        # 生成1到100之间的随机数
-        random_num = random.randint(1, 100)
-
-        if random_num > 80:
-            # 暴击（20% 概率）
-            final_damage = int(damage * random.uniform(1.5, 1.8))
-            explain_str = "💥暴击！"
-        elif random_num < 20:
-            # 失手（20% 概率）
-            final_damage = max(1, int(damage * random.uniform(0.5, 0.7)))
-            explain_str = "🤦‍♂️失手了！"
-        else:
-            # 正常命中（60% 概率）
-            final_damage = int(damage)
-            explain_str = ""
+    # 排行榜的排序规则(走 idx_gold / idx_level_exp 索引，同分时先注册的玩家靠前)
+    LEADERBOARD_ORDER = {
+        "金币": "gold DESC, rowid ASC",
+        "等级": "level DESC, exp DESC, rowid ASC",
+    }
+
+    def get_leaderboard(self, board_type: str, limit: int = 10) -> list:
+        """
+        通过索引查询排行榜前 N 名。
+
+        :param board_type: 排行榜类型(金币/等级)
+        :param limit: 返回的名次数量
+        :return: 玩家数据列表(仅包含 user_id, nickname, gold, level, exp)
+        """
+        query = f"""
+        SELECT user_id, nickname, gold, level, exp FROM players
+        ORDER BY {self.LEADERBOARD_ORDER[board_type]}
+        LIMIT ?
+        """
+        conn = self._get_connection()
+        rows = conn.execute(query, (limit,)).fetchall()
+        return [{key: row[key] for key in row.keys()} for row in rows]
 
-        # 确保最终伤害至少为1点
-        final_damage = max(1, final_damage)
+    def get_player_rank(self, user_id: str, board_type: str):
+        """
+        通过索引统计排在玩家之前的人数，得到玩家在排行榜中的名次。
 
-        return final_damage, explain_str
+        :param user_id: 玩家ID
+        :param board_type: 排行榜类型(金币/等级)
+        :return: (名次, 玩家数据)，玩家不存在时返回 None
+        """
+        conn = self._get_connection()
+        row = conn.execute(
+            "SELECT rowid, user_id, nickname, gold, level, exp FROM players WHERE user_id = ?",
+            (user_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        player_data = {key: row[key] for key in row.keys()}
+        if board_type == "金币":
+            query = """
+            SELECT (SELECT COUNT(*) FROM players WHERE gold > :gold)
+                 + (SELECT COUNT(*) FROM players WHERE gold = :gold AND rowid < :rowid)
+            """
+        else:
+            query = """
+            SELECT (SELECT COUNT(*) FROM players WHERE level > :level)
+                 + (SELECT COUNT(*) FROM players WHERE level = :level AND exp > :exp)
+                 + (SELECT COUNT(*) FROM players WHERE level = :level AND exp = :exp AND rowid < :rowid)
+            """
+        ahead = conn.execute(query, player_data).fetchone()[0]
+        return ahead + 1, player_data
 
     def calculate_compensation(self, round_num, total_money) -> int:
         """
@@ -2284,17 +2307,6 @@ class textGame(Plugin):
 
         return compensation_amount  # 保留两位小数
 
-    def random_boolean(self):
-        """
-        使用当前时间作为随机数种子，随机返回 True 或 False。
-        """
-        # 使用当前时间作为随机数种子
-        current_time_ms = int(time.time_ns())
-        random.seed(current_time_ms)
-
-        # 随机生成 True 或 False
-        return random.choice([True, False])
-
     def pvp_close_an_acount(self, round_num, winner: Player, winner_hp, loser: Player) -> str:
         # 计算扣除金币
         penalty_gold = self.calculate_compensation(round_num, loser.gold)
@@ -2326,7 +2338,6 @@ class textGame(Plugin):
         player_1_attack = int(player_1.attack)
         player_1_defense = int(player_1.defense)
         player_1_name = player_1.nickname
-        player_1_total_damage = 0
 
         # 目标玩家属性
         player_2_level = player_2.level
@@ -2335,7 +2346,6 @@ class textGame(Plugin):
         player_2_attack = int(player_2.attack)
         player_2_defense = int(player_2.defense)
         player_2_name = player_2.nickname
-        player_2_total_damage = 0
 
         # 更新战斗日志显示
         battle_log = [
@@ -2345,84 +2355,33 @@ class textGame(Plugin):
             f"[{player_2_name}] Lv.{player_2_level}\n❤️[{player_2_hp}/{player_2_max_hp}]\n⚔️[{player_2_attack}]\n🛡️[{str(player_2_defense)}]"
         ]
 
-        # 战斗逻辑
-        round_num = 1
-        while player_1_hp > 0 and player_2_hp > 0:
-            if constants.WEATHER_TO_KEEP_A_BATTLE_LOG:
-                if round_num <= constants.REPORT_THE_NUMBER_OF_ROUNDS:
-                    battle_log.append(f"\n第{round_num}回合")
-
-            # 计算玩家1的本轮造成伤害
-            player_1_final_damage, player_1_explain_str = self.damage_calculation(player_1_attack, player_2_defense)
-            # 计算玩家2的本轮造成伤害
-            player_2_final_damage, player_2_explain_str = self.damage_calculation(player_2_attack, player_1_defense)
-            # 获取本轮先手情况
-            player_1_on_the_offensive = self.random_boolean()
-            if player_1_on_the_offensive:
-                # ---------玩家1先手---------
-                # 减少目标玩家血量
-                player_2_hp -= player_1_final_damage
-                # 统计玩家1伤害
-                player_1_total_damage += player_1_final_damage
-                # 记录战斗日志（前4回合）
-                if constants.WEATHER_TO_KEEP_A_BATTLE_LOG:
-                    if round_num <= constants.REPORT_THE_NUMBER_OF_ROUNDS:
-                        battle_log.append(f"{player_1_explain_str}{player_1_name}对{player_2_name}造成 {player_1_final_damage} 点伤害")
-                # 检查玩家2是否已被击败
-                if player_2_hp <= 0:
-                    battle_log.append(f"\n{player_2_name}被打败了！😵")
-                    break
-
-                # 减少攻击玩家血量
-                player_1_hp -= player_2_final_damage
-                # 统计玩家2伤害
-                player_2_total_damage += player_2_final_damage
-                # 记录战斗日志（前4回合）
-                if constants.WEATHER_TO_KEEP_A_BATTLE_LOG:
-                    if round_num <= constants.REPORT_THE_NUMBER_OF_ROUNDS:
-                        battle_log.append(f"{player_2_explain_str}{player_2_name}对{player_1_name}造成 {player_2_final_damage} 点伤害")
-                # 检查玩家1是否已被击败
-                if player_1_hp <= 0:
-                    battle_log.append(f"\n{player_1_name}被打败了！😵")
-                    break
-            else:
-                # ---------玩家2先手---------
-                # 减少攻击玩家血量
-                player_1_hp -= player_2_final_damage
-                # 统计玩家2伤害
-                player_2_total_damage += player_2_final_damage
-                # 记录战斗日志（前4回合）
-                if constants.WEATHER_TO_KEEP_A_BATTLE_LOG:
-                    if round_num <= constants.REPORT_THE_NUMBER_OF_ROUNDS:
-                        battle_log.append(f"{player_2_explain_str}{player_2_name}对{player_1_name}造成 {player_2_final_damage} 点伤害")
-                # 检查玩家1是否已被击败
-                if player_1_hp <= 0:
-                    battle_log.append(f"\n{player_1_name}被打败了！😵")
-                    break
-
-                # 减少目标玩家血量
-                player_2_hp -= player_1_final_damage
-                # 统计玩家1伤害
-                player_1_total_damage += player_1_final_damage
-                # 记录战斗日志（前4回合）
-                if constants.WEATHER_TO_KEEP_A_BATTLE_LOG:
-                    if round_num <= constants.REPORT_THE_NUMBER_OF_ROUNDS:
-                        battle_log.append(f"{player_1_explain_str}{player_1_name}对{player_2_name}造成 {player_1_final_damage} 点伤害")
-                # 检查玩家2是否已被击败
-                if player_2_hp <= 0:
-                    battle_log.append(f"\n{player_2_name}被打败了！😵")
-                    break
-            round_num += 1
+        # 战斗结算(只有前 REPORT_THE_NUMBER_OF_ROUNDS 回合会生成战报)
+        duel = PvpDuel(
+            self.rng,
+            {'name': player_1_name, 'hp': player_1_hp, 'attack': player_1_attack, 'defense': player_1_defense},
+            {'name': player_2_name, 'hp': player_2_hp, 'attack': player_2_attack, 'defense': player_2_defense},
+            keep_log=constants.WEATHER_TO_KEEP_A_BATTLE_LOG,
+            report_rounds=constants.REPORT_THE_NUMBER_OF_ROUNDS
+        ).run()
+        battle_log.extend(duel['log'])
+        round_num = duel['round_num']
+        player_1_total_damage = duel['total_damage_1']
+        player_2_total_damage = duel['total_damage_2']
+
+        if duel['winner'] == 1:
+            battle_log.append(f"\n{player_2_name}被打败了！😵")
+        else:
+            battle_log.append(f"\n{player_1_name}被打败了！😵")
 
         # 战斗结束
         battle_log.append(f"\n战斗持续了{round_num}回合")
 
-        if player_2_hp <= 0:
+        if duel['winner'] == 1:
             # 发起挑战的玩家胜利，进行pvp结算
-            result = self.pvp_close_an_acount(round_num, player_1, player_1_hp, player_2)
+            result = self.pvp_close_an_acount(round_num, player_1, duel['hp_1'], player_2)
         else:
             # 接受挑战的玩家胜利，进行pvp结算
-            result = self.pvp_close_an_acount(round_num, player_2, player_2_hp, player_1)
+            result = self.pvp_close_an_acount(round_num, player_2, duel['hp_2'], player_1)
 
         # 向战斗结果中添加玩家和怪物造成的总伤害
         battle_log.append(f"\n📊 伤害统计:")
@@ -2445,6 +2404,8 @@ class textGame(Plugin):
         target = self._get_player_by_nickname(target_name)
         if not target:
             return "🔍 找不到目标玩家，请确保输入了正确的用户名"
+        # 锁定被挑战者(需要写入其挑战请求)
+        self.player_locks.acquire(target.user_id)
 
         # 获取攻击者信息
         attacker = self.get_player(user_id)
@@ -2508,6 +2469,9 @@ class textGame(Plugin):
         if not proposal:
             return "🤷‍♂️ 您没有待处理的挑战请求"
 
+        # 锁定挑战者
+        self.player_locks.acquire(proposal)
+
         # 使用昵称获取挑战者信息
         proposer = self.get_player(proposal)
         if not proposer:
@@ -2537,14 +2501,20 @@ class textGame(Plugin):
             logger.error(f"user_id 需要是字符串类型，但收到: {type(user_id)}")
             return
 
-        # 如果 update_data 中有 inventory 字段，确保将其序列化
+        # 背包保存在 inventory_items 表中，整体写入的背包按物品逐行比较后写入
         if 'inventory' in update_data:
-            inventory_value = update_data['inventory']
-            if isinstance(inventory_value, dict):
-                update_data['inventory'] = json.dumps(inventory_value, ensure_ascii=False)
-            elif not isinstance(inventory_value, str):
+            inventory_value = update_data.pop('inventory')
+            if isinstance(inventory_value, str):
+                try:
+                    inventory_value = json.loads(inventory_value)
+                except json.JSONDecodeError:
+                    inventory_value = None
+            if not isinstance(inventory_value, dict):
                 logger.error(f"inventory 字段类型不支持: {type(inventory_value)}")
                 return  # 不更新该值
+            self.inventory_store.replace(user_id, inventory_value)
+            if not update_data:
+                return
 
         # 如果 update_data 中有 multiple 字段，确保将其序列化
         if 'multiple' in update_data:
@@ -2564,6 +2534,60 @@ class textGame(Plugin):
                 logger.error(f"equipment_fishing_rod 字段类型不支持: {type(equipment_fishing_rod_value)}")
                 return  # 不更新该值
 
+        # 处于事务中时先合并到待提交的更新，事务结束时统一写入
+        pending = getattr(self.local, 'pending_updates', None)
+        if pending is not None:
+            pending.setdefault(user_id, {}).update(update_data)
+            return
+
+        try:
+            self._write_player_updates({user_id: update_data})
+            logger.debug(f"用户 {user_id} 的数据已成功部分更新！")
+        except sqlite3.Error as e:
+            logger.error(f"更新玩家数据时出错: {e} | 数据: {update_data}")
+
+    def _write_player_updates(self, updates: Dict[str, dict]):
+        """
+        在一个数据库事务中写入多个玩家的更新，提交成功后同步更新缓存。
+        只修改了冷却时间、位置等字段的玩家放入延迟写入缓冲，其余玩家顺带写入缓冲中的字段。
+
+        :param updates: user_id -> 已序列化的更新字段
+        """
+        conn = self._get_write_connection()
+        with self.db_lock:
+            writes = {}
+            # 从缓冲中取出、随本次事务写入的字段(写入失败时放回)
+            taken = {}
+            for user_id, update_data in updates.items():
+                if not update_data:
+                    continue
+                if self.write_behind is not None:
+                    if self.write_behind.fields.issuperset(update_data):
+                        self.write_behind.put(user_id, update_data)
+                        continue
+                    buffered = self.write_behind.take(user_id)
+                    if buffered:
+                        taken[user_id] = buffered
+                        update_data = {**buffered, **update_data}
+                writes[user_id] = update_data
+            try:
+                with conn:
+                    for user_id, update_data in writes.items():
+                        self._execute_player_update(conn, user_id, update_data)
+                    # 同一事务中修改的地产和背包一并写入
+                    self.monopoly.write_pending(conn)
+                    self.inventory_store.write_pending(conn)
+            except sqlite3.Error:
+                if taken:
+                    self.write_behind.restore(taken)
+                raise
+            # 写入成功后同步更新缓存和排行榜
+            for user_id, update_data in writes.items():
+                self.player_cache.update(user_id, update_data)
+                self.leaderboard.update(user_id, update_data)
+
+    def _execute_player_update(self, conn: sqlite3.Connection, user_id: str, update_data: dict):
+        """在调用方的事务中执行单个玩家的 UPDATE 语句"""
         # 构建 SET 子句及参数字典
         set_clause = ", ".join([f"{field} = :{field}" for field in update_data.keys()])
         update_query = f"""
@@ -2571,17 +2595,76 @@ class textGame(Plugin):
         SET {set_clause}
         WHERE user_id = :user_id
         """
-
         # 添加 user_id 到更新参数中
-        update_data['user_id'] = user_id
+        conn.execute(update_query, {**update_data, 'user_id': user_id})
 
-        try:
-            conn = self._get_connection()
+    def _flush_write_behind(self, updates: Dict[str, dict]):
+        """
+        延迟写入缓冲的写入函数：在一个事务中写入所有玩家的缓冲字段。
+
+        :param updates: user_id -> 缓冲的字段
+        """
+        conn = self._get_write_connection()
+        with self.db_lock:
             with conn:
-                conn.execute(update_query, update_data)
-            logger.debug(f"用户 {user_id} 的数据已成功部分更新！")
-        except sqlite3.Error as e:
-            logger.error(f"更新玩家数据时出错: {e} | 数据: {update_data}")
+                for user_id, update_data in updates.items():
+                    self._execute_player_update(conn, user_id, update_data)
+            for user_id, update_data in updates.items():
+                self.player_cache.update(user_id, update_data)
+        logger.debug(f"延迟写入 {len(updates)} 位玩家的数据")
+
+    @contextmanager
+    def transaction(self):
+        """
+        玩家数据事务：范围内的 _update_player_data 调用会被合并，退出时与地产、背包的修改
+        在同一个数据库事务中提交；发生异常时全部放弃。嵌套调用时并入外层事务。
+        """
+        if getattr(self.local, 'pending_updates', None) is not None:
+            yield
+            return
+        self.local.pending_updates = pending = {}
+        try:
+            with self.monopoly.transaction(), self.inventory_store.transaction():
+                yield
+                # 先清空待提交标记，提交过程中的读写直接访问数据库
+                self.local.pending_updates = None
+                if pending:
+                    try:
+                        self._write_player_updates(pending)
+                    except sqlite3.Error as e:
+                        logger.error(f"提交玩家数据事务时出错: {e} | 数据: {pending}")
+                        raise
+        finally:
+            self.local.pending_updates = None
+
+    def _apply_pending_updates(self, player_data: dict):
+        """
+        将延迟写入缓冲中的字段以及当前事务中尚未提交的更新合并到读取的玩家数据中(原地修改)。
+
+        :param player_data: 原始行数据
+        """
+        user_id = player_data.get('user_id')
+        if self.write_behind is not None:
+            for field, value in self.write_behind.get(user_id).items():
+                player_data[field] = PlayerCache.apply_affinity(field, value)
+        pending = getattr(self.local, 'pending_updates', None)
+        if not pending:
+            return
+        update_data = pending.get(user_id)
+        if update_data:
+            for field, value in update_data.items():
+                player_data[field] = PlayerCache.apply_affinity(field, value)
+
+    def save_player(self, player: Player):
+        """
+        保存玩家对象中被修改过的字段，未修改的字段不会序列化和写入。
+
+        :param player: 玩家对象
+        """
+        if not player.is_dirty():
+            return
+        self._update_player_data(player.user_id, player.get_changes())
+        player.mark_saved()
 
     def show_inventory(self, user_id, content):
         player = self.get_player(user_id)
@@ -2623,39 +2706,38 @@ class textGame(Plugin):
             if not player:
                 return "🥴 您还没注册..."
             # 检查背包中是否有玩家想要装备的物品
-            inventory = player.inventory
-            if not inventory:
-                return f"🤷‍♂️ 玩家 [{player.nickname}] 的背包是空的！"
-            if item_name not in inventory:
+            item = self.inventory_store.get_item(user_id, item_name)
+            if item is None:
+                if self.inventory_store.is_empty(user_id):
+                    return f"🤷‍♂️ 玩家 [{player.nickname}] 的背包是空的！"
                 return f"🤷‍♂️ 玩家 [{player.nickname}] 未持有物品 [{item_name}]！"
 
             multiple = player.multiple
             # 获取装备UUID
-            equipment_uuid = inventory[item_name]['uuid']
+            equipment_uuid = item.get('uuid')
             # 定义已装备的道具
             is_equipped_prop = None
             is_equipped_fishing_rod = None
 
-            if inventory[item_name]['type'] == 'fishing_rod':
+            if item['type'] == 'fishing_rod':
                 if player.equipment_fishing_rod:
                     # 玩家已装备鱼竿，先卸下
                     is_equipped_fishing_rod = player.equipment_fishing_rod
-                fishing_rod = inventory[item_name]
+                fishing_rod = item
                 # 添加鱼竿名称
                 fishing_rod['name'] = item_name
                 # 从背包移除该鱼竿(已装备)
-                inventory.pop(item_name)
+                self.inventory_store.delete(user_id, item_name)
 
                 if is_equipped_fishing_rod:
                     # 将卸下的鱼竿放回背包
-                    inventory[is_equipped_fishing_rod['name']] = is_equipped_fishing_rod
+                    self.inventory_store.put(user_id, is_equipped_fishing_rod['name'], is_equipped_fishing_rod)
                     unload_explain = f"\n[{is_equipped_fishing_rod['name']}] 已放回背包。"
                 else:
                     unload_explain = ""
 
                 # 准备需要更新的字典
                 updates_info = {
-                    'inventory': inventory,
                     'equipment_fishing_rod': fishing_rod
                 }
                 # 更新数据
@@ -2680,12 +2762,12 @@ class textGame(Plugin):
                         # 计算加成
                         attack_multiple = get_multiple('attack', multiple)[0]
                     # 新的攻击力 = 武器加成 + 等级加成 + 玩家基本数值
-                    new_attack = int((equipment['attack_bonus'] + (player.level * constants.PLAYER_LEVEL_UP_APPEND_ATTACK + constants.PLAYER_BASE_ATTACK)) * attack_multiple)
+                    new_attack = int((equipment['attack_bonus'] + formulas.player_base_attributes(player.level)[0]) * attack_multiple)
                     attribute_specification_str += f"\n⚔️ 当前攻击力: {new_attack}"
                     # 记录武器UUID
                     updates_info['equipment_weapon'] = equipment_uuid
                     # 从背包移除本次装备的武器
-                    inventory.pop(item_name)
+                    self.inventory_store.delete(user_id, item_name)
                     # 检查是否已装备武器
                     if player.equipment_weapon and (player.equipment_weapon != equipment_uuid):
                         is_equipped_prop = player.equipment_weapon
@@ -2695,15 +2777,15 @@ class textGame(Plugin):
                         defense_multiple = get_multiple('defense', multiple)[0]
                         max_hp_multiple = get_multiple('max_hp', multiple)[0]
                     # 新的防御力 = 防具加成 + 等级加成 + 玩家基本数值
-                    new_defense = int((equipment['defense_bonus'] + (player.level * constants.PLAYER_LEVEL_UP_APPEND_DEFENSE + constants.PLAYER_BASE_DEFENSE)) * defense_multiple)
+                    new_defense = int((equipment['defense_bonus'] + formulas.player_base_attributes(player.level)[1]) * defense_multiple)
                     attribute_specification_str += f"\n🛡️ 当前防御力: {new_defense}"
                     # 新的最大生命值 = 防具加成 + 等级加成 + 玩家基本数值
-                    new_max_hp = int((equipment['max_hp_bonus'] + (player.level * constants.PLAYER_LEVEL_UP_APPEND_HP + constants.PLAYER_BASE_MAX_HP)) * max_hp_multiple)
+                    new_max_hp = int((equipment['max_hp_bonus'] + formulas.player_base_attributes(player.level)[2]) * max_hp_multiple)
                     attribute_specification_str += f"\n❤️ 当前最大生命: {new_max_hp}"
                     # 记录防具UUID
                     updates_info['equipment_armor'] = equipment_uuid
                     # 从背包移除本次装备的防具
-                    inventory.pop(item_name)
+                    self.inventory_store.delete(user_id, item_name)
                     # 检查是否已装备防具
                     if player.equipment_armor and (player.equipment_armor!= equipment_uuid):
                         is_equipped_prop = player.equipment_armor
@@ -2725,12 +2807,10 @@ class textGame(Plugin):
                         'amount': 1,
                         'explain': is_equipped_explain
                     }
-                    inventory[is_equipped['name']] = equipment_dict
+                    self.inventory_store.put(user_id, is_equipped['name'], equipment_dict)
                     unload_explain = f"\n[{is_equipped['name']}] 已放回背包。"
                 else:
                     unload_explain = ""
-                # 更新背包
-                updates_info['inventory'] = inventory
 
                 # 更新玩家三维
                 if new_attack != 0:
@@ -2814,6 +2894,9 @@ class textGame(Plugin):
                 if not target:
                     return "🔍 找不到目标玩家，请确保输入了正确的用户名"
                 else:
+                    # 锁定目标玩家后重新读取金币
+                    self.player_locks.acquire(target.user_id)
+                    target = self.get_player(target.user_id)
                     target_gold = target.gold + amount
                     updates_info = {
                         "gold": target_gold,
@@ -2828,6 +2911,65 @@ class textGame(Plugin):
             logger.error(f"充值出错: {e}")
             return "⚠️ 充值失败，请联系管理员。"
 
+    def show_lock_stats(self, user_id):
+        """查看玩家锁争用统计"""
+        if not self.is_admin(user_id):
+            return "🙅‍♂️ 你没有管理员权限！"
+        return self.player_locks.get_stats_report()
+
+    def show_cache_stats(self, user_id):
+        """查看玩家缓存命中统计"""
+        if not self.is_admin(user_id):
+            return "🙅‍♂️ 你没有管理员权限！"
+        report = self.player_cache.get_stats_report()
+        if self.write_behind is not None:
+            stats = self.write_behind.get_stats()
+            report += (
+                f"\n✍️ 延迟写入: 待写入 {stats['pending_players']} 人"
+                f" | 合并 {stats['buffered']} 次 | 落盘 {stats['flushes']} 次({stats['flushed_players']} 人)"
+            )
+        stats = self.rouge_equipment_system.cache.get_stats()
+        total = stats['hits'] + stats['misses']
+        hit_rate = stats['hits'] / total if total else 0
+        report += (
+            f"\n🗡️ 装备缓存: {stats['size']}/{stats['max_size']}"
+            f" | 命中 {stats['hits']} | 未命中 {stats['misses']} | 命中率 {hit_rate:.1%} | 淘汰 {stats['evictions']}"
+        )
+        return report
+
+    def show_command_stats(self, user_id, content):
+        """查看/重置/导出指令性能统计"""
+        if not self.is_admin(user_id):
+            return "🙅‍♂️ 你没有管理员权限！"
+        action = self.regex_match("性能统计", content)
+        if action == "重置":
+            self.command_stats.reset()
+            return "✅ 指令性能统计已重置"
+        if action == "导出":
+            export_path = os.path.join(self.data_dir, "command_stats.json")
+            with open(export_path, "w", encoding="utf-8") as f:
+                f.write(self.command_stats.export_json())
+            return f"✅ 指令性能统计已导出到: {export_path}"
+        return self.command_stats.get_stats_report()
+
+    def _lock_property_owner(self, position):
+        """
+        锁定地块当前的地主并返回地产数据。
+        地主变更(收购)需要持有原地主的锁，因此加锁后地主未变即可确认归属稳定。
+
+        :param position: 地块位置
+        :return: 地产数据，无人拥有时返回 None
+        """
+        while True:
+            property_info = self.monopoly.get_property_owner(position)
+            owner = property_info.get('owner') if property_info else None
+            if not owner:
+                return property_info
+            self.player_locks.acquire(owner)
+            current = self.monopoly.get_property_owner(position)
+            if current and current.get('owner') == owner:
+                return current
+
     def is_admin(self, user_id):
         """检查玩家是否是管理员"""
         return any(admin in user_id for admin in self.admin_list)
@@ -2974,6 +3116,8 @@ class textGame(Plugin):
         if current_position == 0:
             return f"🤷‍♂️ 地点 [{symbol}{block['name']}] 无法收购！"
 
+        # 锁定地主
+        self._lock_property_owner(current_position)
         property_info = self.monopoly.get_property_info(current_position)
 
         if property_info is None or 'owner' not in property_info:
@@ -3029,8 +3173,8 @@ class textGame(Plugin):
         if player.position == 0 or player.is_pay_rent == 0:
             return "🤷‍♂️ 你无需支付租金！"
 
-        # 获取当前地块信息
-        property_info = self.monopoly.get_property_owner(current_position)
+        # 获取当前地块信息(同时锁定地主)
+        property_info = self._lock_property_owner(current_position)
         block = self.monopoly.get_block_info(current_position)
         # 获取地主信息
         owner = property_info['owner']
@@ -3108,6 +3252,13 @@ class textGame(Plugin):
         result = [f"🗺️ 大富翁地图 - 页码 {page_num}/{total_pages}"]
         result.append("──────────────")
 
+        # 一次性获取当前页所有地主的昵称
+        owner_ids = [
+            self.monopoly.properties_data.get(str(pos), {}).get('owner')
+            for pos in range(start_index, end_index)
+        ]
+        owner_nicknames = self.get_nicknames(owner_id for owner_id in owner_ids if owner_id)
+
         # 生成当前页地图显示
         for pos in range(start_index, end_index):
             block = self.monopoly.get_block_info(pos)
@@ -3129,9 +3280,9 @@ class textGame(Plugin):
             # 添加地块信息
             block_info = f"{arrows_symbol} {pos}: {symbol}{block['name']}"
             if owner_id:
-                owner_player = self.get_player(owner_id)
-                if owner_player:
-                    block_info += f"(Lv.{property_data.get('level', 1)}|{owner_player.nickname})"
+                owner_nickname = owner_nicknames.get(owner_id)
+                if owner_nickname:
+                    block_info += f"(Lv.{property_data.get('level', 1)}|{owner_nickname})"
                 else:
                     block_info += "(未知)"
             if pos == current_position:
@@ -3198,12 +3349,8 @@ class textGame(Plugin):
         if player_gold < amount:
             return f"🤷‍♂️ 您的本金不足，无法进行下注。\n💵 您的余额：{player_gold} 金币"
 
-        # 使用当前时间作为随机数种子
-        current_time_ms = int(time.time_ns())
-        random.seed(current_time_ms)
-
         # 模拟掷三颗骰子
-        dice = [random.randint(1, 6) for _ in range(3)]
+        dice = [self.rng.randint(1, 6) for _ in range(3)]
         total = sum(dice)
 
         dice_faces = ' '.join([DICE_EMOJI.get(d, '❓') for d in dice])
@@ -3262,9 +3409,7 @@ class textGame(Plugin):
         # 结算赌博收入
         player.gold = int(player.gold) + payout
         # 更新目标玩家的金币数据
-        self._update_player_data(player.user_id, {
-            'gold': str(player.gold)
-        })
+        self.save_player(player)
 
         payout = abs(payout)
         result_str = f"──────────────\n🎲点数: {dice_faces}\n\n💴下注: {amount}金币\n\n{'🤩 恭喜您赢得了' if win else '😢 很遗憾，您输了'} {payout}🪙\n\n(游戏娱乐，切勿当真，热爱生活，远离赌博)\n──────────────"
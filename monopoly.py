@@ -1,7 +1,12 @@
 import os
+import copy
 import json
-import random
+import sqlite3
+import threading
+from contextlib import contextmanager
 from . import constants
+from . import database
+from . import random_service
 from common.log import logger
 from typing import List, Optional
 
@@ -9,41 +14,169 @@ from typing import List, Optional
 class MonopolySystem:
     def __init__(self, data_dir: str):
         self.data_dir = data_dir
+        # 旧版本的地产数据文件(仅用于迁移)
         self.properties_file = os.path.join(data_dir, "properties.json")
-
-        # 初始化地图和事件数据
-        self._init_properties()
+        # 地产数据与玩家数据保存在同一个数据库中，便于在同一个事务中提交
+        self.db = database.get_pool(os.path.join(data_dir, "players.db"))
+        # 地产数据写入锁(不同玩家的指令会并发修改地产)
+        self.lock = threading.Lock()
+        # 事务内的修改记录(按线程区分)
+        self.local = threading.local()
 
         # 加载数据
         self.map_data = constants.MONOPOLY_MAP
         self.events_data = constants.RANDOM_EVENTS
-        self.properties_data = self._load_json(self.properties_file)
+
+        # 初始化地产数据表
+        self._init_properties()
+        # 地产数据的内存副本: 位置(str) -> {"owner", "level", "price"}
+        self.properties_data = self._load_properties()
+
+    @property
+    def rng(self):
+        """当前线程(请求)使用的随机数生成器"""
+        return random_service.get_rng()
 
     def _init_properties(self):
-        """初始化地产数据"""
-        if not os.path.exists(self.properties_file):
-            self._save_json(self.properties_file, {})
+        """初始化地产数据表，并迁移旧版本的 properties.json"""
+        create_table_query = """
+        CREATE TABLE IF NOT EXISTS properties (
+            position INTEGER PRIMARY KEY,
+            owner TEXT NOT NULL,
+            level INTEGER NOT NULL DEFAULT 1,
+            price INTEGER NOT NULL
+        )
+        """
+        create_index_query = "CREATE INDEX IF NOT EXISTS idx_properties_owner ON properties(owner);"
+        migrated = False
+        try:
+            with self.db.transaction() as conn:
+                conn.execute(create_table_query)
+                conn.execute(create_index_query)
+                if os.path.exists(self.properties_file):
+                    migrated = self._migrate_json(conn)
+        except sqlite3.Error as e:
+            logger.error(f"初始化地产数据表失败: {e}")
+            raise
+        if migrated:
+            # 事务提交成功后才重命名旧文件，提交失败时下次启动会重新迁移
+            os.replace(self.properties_file, self.properties_file + ".migrated")
+
+    def _migrate_json(self, conn) -> bool:
+        """
+        将 properties.json 中的地产导入数据表(仅在数据表为空时执行)。
+
+        :return: 旧文件可以重命名时返回 True，读取失败时返回 False(保留文件，下次启动重试)
+        """
+        if conn.execute("SELECT COUNT(*) FROM properties").fetchone()[0] == 0:
+            properties = self._load_json(self.properties_file)
+            if properties is None:
+                logger.error(f"无法读取 {self.properties_file}，暂不迁移地产数据")
+                return False
+            conn.executemany(
+                "INSERT INTO properties (position, owner, level, price) VALUES (?, ?, ?, ?)",
+                [
+                    (int(pos), data["owner"], data.get("level", 1), data.get("price", 0))
+                    for pos, data in properties.items()
+                ]
+            )
+            logger.info(f"已将 {len(properties)} 块地产从 properties.json 迁移到数据库")
+        return True
+
+    def _load_properties(self) -> dict:
+        """从数据表加载全部地产"""
+        rows = self.db.reader().execute("SELECT position, owner, level, price FROM properties").fetchall()
+        return {
+            str(row["position"]): {"owner": row["owner"], "level": row["level"], "price": row["price"]}
+            for row in rows
+        }
 
-    def _load_json(self, file_path: str) -> dict:
-        """加载JSON文件"""
+    def _load_json(self, file_path: str) -> Optional[dict]:
+        """加载JSON文件，读取或解析失败时返回 None"""
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                data = json.load(f)
         except Exception as e:
             logger.error(f"加载{file_path}失败: {e}")
-            return {}
+            return None
+        if not isinstance(data, dict):
+            logger.error(f"{file_path} 的内容不是字典")
+            return None
+        return data
+
+    def _record_change(self, pos_key: str):
+        """在事务内记录地块修改前的数据，用于回滚"""
+        undo = getattr(self.local, 'undo', None)
+        if undo is not None:
+            undo.append((pos_key, copy.deepcopy(self.properties_data.get(pos_key))))
+
+    def _persist(self, pos_key: str):
+        """保存单个地块，事务内延迟到提交时与玩家数据一起写入"""
+        pending = getattr(self.local, 'pending', None)
+        if pending is not None:
+            pending[pos_key] = dict(self.properties_data[pos_key])
+            return
+        try:
+            with self.db.transaction() as conn:
+                self._write_property(conn, pos_key, self.properties_data[pos_key])
+        except sqlite3.Error as e:
+            logger.error(f"保存地产 {pos_key} 失败: {e}")
+            raise
+
+    def _write_property(self, conn, pos_key: str, data: dict):
+        """写入单个地块"""
+        conn.execute(
+            """
+            INSERT INTO properties (position, owner, level, price) VALUES (?, ?, ?, ?)
+            ON CONFLICT(position) DO UPDATE SET owner = excluded.owner, level = excluded.level, price = excluded.price
+            """,
+            (int(pos_key), data["owner"], data["level"], data["price"])
+        )
+
+    def write_pending(self, conn):
+        """
+        在调用方的数据库事务中写入当前事务内修改过的地块。
 
-    def _save_json(self, file_path: str, data: dict):
-        """保存JSON文件"""
+        :param conn: players.db 的写连接(调用方持有写入锁并负责提交)
+        """
+        pending = getattr(self.local, 'pending', None)
+        if pending:
+            for pos_key, data in pending.items():
+                self._write_property(conn, pos_key, data)
+            pending.clear()
+
+    @contextmanager
+    def transaction(self):
+        """
+        地产事务：范围内修改的地块在退出时统一写入(或由 write_pending 并入玩家数据的事务)，
+        发生异常时撤销内存中的修改。嵌套调用时并入外层事务。
+        """
+        if getattr(self.local, 'undo', None) is not None:
+            yield
+            return
+        self.local.undo = undo = []
+        self.local.pending = {}
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.error(f"保存{file_path}失败: {e}")
+            yield
+            if self.local.pending:
+                with self.db.transaction() as conn:
+                    self.write_pending(conn)
+        except BaseException:
+            if undo:
+                with self.lock:
+                    for pos_key, old_data in reversed(undo):
+                        if old_data is None:
+                            self.properties_data.pop(pos_key, None)
+                        else:
+                            self.properties_data[pos_key] = old_data
+            raise
+        finally:
+            self.local.undo = None
+            self.local.pending = None
 
     def roll_dice(self) -> int:
         """掷骰子"""
-        return random.randint(1, 6)
+        return self.rng.randint(1, 6)
 
     def get_block_info(self, position: int) -> dict:
         """获取指定位置的地块信息"""
@@ -56,15 +189,17 @@ class MonopolySystem:
 
     def buy_property(self, position: int, player_id: str, price: int) -> bool:
         """购买地块"""
-        if str(position) in self.properties_data:
-            return False
-
-        self.properties_data[str(position)] = {
-            "owner": player_id,
-            "level": 1,
-            "price": price
-        }
-        self._save_json(self.properties_file, self.properties_data)
+        with self.lock:
+            if str(position) in self.properties_data:
+                return False
+
+            self._record_change(str(position))
+            self.properties_data[str(position)] = {
+                "owner": player_id,
+                "level": 1,
+                "price": price
+            }
+            self._persist(str(position))
         return True
 
     def calculate_property_price(self, position: int) -> int:
@@ -137,29 +272,31 @@ class MonopolySystem:
 
     def trigger_random_event(self) -> dict:
         """触发随机事件"""
-        event_type = random.choice(["good_events", "bad_events"])
+        event_type = self.rng.choice(["good_events", "bad_events"])
         events = self.events_data[event_type]
-        return random.choice(events)
+        return self.rng.choice(events)
 
     def upgrade_property(self, position: int) -> bool:
         """升级地产"""
-        if str(position) not in self.properties_data:
-            return False
+        with self.lock:
+            if str(position) not in self.properties_data:
+                return False
 
-        property_data = self.properties_data[str(position)]
-        if property_data["level"] >= 3:  # 最高3级
-            return False
+            property_data = self.properties_data[str(position)]
+            if property_data["level"] >= 3:  # 最高3级
+                return False
 
-        property_data["level"] += 1
-        self._save_json(self.properties_file, self.properties_data)
+            self._record_change(str(position))
+            property_data["level"] += 1
+            self._persist(str(position))
         return True
 
     def get_player_properties(self, player_id: str) -> List[int]:
         """获取玩家的所有地产"""
-        return [
-            int(pos) for pos, data in self.properties_data.items()
-            if data["owner"] == player_id
-        ]
+        rows = self.db.reader().execute(
+            "SELECT position FROM properties WHERE owner = ? ORDER BY position", (player_id,)
+        ).fetchall()
+        return [row["position"] for row in rows]
 
     def update_property_owner(self, position: int, new_owner: str) -> bool:
         """直接修改地产的所有者，不影响其它逻辑
@@ -172,9 +309,11 @@ class MonopolySystem:
             bool: 如果修改成功返回True，否则返回False（例如地产不存在）
         """
         pos_key = str(position)
-        if pos_key not in self.properties_data:
-            return False
+        with self.lock:
+            if pos_key not in self.properties_data:
+                return False
 
-        self.properties_data[pos_key]["owner"] = new_owner
-        self._save_json(self.properties_file, self.properties_data)
+            self._record_change(pos_key)
+            self.properties_data[pos_key]["owner"] = new_owner
+            self._persist(pos_key)
         return True
@@ -1,19 +1,102 @@
 import json
+import bisect
 import logging
+from itertools import accumulate
 from .utils import get_multiple
 from . import constants
+from . import formulas
 from typing import Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
 
 
 class Player:
-    game = None
     """玩家类,用于管理玩家属性和状态"""
+    game = None
+
+    # 整数字段及其默认值，加载时统一转换为 int
+    INT_FIELDS = {
+        'gold': 0,
+        'level': 1,
+        'sign_in_timestamp': 1,
+        'hp': 100,
+        'max_hp': 100,
+        'attack': 10,
+        'defense': 5,
+        'exp': 0,
+        'max_exp': 0,
+        'last_attack': 0,
+        'adventure_last_attack': 0,
+        'is_pay_rent': 0,
+        'position': 0,
+    }
+    # 按原样保存的字段及其默认值
+    RAW_FIELDS = {
+        'user_id': '',
+        'nickname': '',
+        'equipment_weapon': '',
+        'equipment_armor': '',
+        'challenge_proposal': '',
+        'last_fishing': '',
+        'equipped_weapon': '',
+        'equipped_armor': '',
+        'equipped_fishing_rod': '',
+    }
+    # 以 JSON 字符串形式存储在数据库中的字段
+    JSON_FIELDS = ('inventory', 'multiple', 'equipment_fishing_rod')
+
+    __slots__ = (
+        tuple(f"_{field}" for field in INT_FIELDS)
+        + tuple(f"_{field}" for field in RAW_FIELDS)
+        # JSON 字段的原始值与解析结果
+        + tuple(f"_{field}" for field in JSON_FIELDS)
+        + ('_parsed', '_dirty', '_present')
+    )
+
     def __init__(self, data: Dict[str, Any]):
         if not isinstance(data, dict):
             raise TypeError("data must be a dictionary")
-        self.data = data
+        # 行数据中实际存在的字段(用于 to_dict)
+        self._present = tuple(
+            field for field in data
+            if field in self.INT_FIELDS or field in self.RAW_FIELDS or field in self.JSON_FIELDS
+        )
+        for field, default in self.INT_FIELDS.items():
+            setattr(self, f"_{field}", self._to_int(field, data.get(field, default), default))
+        for field, default in self.RAW_FIELDS.items():
+            setattr(self, f"_{field}", data.get(field, default))
+        for field in self.JSON_FIELDS:
+            setattr(self, f"_{field}", data.get(field, {}))
+        # 背包保存在 inventory_items 表中，首次访问时再加载
+        self._inventory = None
+        # 已解析的 JSON 字段: 字段名 -> (原始值, 解析结果)
+        self._parsed = {}
+        # 自上次保存以来被修改过的字段
+        self._dirty = set()
+
+    @staticmethod
+    def _to_int(field: str, value: Any, default: int) -> int:
+        """将数据库中的值转换为 int，无法转换时返回默认值"""
+        if type(value) is int:
+            return value
+        try:
+            return int(float(value))
+        except (ValueError, TypeError) as e:
+            logging.error(f"解析 {field} 时出错: {e}，返回默认值 {default}")
+            return default
+
+    def _set_int(self, field: str, value: Any) -> None:
+        """设置整数字段并标记为已修改"""
+        try:
+            setattr(self, f"_{field}", int(value))
+            self._dirty.add(field)
+        except (ValueError, TypeError) as e:
+            logging.error(f"设置 {field} 时出错: {e}，不更新该值")
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """玩家数据的字典形式(兼容旧接口)"""
+        return self.to_dict()
 
     @classmethod
     def set_game_handle(self, game):
@@ -28,199 +111,137 @@ class Player:
 
     @property
     def user_id(self) -> str:
-        try:
-            return str(self.data.get('user_id', ''))
-        except Exception as e:
-            logging.error(f"获取 user_id 时出错: {e}")
-            return ''
+        return str(self._user_id)
 
     @property
     def nickname(self) -> str:
-        try:
-            return self.data.get('nickname', '')
-        except Exception as e:
-            logging.error(f"获取 nickname 时出错: {e}")
-            return ''
+        return self._nickname
 
     @property
     def gold(self) -> int:
-        try:
-            return int(self.data.get('gold', 0))
-        except (ValueError, TypeError) as e:
-            logging.error(f"解析 gold 时出错: {e}，返回默认值 0")
-            return 0
+        return self._gold
 
     @gold.setter
     def gold(self, value: int):
-        try:
-            self.data['gold'] = str(int(value))
-        except (ValueError, TypeError) as e:
-            logging.error(f"设置 gold 时出错: {e}，不更新该值")
+        self._set_int('gold', value)
 
     @property
     def level(self) -> int:
-        try:
-            return int(self.data.get('level', 1))
-        except (ValueError, TypeError) as e:
-            logging.error(f"解析 level 时出错: {e}，返回默认值 1")
-            return 1
+        return self._level
 
     @level.setter
     def level(self, value: int):
-        try:
-            self.data['level'] = str(int(value))
-        except (ValueError, TypeError) as e:
-            logging.error(f"设置 level 时出错: {e}，不更新该值")
+        self._set_int('level', value)
 
     @property
     def sign_in_timestamp(self) -> int:
-        try:
-            return int(self.data.get('sign_in_timestamp', 1))
-        except (ValueError, TypeError) as e:
-            logging.error(f"解析 sign_in_timestamp 时出错: {e}，返回默认值 1")
-            return 1
+        return self._sign_in_timestamp
 
     @sign_in_timestamp.setter
     def sign_in_timestamp(self, value: int):
-        try:
-            self.data['sign_in_timestamp'] = str(int(value))
-        except (ValueError, TypeError) as e:
-            logging.error(f"设置 sign_in_timestamp 时出错: {e}，不更新该值")
+        self._set_int('sign_in_timestamp', value)
 
     @property
     def hp(self) -> int:
-        try:
-            return int(self.data.get('hp', 100))
-        except (ValueError, TypeError) as e:
-            logging.error(f"解析 hp 时出错: {e}，返回默认值 100")
-            return 100
+        return self._hp
 
     @hp.setter
     def hp(self, value: int):
-        try:
-            self.data['hp'] = str(int(value))
-            if int(self.data['hp']) < 0:
-                self.data['hp'] = str(0)
-        except (ValueError, TypeError) as e:
-            logging.error(f"设置 hp 时出错: {e}，不更新该值")
+        self._set_int('hp', value)
+        if self._hp < 0:
+            self._hp = 0
 
     @property
     def max_hp(self) -> int:
-        try:
-            return int(self.data.get('max_hp', 100))
-        except (ValueError, TypeError) as e:
-            logging.error(f"解析 max_hp 时出错: {e}，返回默认值 100")
-            return 100
+        return self._max_hp
 
     @max_hp.setter
     def max_hp(self, value: int):
-        try:
-            self.data['max_hp'] = str(int(value))
-        except (ValueError, TypeError) as e:
-            logging.error(f"设置 max_hp 时出错: {e}，不更新该值")
+        self._set_int('max_hp', value)
 
     @property
     def attack(self) -> int:
-        try:
-            return int(self.data.get('attack', 10))
-        except (ValueError, TypeError) as e:
-            logging.error(f"解析 attack 时出错: {e}，返回默认值 10")
-            return 10
+        return self._attack
 
     @attack.setter
     def attack(self, value: int):
-        try:
-            self.data['attack'] = str(int(value))
-        except (ValueError, TypeError) as e:
-            logging.error(f"设置 attack 时出错: {e}，不更新该值")
+        self._set_int('attack', value)
 
     @property
     def defense(self) -> int:
-        try:
-            return int(self.data.get('defense', 5))
-        except (ValueError, TypeError) as e:
-            logging.error(f"解析 defense 时出错: {e}，返回默认值 5")
-            return 5
+        return self._defense
 
     @defense.setter
     def defense(self, value: int):
-        try:
-            self.data['defense'] = str(int(value))
-        except (ValueError, TypeError) as e:
-            logging.error(f"设置 defense 时出错: {e}，不更新该值")
+        self._set_int('defense', value)
 
     @property
     def exp(self) -> int:
         """获取经验值，确保返回整数"""
-        try:
-            return int(float(self.data.get('exp', '0')))
-        except (ValueError, TypeError) as e:
-            logging.error(f"解析 exp 时出错: {e}，返回默认值 0")
-            return 0
+        return self._exp
 
     @exp.setter
     def exp(self, value: int):
-        """设置经验值，确保存储为整数字符串"""
+        """设置经验值，确保存储为整数"""
         try:
-            self.data['exp'] = str(int(value))
+            self._exp = int(value)
         except (ValueError, TypeError) as e:
             logging.error(f"设置 exp 时出错: {e}，设置为 0")
-            self.data['exp'] = '0'
+            self._exp = 0
+        self._dirty.add('exp')
 
     @property
     def max_exp(self) -> int:
         """获取经验值，确保返回整数"""
-        try:
-            return int(float(self.data.get('max_exp', '0')))
-        except (ValueError, TypeError) as e:
-            logging.error(f"解析 max_exp 时出错: {e}，返回默认值 0")
-            return 0
+        return self._max_exp
 
     @max_exp.setter
     def max_exp(self, value: int):
-        """设置经验值，确保存储为整数字符串"""
+        """设置经验值，确保存储为整数"""
         try:
-            self.data['max_exp'] = str(int(value))
+            self._max_exp = int(value)
         except (ValueError, TypeError) as e:
             logging.error(f"设置 max_exp 时出错: {e}，设置为 0")
-            self.data['max_exp'] = '0'
+            self._max_exp = 0
+        self._dirty.add('max_exp')
 
-    @property
-    def inventory(self) -> dict:
+    def _get_json_field(self, field: str) -> dict:
         """
-        获取库存信息，以字典形式返回。
-        字典的键为物品的名称，值为物品的详细信息。
+        获取以 JSON 字符串存储的字段，解析结果会被缓存，原始值不变时不再重复解析。
         """
-        inventory_data = self.data.get('inventory', {})  # 默认值是空字典
+        raw = getattr(self, f"_{field}")
+
+        # 原始值未变化，直接返回上次的解析结果
+        parsed = self._parsed.get(field)
+        if parsed is not None and parsed[0] is raw:
+            return parsed[1]
 
-        # 如果从 data 中获取的 inventory 数据是字符串，尝试解析它
-        if isinstance(inventory_data, str):
+        # 如果数据是字符串，尝试解析它
+        if isinstance(raw, str):
             try:
-                inventory = json.loads(inventory_data)
-                if isinstance(inventory, dict):
-                    return inventory
-                else:
-                    logging.error(f"Inventory 不是字典类型: {inventory_data}")
-                    return {}
+                value = json.loads(raw)
+                if not isinstance(value, dict):
+                    logging.error(f"{field} 不是字典类型: {raw}")
+                    value = {}
             except json.JSONDecodeError as e:
-                logging.error(f"JSON解析错误: {e}，Inventory内容: {inventory_data}")
-                return {}
-
-        # 如果 inventory_data 已经是字典，直接返回
-        elif isinstance(inventory_data, dict):
-            return inventory_data
+                logging.error(f"JSON解析错误: {e}，{field}内容: {raw}")
+                value = {}
+        # 如果数据已经是字典，直接返回
+        elif isinstance(raw, dict):
+            value = raw
         else:
-            logging.error(f"获取的 inventory 不是字符串或字典类型: {type(inventory_data)}")
-            return {}
+            logging.error(f"获取的 {field} 不是字符串或字典类型: {type(raw)}")
+            value = {}
 
-    @inventory.setter
-    def inventory(self, value: dict):
+        self._parsed[field] = (raw, value)
+        return value
+
+    def _set_json_field(self, field: str, value: dict) -> None:
         """
-        设置库存信息，接受一个字典类型的参数。
-        字典的键应为物品的名称，值为物品的详细信息。
+        设置以 JSON 字符串存储的字段，只保存解析后的字典并标记为已修改，保存时再统一序列化。
         """
         if not isinstance(value, dict):
-            logging.error(f"设置 inventory 时出错: 期望字典类型，但收到 {type(value)}")
+            logging.error(f"设置 {field} 时出错: 期望字典类型，但收到 {type(value)}")
             return  # 不更新该值
 
         # 验证每个物品的结构
@@ -229,282 +250,179 @@ class Player:
                 logging.error(f"物品 '{name}' 的值不是字典类型: {item}，不更新该值！")
                 return  # 不更新该值
 
-        # 尝试序列化为 JSON 字符串并更新
-        try:
-            self.data['inventory'] = json.dumps(value, ensure_ascii=False)
-        except (TypeError, ValueError) as e:
-            logging.error(f"设置 inventory 时出错: {e}，不更新该值")
+        setattr(self, f"_{field}", value)
+        self._parsed[field] = (value, value)
+        self._dirty.add(field)
 
     @property
-    def multiple(self) -> dict:
+    def inventory(self) -> dict:
         """
         获取库存信息，以字典形式返回。
         字典的键为物品的名称，值为物品的详细信息。
         """
-        multiple_data = self.data.get('multiple', {})  # 默认值是空字典
+        if self._inventory is None:
+            self._inventory = self.game.inventory_store.get_items(self.user_id) if self.game else {}
+        return self._get_json_field('inventory')
 
-        # 如果从 data 中获取的 multiple 数据是字符串，尝试解析它
-        if isinstance(multiple_data, str):
-            try:
-                multiple = json.loads(multiple_data)
-                if isinstance(multiple, dict):
-                    return multiple
-                else:
-                    logging.error(f"multiple 不是字典类型: {multiple_data}")
-                    return {}
-            except json.JSONDecodeError as e:
-                logging.error(f"JSON解析错误: {e}，multiple内容: {multiple_data}")
-                return {}
+    @inventory.setter
+    def inventory(self, value: dict):
+        """
+        设置库存信息，接受一个字典类型的参数。
+        字典的键应为物品的名称，值为物品的详细信息。
+        """
+        self._set_json_field('inventory', value)
 
-        # 如果 inventory_data 已经是字典，直接返回
-        elif isinstance(multiple_data, dict):
-            return multiple_data
-        else:
-            logging.error(f"获取的 multiple 不是字符串或字典类型: {type(multiple_data)}")
-            return {}
+    @property
+    def multiple(self) -> dict:
+        """
+        获取加成信息，以字典形式返回。
+        字典的键为加成的类型，值为加成的说明。
+        """
+        return self._get_json_field('multiple')
 
     @multiple.setter
     def multiple(self, value: dict):
         """
-        设置库存信息，接受一个字典类型的参数。
+        设置加成信息，接受一个字典类型的参数。
         字典的键应为加成的类型，值为加成的说明。
         """
-        if not isinstance(value, dict):
-            logging.error(f"设置 multiple 时出错: 期望字典类型，但收到 {type(value)}")
-            return  # 不更新该值
-
-        # 验证每个物品的结构
-        for name, item in value.items():
-            if not isinstance(item, dict):
-                logging.error(f"物品 '{name}' 的值不是字典类型: {item}，不更新该值！")
-                return  # 不更新该值
-
-        # 尝试序列化为 JSON 字符串并更新
-        try:
-            self.data['multiple'] = json.dumps(value, ensure_ascii=False)
-        except (TypeError, ValueError) as e:
-            logging.error(f"设置 multiple 时出错: {e}，不更新该值")
+        self._set_json_field('multiple', value)
 
     @property
     def equipped_weapon(self) -> str:
-        try:
-            return self.data.get('equipped_weapon', '')
-        except Exception as e:
-            logging.error(f"获取 equipped_weapon 时出错: {e}")
-            return ''
+        return self._equipped_weapon
 
     @equipped_weapon.setter
     def equipped_weapon(self, value: str):
-        try:
-            self.data['equipped_weapon'] = value
-        except Exception as e:
-            logging.error(f"设置 equipped_weapon 时出错: {e}，不更新该值")
+        self._equipped_weapon = value
 
     @property
     def equipped_armor(self) -> str:
-        try:
-            return self.data.get('equipped_armor', '')
-        except Exception as e:
-            logging.error(f"获取 equipped_armor 时出错: {e}")
-            return ''
+        return self._equipped_armor
 
     @equipped_armor.setter
     def equipped_armor(self, value: str):
-        try:
-            self.data['equipped_armor'] = value
-        except Exception as e:
-            logging.error(f"设置 equipped_armor 时出错: {e}，不更新该值")
+        self._equipped_armor = value
 
     @property
     def challenge_proposal(self) -> str:
-        try:
-            return self.data.get('challenge_proposal', '')
-        except Exception as e:
-            logging.error(f"获取 challenge_proposal 时出错: {e}")
-            return ''
+        return self._challenge_proposal
 
     @challenge_proposal.setter
     def challenge_proposal(self, value: str):
-        try:
-            self.data['challenge_proposal'] = value
-        except Exception as e:
-            logging.error(f"设置 challenge_proposal 时出错: {e}，不更新该值")
+        self._challenge_proposal = value
+        self._dirty.add('challenge_proposal')
 
     @property
     def is_pay_rent(self) -> int:
-        try:
-            return int(self.data.get('is_pay_rent', 0))
-        except (ValueError, TypeError) as e:
-            logging.error(f"解析 is_pay_rent 时出错: {e}，返回默认值 0")
-            return 0
+        return self._is_pay_rent
 
     @is_pay_rent.setter
     def is_pay_rent(self, value: int):
-        try:
-            self.data['is_pay_rent'] = str(int(value))
-        except (ValueError, TypeError) as e:
-            logging.error(f"设置 is_pay_rent 时出错: {e}，不更新该值")
+        self._set_int('is_pay_rent', value)
 
     @property
     def last_attack(self) -> int:
-        try:
-            return int(self.data.get('last_attack', 0))
-        except (ValueError, TypeError) as e:
-            logging.error(f"解析 last_attack 时出错: {e}，返回默认值 0")
-            return 0
+        return self._last_attack
 
     @last_attack.setter
     def last_attack(self, value: int):
-        try:
-            self.data['last_attack'] = str(int(value))
-        except (ValueError, TypeError) as e:
-            logging.error(f"设置 last_attack 时出错: {e}，不更新该值")
+        self._set_int('last_attack', value)
 
     @property
     def adventure_last_attack(self) -> int:
-        try:
-            return int(self.data.get('adventure_last_attack', 0))
-        except (ValueError, TypeError) as e:
-            logging.error(f"解析 adventure_last_attack 时出错: {e}，返回默认值 0")
-            return 0
+        return self._adventure_last_attack
 
     @adventure_last_attack.setter
     def adventure_last_attack(self, value: int):
-        try:
-            self.data['adventure_last_attack'] = str(int(value))
-        except (ValueError, TypeError) as e:
-            logging.error(f"设置 adventure_last_attack 时出错: {e}，不更新该值")
+        self._set_int('adventure_last_attack', value)
 
     @property
     def equipment_fishing_rod(self) -> dict:
         """
-        获取库存信息，以字典形式返回。
-        字典的键为物品的名称，值为物品的详细信息。
+        获取装备的鱼竿信息，以字典形式返回。
         """
-        equipment_fishing_rod_data = self.data.get('equipment_fishing_rod', {})  # 默认值是空字典
-
-        # 如果从 data 中获取的 equipment_fishing_rod 数据是字符串，尝试解析它
-        if isinstance(equipment_fishing_rod_data, str):
-            try:
-                equipment_fishing_rod = json.loads(equipment_fishing_rod_data)
-                if isinstance(equipment_fishing_rod, dict):
-                    return equipment_fishing_rod
-                else:
-                    logging.error(f"equipment_fishing_rod 不是字典类型: {equipment_fishing_rod_data}")
-                    return {}
-            except json.JSONDecodeError as e:
-                logging.error(f"JSON解析错误: {e}，equipment_fishing_rod内容: {equipment_fishing_rod_data}")
-                return {}
-
-        # 如果 equipment_fishing_rod_data 已经是字典，直接返回
-        elif isinstance(equipment_fishing_rod_data, dict):
-            return equipment_fishing_rod_data
-        else:
-            logging.error(f"获取的 equipment_fishing_rod 不是字符串或字典类型: {type(equipment_fishing_rod_data)}")
-            return {}
+        return self._get_json_field('equipment_fishing_rod')
 
     @equipment_fishing_rod.setter
     def equipment_fishing_rod(self, value: dict):
         """
-        设置库存信息，接受一个字典类型的参数。
-        字典的键应为物品的名称，值为物品的详细信息。
+        设置装备的鱼竿信息，接受一个字典类型的参数。
         """
-        if not isinstance(value, dict):
-            logging.error(f"设置 equipment_fishing_rod 时出错: 期望字典类型，但收到 {type(value)}")
-            return  # 不更新该值
-
-        # 验证每个物品的结构
-        for name, item in value.items():
-            if not isinstance(item, dict):
-                logging.error(f"物品 '{name}' 的值不是字典类型: {item}，不更新该值！")
-                return  # 不更新该值
-
-        # 尝试序列化为 JSON 字符串并更新
-        try:
-            self.data['equipment_fishing_rod'] = json.dumps(value, ensure_ascii=False)
-        except (TypeError, ValueError) as e:
-            logging.error(f"设置 equipment_fishing_rod 时出错: {e}，不更新该值")
+        self._set_json_field('equipment_fishing_rod', value)
 
     @property
     def equipment_armor(self) -> str:
-        try:
-            return self.data.get('equipment_armor', '')
-        except (ValueError, TypeError) as e:
-            logging.error(f"解析 equipment_armor 时出错: {e}，返回默认值 0")
-            return 0
+        return self._equipment_armor
 
     @equipment_armor.setter
     def equipment_armor(self, value: str):
-        try:
-            self.data['equipment_armor'] = value
-        except (ValueError, TypeError) as e:
-            logging.error(f"设置 equipment_armor 时出错: {e}，不更新该值")
+        self._equipment_armor = value
+        self._dirty.add('equipment_armor')
 
     @property
     def equipment_weapon(self) -> str:
-        try:
-            return self.data.get('equipment_weapon', '')
-        except (ValueError, TypeError) as e:
-            logging.error(f"解析 equipment_weapon 时出错: {e}，返回默认值 0")
-            return 0
+        return self._equipment_weapon
 
     @equipment_weapon.setter
     def equipment_weapon(self, value: str):
-        try:
-            self.data['equipment_weapon'] = value
-        except (ValueError, TypeError) as e:
-            logging.error(f"设置 equipment_weapon 时出错: {e}，不更新该值")
+        self._equipment_weapon = value
+        self._dirty.add('equipment_weapon')
 
     @property
     def last_fishing(self) -> str:
-        try:
-            return self.data.get('last_fishing', '')
-        except Exception as e:
-            logging.error(f"获取 last_fishing 时出错: {e}")
-            return ''
+        return self._last_fishing
 
     @last_fishing.setter
     def last_fishing(self, value: str):
-        try:
-            self.data['last_fishing'] = value
-        except Exception as e:
-            logging.error(f"设置 last_fishing 时出错: {e}，不更新该值")
+        self._last_fishing = value
+        self._dirty.add('last_fishing')
 
     @property
     def equipped_fishing_rod(self) -> str:
-        try:
-            return self.data.get('equipped_fishing_rod', '')
-        except Exception as e:
-            logging.error(f"获取 equipped_fishing_rod 时出错: {e}")
-            return ''
+        return self._equipped_fishing_rod
 
     @equipped_fishing_rod.setter
     def equipped_fishing_rod(self, value: str):
-        try:
-            self.data['equipped_fishing_rod'] = value
-        except Exception as e:
-            logging.error(f"设置 equipped_fishing_rod 时出错: {e}，不更新该值")
+        self._equipped_fishing_rod = value
 
     @property
     def position(self) -> int:
         """获取玩家位置"""
-        try:
-            return int(self.data.get('position', 0))
-        except (ValueError, TypeError) as e:
-            logging.error(f"解析 position 时出错: {e}，返回默认值 0")
-            return 0
+        return self._position
 
     @position.setter
     def position(self, value: int):
         """设置玩家位置"""
-        try:
-            self.data['position'] = int(value)
-        except (ValueError, TypeError) as e:
-            logging.error(f"设置 position 时出错: {e}，不更新该值")
+        self._set_int('position', value)
+
+    def _serialize(self, field: str) -> Any:
+        """获取字段写入数据库时的值，JSON 字段在此时序列化"""
+        value = getattr(self, f"_{field}")
+        if field in self.JSON_FIELDS and isinstance(value, dict):
+            value = json.dumps(value, ensure_ascii=False)
+        return value
 
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
-        return self.data
+        return {field: self._serialize(field) for field in self._present}
+
+    def is_dirty(self) -> bool:
+        """是否存在未保存的修改"""
+        return bool(self._dirty)
+
+    def get_changes(self) -> Dict[str, Any]:
+        """
+        获取自上次保存以来被修改过的字段，JSON 字段在此时序列化。
+
+        Returns:
+            Dict[str, Any]: 字段名 -> 写入数据库的值
+        """
+        return {field: self._serialize(field) for field in self._dirty}
+
+    def mark_saved(self) -> None:
+        """保存完成后清除修改标记"""
+        self._dirty.clear()
 
     @classmethod
     def create_new(cls, user_id: str, nickname: str) -> 'Player':
@@ -560,8 +478,7 @@ class Player:
             "📦 其他物品:": [],
         }
 
-        for item_name in self.inventory:
-            item = self.inventory.get(item_name, {})
+        for item_name, item in self.inventory.items():
             item_type = item.get("type", "")
             item_amount = item.get("amount", 0)
             item_rarity = item.get("rarity", 0)
@@ -674,49 +591,50 @@ class Player:
             logger.error(f"获取玩家信息出错: {e}")
             return None
 
+    @staticmethod
+    def calculate_exp_for_next_level(level: int) -> int:
+        """
+        按经验曲线计算当前等级升级到下一等级所需的经验值(不查表)
+        :param level: 当前等级 (int)
+        :return: 当前等级升级到下一级所需的经验值 (int)
+        """
+        factors = constants.PLAYER_EXP_GROWTH_FACTORS
+        # 前10级使用较低的增长因子，实现快速升级，之后每10级增长因子递增
+        growth_factor = factors[min((level - 1) // 10, len(factors) - 1)]
+        return int(constants.PLAYER_BASE_EXP * (level ** growth_factor))
+
     def get_exp_for_next_level(self, level):
         """
         计算当前等级升级到下一等级所需的经验值
         :param level: 当前等级 (int)
-        :param growth_factor: 经验增长因子 (默认1.5，非线性增长)
         :return: 当前等级升级到下一级所需的经验值 (int)
         """
         if level < 1:
             raise ValueError("等级必须大于等于 1")
-        base_exp = constants.PLAYER_BASE_EXP
-
-        if level <= 10:
-            # 前10级使用较低的增长因子，实现快速升级
-            required_exp = int(base_exp * (level ** 1.1))
-        elif level > 10 and level <= 20:
-            # 增长因子递增
-            required_exp = int(base_exp * (level ** 1.2))
-        elif level > 20 and level <= 30:
-            # 增长因子递增
-            required_exp = int(base_exp * (level ** 1.3))
-        elif level > 30 and level <= 40:
-            # 增长因子递增
-            required_exp = int(base_exp * (level ** 1.4))
-        elif level > 40 and level <= 50:
-            # 增长因子递增
-            required_exp = int(base_exp * (level ** 1.5))
-        elif level > 50 and level <= 60:
-            # 增长因子递增
-            required_exp = int(base_exp * (level ** 1.6))
-        elif level > 60 and level <= 70:
-            # 增长因子递增
-            required_exp = int(base_exp * (level ** 1.7))
-        elif level > 70 and level <= 80:
-            # 增长因子递增
-            required_exp = int(base_exp * (level ** 1.8))
-        elif level > 80 and level <= 90:
-            # 增长因子递增
-            required_exp = int(base_exp * (level ** 1.9))
-        else:
-            # 90-100
-            required_exp = int(base_exp * (level ** 2))
+        if level < len(self.EXP_TABLE):
+            return self.EXP_TABLE[level]
+        return self.calculate_exp_for_next_level(level)
+
+    @classmethod
+    def resolve_level(cls, level: int, exp) -> tuple:
+        """
+        根据当前等级和经验(可以超过升级所需经验)计算升级后的等级和剩余经验，
+        在累计经验表上二分查找，一次获得大量经验时也不需要逐级计算。
 
-        return required_exp
+        :param level: 当前等级
+        :param exp: 当前等级下的经验(已加上本次获得的经验)
+        :return: (等级, 剩余经验)，达到等级上限时经验不超过上限等级的升级经验
+        """
+        max_level = constants.PLAYER_MAX_LEVEL
+        if level >= max_level:
+            return level, min(exp, cls.calculate_exp_for_next_level(level))
+        # 从 1 级开始累计的总经验
+        total_exp = cls.EXP_PREFIX[level] + exp
+        new_level = max(level, bisect.bisect_right(cls.EXP_PREFIX, total_exp, level, max_level + 1) - 1)
+        remain_exp = total_exp - cls.EXP_PREFIX[new_level] if new_level > level else exp
+        if new_level >= max_level:
+            remain_exp = min(remain_exp, cls.EXP_TABLE[max_level])
+        return new_level, remain_exp
 
     def get_player_status(self, detail) -> str:
         """获取家状态
@@ -849,7 +767,7 @@ class Player:
             gold_multiple_str = get_multiple('gold', multiple)[1]
 
         # 理论血量上限
-        theory_max_hp = int(((player_level * constants.PLAYER_LEVEL_UP_APPEND_HP + constants.PLAYER_BASE_MAX_HP) + max_hp_bonus) * max_hp_multiple)
+        theory_max_hp = int((formulas.player_base_attributes(player_level)[2] + max_hp_bonus) * max_hp_multiple)
         # 检查玩家血量上限是否符合预期
         if player_max_hp != theory_max_hp:
             # 血量上限异常，需要修正
@@ -860,7 +778,7 @@ class Player:
             needs_update = True
 
         # 理论攻击力
-        theory_attack = int(((player_level * constants.PLAYER_LEVEL_UP_APPEND_ATTACK + constants.PLAYER_BASE_ATTACK) + attack_bonus) * attack_multiple)
+        theory_attack = int((formulas.player_base_attributes(player_level)[0] + attack_bonus) * attack_multiple)
         # 检查玩家攻击力是否符合预期
         if player_attack != theory_attack:
             # 攻击力异常，需要修正
@@ -868,7 +786,7 @@ class Player:
             needs_update = True
 
         # 理论防御力
-        theory_defense = int(((player_level * constants.PLAYER_LEVEL_UP_APPEND_DEFENSE + constants.PLAYER_BASE_DEFENSE) + defense_bonus) * defense_multiple)
+        theory_defense = int((formulas.player_base_attributes(player_level)[1] + defense_bonus) * defense_multiple)
         # 检查玩家防御力是否符合预期
         if player_defense != theory_defense:
             # 防御力异常，需要修正
@@ -945,3 +863,12 @@ class Player:
                 status.append(f"🥊 挑战者: 无效的挑战者ID[{self.challenge_proposal}]")
 
         return "\n".join(status)
+
+
+# 经验曲线表(只在加载时计算一次)：
+#   EXP_TABLE[等级] 为该等级升级到下一级所需的经验
+#   EXP_PREFIX[等级] 为从 1 级升到该等级累计所需的经验
+Player.EXP_TABLE = (0,) + tuple(
+    Player.calculate_exp_for_next_level(level) for level in range(1, constants.PLAYER_MAX_LEVEL + 1)
+)
+Player.EXP_PREFIX = (0,) + tuple(accumulate(Player.EXP_TABLE[:-1]))
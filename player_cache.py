@@ -0,0 +1,207 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+class PlayerCache:
+    """
+    玩家数据的写穿(write-through)LRU缓存：
+        1) 以 user_id 为键缓存 players 表的原始行数据，并维护 nickname -> user_id 的二级索引
+        2) 写入数据库成功后同步更新缓存，缓存中的值与数据库保持一致
+        3) 超过容量时淘汰最久未使用的玩家，超过 TTL 的条目视为过期并重新从数据库加载
+    """
+
+    # players 表中声明为 INTEGER 的字段，写入缓存时需要模拟 SQLite 的类型亲和性
+    INTEGER_FIELDS = {
+        'gold', 'level', 'sign_in_timestamp', 'hp', 'max_hp', 'attack', 'defense', 'exp', 'max_exp',
+        'last_fishing', 'last_attack', 'adventure_last_attack', 'is_pay_rent', 'position'
+    }
+
+    def __init__(self, max_size: int = 1000, ttl: int = 300):
+        """
+        :param max_size: 最多缓存的玩家数量，小于等于 0 时禁用缓存
+        :param ttl: 缓存条目的有效期(秒)，小于等于 0 时永不过期
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        # user_id -> (行数据, 加载时间)
+        self._entries = OrderedDict()
+        # nickname -> user_id
+        self._nicknames = {}
+        # 写入序号，用于丢弃读取期间已被改写的旧数据
+        self._seq = 0
+        self._floor = 0
+        self._last_write = {}
+        self._lock = threading.Lock()
+        # 统计
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def apply_affinity(cls, field, value):
+        """按照 SQLite 的类型亲和性转换写入的值，使缓存与数据库读出的结果一致"""
+        if value is None:
+            return None
+        if field in cls.INTEGER_FIELDS:
+            if isinstance(value, str):
+                try:
+                    return int(value)
+                except ValueError:
+                    try:
+                        value = float(value)
+                    except ValueError:
+                        return value
+            if isinstance(value, float) and value.is_integer():
+                return int(value)
+            return value
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        return value
+
+    def read_token(self) -> int:
+        """在查询数据库之前获取读取序号，配合 put 使用"""
+        with self._lock:
+            return self._seq
+
+    def get(self, user_id: str) -> Optional[dict]:
+        """
+        根据 user_id 获取缓存的行数据(浅拷贝)。
+
+        :return: 行数据，未命中或已过期时返回 None
+        """
+        if self.max_size <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            row, loaded_at = entry
+            if self.ttl > 0 and time.time() - loaded_at > self.ttl:
+                self._remove(user_id)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return dict(row)
+
+    def get_by_nickname(self, nickname: str) -> Optional[dict]:
+        """根据昵称获取缓存的行数据"""
+        with self._lock:
+            user_id = self._nicknames.get(nickname)
+        if user_id is None:
+            if self.max_size > 0:
+                with self._lock:
+                    self.misses += 1
+            return None
+        return self.get(user_id)
+
+    def put(self, user_id: str, row: dict, token: int) -> None:
+        """
+        写入从数据库读取的行数据。
+
+        :param user_id: 玩家ID
+        :param row: 数据库中的原始行数据
+        :param token: 查询前通过 read_token 获取的序号，期间该玩家被改写过则放弃写入
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if token < self._floor or self._last_write.get(user_id, -1) > token:
+                return
+            self._remove(user_id)
+            self._entries[user_id] = (dict(row), time.time())
+            nickname = row.get('nickname')
+            if nickname is not None:
+                self._nicknames[nickname] = user_id
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def update(self, user_id: str, fields: dict) -> None:
+        """
+        数据库写入成功后同步更新缓存。
+
+        :param user_id: 玩家ID
+        :param fields: 已写入数据库的字段(与写入数据库的值相同)
+        """
+        with self._lock:
+            self._mark_written(user_id)
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            row = entry[0]
+            for field, value in fields.items():
+                if field == 'user_id':
+                    continue
+                if field == 'nickname' and row.get('nickname') != value:
+                    self._nicknames.pop(row.get('nickname'), None)
+                    if value is not None:
+                        self._nicknames[value] = user_id
+                row[field] = self.apply_affinity(field, value)
+
+    def invalidate(self, user_id: str) -> None:
+        """移除指定玩家的缓存(例如注销时)"""
+        with self._lock:
+            self._mark_written(user_id)
+            self._remove(user_id)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._seq += 1
+            self._floor = self._seq
+            self._last_write.clear()
+            self._entries.clear()
+            self._nicknames.clear()
+
+    def _mark_written(self, user_id: str) -> None:
+        self._seq += 1
+        self._last_write[user_id] = self._seq
+        # 防止写入记录无限增长：清空后抬高下限，之前发起的读取全部作废
+        if len(self._last_write) > max(self.max_size, 1) * 4:
+            self._last_write.clear()
+            self._floor = self._seq
+
+    def _remove(self, user_id: str) -> None:
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            nickname = entry[0].get('nickname')
+            if self._nicknames.get(nickname) == user_id:
+                self._nicknames.pop(nickname, None)
+
+    def get_stats(self) -> dict:
+        """获取缓存统计"""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def get_stats_report(self) -> str:
+        """格式化缓存统计"""
+        stats = self.get_stats()
+        total = stats['hits'] + stats['misses']
+        hit_rate = stats['hits'] / total if total else 0
+        report = [
+            "🗃️ 玩家缓存统计",
+            "──────────────",
+            f"📦 容量: {stats['size']}/{stats['max_size']}",
+            f"⏱️ 有效期: {stats['ttl']} 秒",
+            f"✅ 命中: {stats['hits']}",
+            f"❌ 未命中: {stats['misses']}",
+            f"📈 命中率: {hit_rate:.2%}",
+            f"♻️ 淘汰: {stats['evictions']}",
+            f"⌛ 过期: {stats['expirations']}",
+        ]
+        return "\n".join(report)
@@ -0,0 +1,99 @@
+import random
+import itertools
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+
+class RandomService:
+    """
+    随机数服务：
+        1) 每个线程使用独立的随机数生成器，只在首次使用时播种一次，避免每次取随机数前重新播种
+        2) 未指定种子时由系统熵源播种；指定种子时每个线程按创建顺序派生出固定的种子，便于测试与复现
+        3) 可以通过 scoped() 为单次请求临时指定生成器(例如按种子回放一局战斗)
+    """
+
+    def __init__(self, seed=None):
+        """
+        :param seed: 全局种子，None 表示使用系统熵源
+        """
+        self._seed = seed
+        # 种子变化后递增，各线程据此重新创建生成器
+        self._generation = 0
+        # 线程生成器的创建序号，用于派生确定性的种子
+        self._streams = itertools.count()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def seed(self, seed=None) -> None:
+        """
+        重新设置全局种子，所有线程的生成器会在下一次使用时重新创建。
+
+        :param seed: 全局种子，None 表示使用系统熵源
+        """
+        with self._lock:
+            self._seed = seed
+            self._generation += 1
+            self._streams = itertools.count()
+
+    def _create(self) -> random.Random:
+        with self._lock:
+            if self._seed is None:
+                return random.Random()
+            return random.Random(f"{self._seed}:{next(self._streams)}")
+
+    def get(self) -> random.Random:
+        """获取当前线程(请求)使用的随机数生成器"""
+        local = self._local
+        scoped = getattr(local, 'scoped', None)
+        if scoped:
+            return scoped[-1]
+        if getattr(local, 'generation', None) != self._generation:
+            local.rng = self._create()
+            local.generation = self._generation
+        return local.rng
+
+    @contextmanager
+    def scoped(self, seed=None, rng: Optional[random.Random] = None):
+        """
+        在当前线程内临时使用独立的生成器，退出后恢复。
+
+        :param seed: 生成器的种子，None 表示使用系统熵源
+        :param rng: 直接指定生成器(优先于 seed)
+        """
+        if rng is None:
+            rng = random.Random(seed)
+        scoped = getattr(self._local, 'scoped', None)
+        if scoped is None:
+            scoped = []
+            self._local.scoped = scoped
+        scoped.append(rng)
+        try:
+            yield rng
+        finally:
+            scoped.pop()
+
+
+# 默认的随机数服务
+_service = RandomService()
+
+
+def get_service() -> RandomService:
+    """获取当前使用的随机数服务"""
+    return _service
+
+
+def set_service(service: RandomService) -> None:
+    """替换随机数服务(例如在测试中注入固定种子的服务)"""
+    global _service
+    _service = service
+
+
+def get_rng() -> random.Random:
+    """获取当前线程(请求)使用的随机数生成器"""
+    return _service.get()
+
+
+def seed(value=None) -> None:
+    """重新设置默认随机数服务的种子"""
+    _service.seed(value)
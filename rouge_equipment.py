@@ -3,11 +3,15 @@ import json
 import time
 import uuid
 import sqlite3
-import random
 import secrets
+import threading
 from . import constants
+from . import formulas
 from common.log import logger
-from typing import Optional, Dict, Any
+from . import database
+from . import random_service
+from .equipment_cache import EquipmentCache
+from typing import Optional, Dict, Any, Mapping
 
 
 class RougeEquipment:
@@ -16,7 +20,7 @@ class RougeEquipment:
         可以根据等级随机生成不同品质的武器和防具
     """
 
-    def __init__(self, game):
+    def __init__(self, game, cache_size: int = constants.EQUIPMENT_CACHE_SIZE):
         # 检查data目录
         self.data_dir = os.path.join(os.path.dirname(__file__), "data")
         self.rouge_equipment_db_path = os.path.join(self.data_dir, "rouge_equipment.db")
@@ -64,6 +68,13 @@ class RougeEquipment:
             self.make_skill_armor_duration_heal,
         ]
 
+        # 装备缓存(已解码的只读装备记录)
+        self.cache = EquipmentCache(cache_size)
+
+        # 后台压缩线程
+        self._compact_thread = None
+        self._compact_stopped = threading.Event()
+
         # 连接到SQLite数据库
         try:
             self._connect()
@@ -72,15 +83,19 @@ class RougeEquipment:
             logger.error(f"数据库连接或初始化失败: {e}")
             raise
 
+    @property
+    def rng(self):
+        """当前线程(请求)使用的随机数生成器"""
+        return random_service.get_rng()
+
     def _connect(self) -> None:
         """
-        连接到 SQLite 数据库，启用 WAL 模式以提高并发性，并启用外键约束。
+        从连接池获取 SQLite 数据库连接(WAL 模式，每个线程独立读连接，写入串行化)。
         """
         try:
-            conn = sqlite3.connect(self.rouge_equipment_db_path, check_same_thread=False)
-            # 通过列名访问数据
-            conn.row_factory = sqlite3.Row
-            self.conn = conn
+            self.db = database.get_pool(self.rouge_equipment_db_path)
+            # 写连接
+            self.conn = self.db.writer
             logger.debug("成功连接到Rouge装备数据库。")
         except sqlite3.Error as e:
             logger.error(f"连接数据库失败: {e}")
@@ -102,12 +117,23 @@ class RougeEquipment:
             defense_bonus INTEGER,
             max_hp_bonus INTEGER,
             price INTEGER,
-            skills TEXT  -- 使用 TEXT 类型存储 JSON 数据
+            skills TEXT,  -- 使用 TEXT 类型存储 JSON 数据
+            created_at INTEGER  -- 写入时间，压缩时跳过刚写入、尚未被玩家数据引用的装备
         );
         """
         try:
-            with self.conn:
-                self.conn.execute(create_table_query)
+            with self.db.write_lock:
+                # 开启增量 VACUUM，压缩删除的页可以逐步归还给文件系统(已有数据库需要整体 VACUUM 一次才能切换)
+                if self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                    self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                    self.conn.execute("VACUUM")
+                    logger.info("装备数据库已切换为增量 VACUUM 模式")
+                with self.conn:
+                    self.conn.execute(create_table_query)
+                    # 旧版数据表没有 created_at 列
+                    columns = [row['name'] for row in self.conn.execute("PRAGMA table_info(equipment)")]
+                    if 'created_at' not in columns:
+                        self.conn.execute("ALTER TABLE equipment ADD COLUMN created_at INTEGER")
             logger.debug("成功初始化数据库表。")
         except sqlite3.Error as e:
             logger.error(f"初始化数据库表失败: {e}")
@@ -122,11 +148,11 @@ class RougeEquipment:
         """
         insert_query = """
         INSERT INTO equipment (
-            id, type, name, rarity, rarity_str, level, attack_bonus, defense_bonus, max_hp_bonus, price, skills
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+            id, type, name, rarity, rarity_str, level, attack_bonus, defense_bonus, max_hp_bonus, price, skills, created_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
         """
         try:
-            with self.conn:
+            with self.db.write_lock, self.conn:
                 self.conn.execute(insert_query, (
                     equipment_data['id'],
                     equipment_data['type'],
@@ -138,7 +164,8 @@ class RougeEquipment:
                     equipment_data.get('defense_bonus', 0),
                     equipment_data.get('max_hp_bonus', 0),
                     equipment_data.get('price', 0),
-                    json.dumps(equipment_data.get('skills', []), ensure_ascii=False)
+                    json.dumps(equipment_data.get('skills', []), ensure_ascii=False),
+                    int(time.time())
                 ))
             logger.debug(f"成功插入装备 ID: {equipment_data['id']}")
         except sqlite3.IntegrityError as e:
@@ -151,16 +178,24 @@ class RougeEquipment:
             logger.error(f"插入装备时数据格式错误: {e}")
             raise
 
-    def get_equipment_by_id(self, equipment_id: str) -> Optional[Dict[str, Any]]:
+    def get_equipment_by_id(self, equipment_id: str) -> Optional[Mapping[str, Any]]:
         """
-        根据装备 ID 查询装备信息。
+        根据装备 ID 查询装备信息，优先从缓存中读取。
 
         :param equipment_id: 装备的唯一标识符
-        :return: 包含装备信息的字典，或 None 如果未找到
+        :return: 只读的装备信息(skills 为元组)，或 None 如果未找到
         """
+        if not equipment_id:
+            # 未装备
+            return None
+        equipment = self.cache.get(equipment_id)
+        if equipment is not None:
+            return equipment
+
         select_query = "SELECT * FROM equipment WHERE id = ?;"
         try:
-            cursor = self.conn.cursor()
+            token = self.cache.read_token()
+            cursor = self.db.reader().cursor()
             cursor.execute(select_query, (equipment_id,))
             row = cursor.fetchone()
             cursor.close()
@@ -170,7 +205,7 @@ class RougeEquipment:
                 except json.JSONDecodeError:
                     logger.warning(f"装备 ID {equipment_id} 的技能数据 JSON 解析失败。返回空列表。")
                     skills = []
-                equipment = {
+                equipment = EquipmentCache.freeze({
                     'id': row['id'],
                     'type': row['type'],
                     'name': row['name'],
@@ -182,8 +217,8 @@ class RougeEquipment:
                     'max_hp_bonus': row['max_hp_bonus'],
                     'price': row['price'],
                     'skills': skills
-                }
-                logger.info(f"成功获取装备， ID: {equipment_id}")
+                })
+                self.cache.put(equipment_id, equipment, token)
                 return equipment
             else:
                 logger.debug(f"未找到装备， ID: {equipment_id}")
@@ -192,12 +227,80 @@ class RougeEquipment:
             logger.error(f"查询装备 ID {equipment_id} 时发生数据库错误: {e}")
             return None
 
+    def compact(self, player_db_path: str, grace: int = constants.EQUIPMENT_RETENTION_GRACE,
+                vacuum_pages: int = constants.EQUIPMENT_VACUUM_PAGES) -> int:
+        """
+        删除没有被任何玩家引用(背包物品的 uuid、已装备的武器和防具)的装备，并增量回收空闲页。
+
+        :param player_db_path: players.db 的路径
+        :param grace: 写入不足 grace 秒的装备不删除(所在的玩家事务可能还没有提交)
+        :param vacuum_pages: 本次最多归还给文件系统的空闲页数(0 表示不回收)
+        :return: 删除的装备数量
+        """
+        delete_query = """
+        DELETE FROM equipment
+        WHERE (created_at IS NULL OR created_at < ?)
+          AND id NOT IN (SELECT uuid FROM players_db.inventory_items WHERE uuid IS NOT NULL)
+          AND id NOT IN (SELECT equipment_weapon FROM players_db.players WHERE equipment_weapon IS NOT NULL)
+          AND id NOT IN (SELECT equipment_armor FROM players_db.players WHERE equipment_armor IS NOT NULL);
+        """
+        with self.db.write_lock:
+            # ATTACH/DETACH 不能在事务中执行
+            self.conn.execute("ATTACH DATABASE ? AS players_db", (player_db_path,))
+            try:
+                with self.conn:
+                    deleted = self.conn.execute(delete_query, (int(time.time()) - grace,)).rowcount
+            finally:
+                self.conn.execute("DETACH DATABASE players_db")
+            if deleted:
+                # 被删除的装备不知道具体 ID，整体清空缓存
+                self.cache.clear()
+            freed = 0
+            if vacuum_pages > 0:
+                free_pages = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if free_pages:
+                    # incremental_vacuum 每一步只回收一页，executescript 会把语句执行到结束
+                    self.conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)});")
+                    freed = free_pages - self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if deleted or freed:
+            logger.info(f"装备数据库压缩完成：删除 {deleted} 件无人引用的装备，回收 {freed} 个空闲页")
+        return deleted
+
+    def start_compaction(self, player_db_path: str, interval: int) -> None:
+        """
+        启动后台压缩线程，每隔 interval 秒执行一次 compact。
+
+        :param player_db_path: players.db 的路径
+        :param interval: 压缩间隔(秒)
+        """
+        if self._compact_thread is not None:
+            return
+
+        def run():
+            while not self._compact_stopped.wait(interval):
+                try:
+                    self.compact(player_db_path)
+                except sqlite3.Error as e:
+                    logger.error(f"压缩装备数据库失败，将在下次重试: {e}")
+
+        self._compact_stopped.clear()
+        self._compact_thread = threading.Thread(target=run, name="textGame-equipment-compact", daemon=True)
+        self._compact_thread.start()
+
+    def stop_compaction(self) -> None:
+        """停止后台压缩线程"""
+        self._compact_stopped.set()
+        if self._compact_thread is not None:
+            self._compact_thread.join()
+            self._compact_thread = None
+
     def close(self) -> None:
         """
         关闭数据库连接。
         """
         try:
-            self.conn.close()
+            self.stop_compaction()
+            self.db.close()
             logger.info("成功关闭数据库连接。")
         except sqlite3.Error as e:
             logger.error(f"关闭数据库连接时发生错误: {e}")
@@ -224,9 +327,9 @@ class RougeEquipment:
         - trigger_probability: 20% ~ 50%
         - duration: 0(不需要持续)
         """
-        skill_name = random.choice(constants.SKILL_NAMES["once_damage"])
-        damage = random.uniform(0.8, 2.5) + factor/2
-        prob = random.randint(20, 50) + int(factor * 5)
+        skill_name = self.rng.choice(constants.SKILL_NAMES["once_damage"])
+        damage = self.rng.uniform(0.8, 2.5) + factor/2
+        prob = self.rng.randint(20, 50) + int(factor * 5)
 
         return {
             "name": skill_name,
@@ -245,9 +348,9 @@ class RougeEquipment:
         - trigger_probability: 20% ~ 40%
         - duration: 0(不需要持续)
         """
-        skill_name = random.choice(constants.SKILL_NAMES["real_damage"])
-        damage = random.uniform(0.5, 2) + factor/2
-        prob = random.randint(20, 40) + int(factor * 5)
+        skill_name = self.rng.choice(constants.SKILL_NAMES["real_damage"])
+        damage = self.rng.uniform(0.5, 2) + factor/2
+        prob = self.rng.randint(20, 40) + int(factor * 5)
 
         return {
             "name": skill_name,
@@ -266,10 +369,10 @@ class RougeEquipment:
         - duration: 2 ~ 4 回合
         - trigger_probability: 20% ~ 50%
         """
-        skill_name = random.choice(constants.SKILL_NAMES["duration_damage"])
-        damage = random.randint(10, 30) + int(factor/2)
-        duration = random.randint(2, 4)
-        prob = random.randint(20, 50) + int(factor * 5)
+        skill_name = self.rng.choice(constants.SKILL_NAMES["duration_damage"])
+        damage = self.rng.randint(10, 30) + int(factor/2)
+        duration = self.rng.randint(2, 4)
+        prob = self.rng.randint(20, 50) + int(factor * 5)
 
         return {
             "name": skill_name,
@@ -288,10 +391,10 @@ class RougeEquipment:
         - duration: 1 ~ 3 回合
         - trigger_probability: 10% ~ 40%
         """
-        skill_name = random.choice(constants.SKILL_NAMES["shield"])
-        value = random.randint(10, 20) + int(factor * 5)
-        duration = random.randint(2, 4)
-        prob = random.randint(10, 40) + int(factor * 5)
+        skill_name = self.rng.choice(constants.SKILL_NAMES["shield"])
+        value = self.rng.randint(10, 20) + int(factor * 5)
+        duration = self.rng.randint(2, 4)
+        prob = self.rng.randint(10, 40) + int(factor * 5)
         return {
             "name": skill_name,
             "skill_type": "shield",
@@ -309,9 +412,9 @@ class RougeEquipment:
         - duration: 0(不需要持续)
         - trigger_probability: 20% ~ 40%
         """
-        skill_name = random.choice(constants.SKILL_NAMES["once_heal"])
-        heal_val = random.randint(10, 30) + int(factor * 5)
-        prob = random.randint(20, 40) + int(factor * 5)
+        skill_name = self.rng.choice(constants.SKILL_NAMES["once_heal"])
+        heal_val = self.rng.randint(10, 30) + int(factor * 5)
+        prob = self.rng.randint(20, 40) + int(factor * 5)
         return {
             "name": skill_name,
             "skill_type": "once_heal",
@@ -329,8 +432,8 @@ class RougeEquipment:
         - duration: 999
         - trigger_probability: 100% 或自定
         """
-        skill_name = random.choice(constants.SKILL_NAMES["duration_heal"])
-        heal_val = random.randint(1, 8) + int(factor * 2)
+        skill_name = self.rng.choice(constants.SKILL_NAMES["duration_heal"])
+        heal_val = self.rng.randint(1, 8) + int(factor * 2)
         # 持续回合数
         duration = 999
 
@@ -351,9 +454,9 @@ class RougeEquipment:
         - duration: 1 ~ 2 回合
         - trigger_probability: 10% ~ 30%
         """
-        skill_name = random.choice(constants.SKILL_NAMES["paralysis"])
-        duration = random.randint(1, 2)
-        prob = random.randint(10, 30) + int(factor * 5)
+        skill_name = self.rng.choice(constants.SKILL_NAMES["paralysis"])
+        duration = self.rng.randint(1, 2)
+        prob = self.rng.randint(10, 30) + int(factor * 5)
 
         return {
             "name": skill_name,
@@ -372,9 +475,9 @@ class RougeEquipment:
         - duration: 1 ~ 2 回合
         - trigger_probability: 10% ~ 40%
         """
-        skill_name = random.choice(constants.SKILL_NAMES["active_immunity"])
-        duration = random.randint(1, 2)
-        prob = random.randint(10, 40) + int(factor * 5)
+        skill_name = self.rng.choice(constants.SKILL_NAMES["active_immunity"])
+        duration = self.rng.randint(1, 2)
+        prob = self.rng.randint(10, 40) + int(factor * 5)
         return {
             "name": skill_name,
             "skill_type": "active_immunity",
@@ -393,8 +496,8 @@ class RougeEquipment:
         - duration: 2 ~ 4 回合
         - trigger_probability: 100%
         """
-        skill_name = random.choice(constants.SKILL_NAMES["precedence_immunity"])
-        duration = random.randint(2, 4) + int(factor/2)
+        skill_name = self.rng.choice(constants.SKILL_NAMES["precedence_immunity"])
+        duration = self.rng.randint(2, 4) + int(factor/2)
         return {
             "name": skill_name,
             "skill_type": "precedence_immunity",
@@ -412,9 +515,9 @@ class RougeEquipment:
         - trigger_probability: 10% ~ 50%
         - duration: 0 (一次性触发)
         """
-        skill_name = random.choice(constants.SKILL_NAMES["once_life_steal"])
-        percent = random.randint(20, 30) + int(factor * 3)
-        prob = random.randint(20, 50) + int(factor * 5)
+        skill_name = self.rng.choice(constants.SKILL_NAMES["once_life_steal"])
+        percent = self.rng.randint(20, 30) + int(factor * 3)
+        prob = self.rng.randint(20, 50) + int(factor * 5)
         return {
             "name": skill_name,
             "skill_type": "once_life_steal",
@@ -432,9 +535,9 @@ class RougeEquipment:
         - trigger_probability: 10% ~ 50%
         - duration: 0 (一次性触发)
         """
-        skill_name = random.choice(constants.SKILL_NAMES["duration_life_steal"])
-        percent = random.randint(5, 20) + int(factor * 4)
-        prob = random.randint(10, 50) + int(factor * 5)
+        skill_name = self.rng.choice(constants.SKILL_NAMES["duration_life_steal"])
+        percent = self.rng.randint(5, 20) + int(factor * 4)
+        prob = self.rng.randint(10, 50) + int(factor * 5)
         # 持续回合数
         duration = 999
         return {
@@ -452,14 +555,14 @@ class RougeEquipment:
         """
         '提升属性'技能：随机提升(攻击 / 防御 / 生命) 其中一种。
         """
-        skill_name = random.choice(constants.SKILL_NAMES["promoting_attributes"])
+        skill_name = self.rng.choice(constants.SKILL_NAMES["promoting_attributes"])
         # 随机选择要提升的属性
-        attributes_str = random.randint(self.SKILL_DEPEND_ON_SELF_HP, self.SKILL_DEPEND_ON_SELF_DEFENSE)
-        duration = random.randint(2, 4)
+        attributes_str = self.rng.randint(self.SKILL_DEPEND_ON_SELF_HP, self.SKILL_DEPEND_ON_SELF_DEFENSE)
+        duration = self.rng.randint(2, 4)
         # 提升的数值
-        value = random.randint(5, 15) + int(factor * 3)
+        value = self.rng.randint(5, 15) + int(factor * 3)
         # 触发概率设为随机 20~30%
-        prob = random.randint(20, 30) + int(factor * 3)
+        prob = self.rng.randint(20, 30) + int(factor * 3)
         # 获取属性名
         if attributes_str == self.SKILL_DEPEND_ON_SELF_HP:
             attribute_name = "自身生命"
@@ -483,14 +586,14 @@ class RougeEquipment:
         """
         '削弱属性'技能：随机削弱(攻击 / 防御 / 生命) 其中一种。
         """
-        skill_name = random.choice(constants.SKILL_NAMES["weaken_attributes"])
+        skill_name = self.rng.choice(constants.SKILL_NAMES["weaken_attributes"])
         # 随机选择要削弱的属性
-        attributes_str = random.randint(self.SKILL_DEPEND_ON_OPPONENT_ATTACK, self.SKILL_DEPEND_ON_OPPONENT_DEFENSE)
-        duration = random.randint(2, 4)
+        attributes_str = self.rng.randint(self.SKILL_DEPEND_ON_OPPONENT_ATTACK, self.SKILL_DEPEND_ON_OPPONENT_DEFENSE)
+        duration = self.rng.randint(2, 4)
         # 削弱的数值
-        value = random.randint(5, 15) + int(factor * 3)
+        value = self.rng.randint(5, 15) + int(factor * 3)
         # 触发概率设为随机 20~30%
-        prob = random.randint(20, 30) + int(factor * 10)
+        prob = self.rng.randint(20, 30) + int(factor * 10)
         # 获取属性名
         if attributes_str == self.SKILL_DEPEND_ON_OPPONENT_ATTACK:
             attribute_name = "对手攻击"
@@ -513,9 +616,9 @@ class RougeEquipment:
         '反伤'：在回合进行阶段，对攻击者造成自身防御值的10%-20%。
         同样为100%触发。且仅触发一次
         """
-        skill_name = random.choice(constants.SKILL_NAMES["reflect"])
+        skill_name = self.rng.choice(constants.SKILL_NAMES["reflect"])
         # 提升的数值
-        value = random.randint(5, 20) + int(factor * 8)
+        value = self.rng.randint(5, 20) + int(factor * 8)
 
         return {
             "name": skill_name,
@@ -533,9 +636,9 @@ class RougeEquipment:
         '伤害吸收'：收到任何伤害时，都能够吸收一定比例的伤害，使其无效
         同样为100%触发。且仅触发一次
         """
-        skill_name = random.choice(constants.SKILL_NAMES["assimilate"])
+        skill_name = self.rng.choice(constants.SKILL_NAMES["assimilate"])
         # 提升的数值
-        value = random.randint(5, 20) + int(factor * 4)
+        value = self.rng.randint(5, 20) + int(factor * 4)
 
         return {
             "name": skill_name,
@@ -554,15 +657,7 @@ class RougeEquipment:
             辅助函数：随机获取稀有度
             -------------------------------------------------
         """
-        random.seed(time.time_ns())
-        rand_val = random.random()
-        cumulative = 0.0
-        for (name, prob, skill_count, factor) in constants.RARITY_DATA:
-            cumulative += prob
-            if rand_val <= cumulative:
-                return (name, skill_count, factor)
-        # 浮点误差的兜底
-        return constants.RARITY_DATA[-1][0], constants.RARITY_DATA[-1][2], constants.RARITY_DATA[-1][3]
+        return formulas.pick_rarity(self.rng)
 
     def generate_weapon_name(self, skill_count):
         """
@@ -570,15 +665,14 @@ class RougeEquipment:
             辅助函数：生成武器名称
             -------------------------------------------------
         """
-        random.seed(time.time_ns())
         if skill_count >= 2:
-            weapon_name = random.choice(constants.WEAPON_PREFIX) + random.choice(constants.WEAPON_NAME)
+            weapon_name = self.rng.choice(constants.WEAPON_PREFIX) + self.rng.choice(constants.WEAPON_NAME)
             if skill_count == 4:
                 return f"卓越{weapon_name}"
             else:
                 return weapon_name
         else:
-            return random.choice(constants.WEAPON_NAME)
+            return self.rng.choice(constants.WEAPON_NAME)
 
     def generate_armor_name(self, skill_count):
         """
@@ -586,15 +680,14 @@ class RougeEquipment:
             辅助函数：生成防具名称
             -------------------------------------------------
         """
-        random.seed(time.time_ns())
         if skill_count >= 2:
-            armor_name = random.choice(constants.ARMOR_PREFIX) + random.choice(constants.ARMOR_NAME)
+            armor_name = self.rng.choice(constants.ARMOR_PREFIX) + self.rng.choice(constants.ARMOR_NAME)
             if skill_count == 4:
                 return f"卓越{armor_name}"
             else:
                 return armor_name
         else:
-            return random.choice(constants.ARMOR_NAME)
+            return self.rng.choice(constants.ARMOR_NAME)
 
     def calculate_weapon_attributes(self, level, factor):
         """
@@ -602,12 +695,7 @@ class RougeEquipment:
             辅助函数：武器属性计算
             -------------------------------------------------
         """
-        random.seed(time.time_ns())
-        attack = int(round((10 + 5 * level) * factor * (1 + random.uniform(-0.1, 0.2))))
-        defense = 0
-        max_hp = 0
-        price = price = int(round((100 * level) * factor * 5))
-        return attack, defense, max_hp, price
+        return formulas.weapon_attributes(self.rng, level, factor)
 
     def calculate_armor_attributes(self, level, factor):
         """
@@ -615,12 +703,7 @@ class RougeEquipment:
             辅助函数：防具属性计算
             -------------------------------------------------
         """
-        random.seed(time.time_ns())
-        attack = 0
-        defense = int(round((10 + 5 * level) * factor * (1 + random.uniform(-0.1, 0.2))))
-        max_hp = int(round((10 + 10 * level) * factor * (1 + random.uniform(-0.1, 0.2))))
-        price = int(round((150 * level) * factor * 5))
-        return attack, defense, max_hp, price
+        return formulas.armor_attributes(self.rng, level, factor)
 
     def pick_skills(self, equipment_type, factor, skill_count):
         """
@@ -639,12 +722,11 @@ class RougeEquipment:
             skill_candidates = self.COMMON_SKILLS + self.ARMOR_SKILLS
 
         # 随机抽取 skill_count 个技能(不重复)
-        chosen_funcs = random.sample(skill_candidates, k=skill_count)
+        chosen_funcs = self.rng.sample(skill_candidates, k=skill_count)
 
         # 针对每个技能，生成效果描述
         skill_list = []
         for func in chosen_funcs:
-            random.seed(time.time_ns())
             # 动态调用
             skill_desc = func(factor)
             skill_list.append(skill_desc)
@@ -659,8 +741,7 @@ class RougeEquipment:
         # 1) 确定稀有度
         rarity_name, skill_count, factor = self.pick_rarity()
 
-        random.seed(time.time())
-        get_weapon = random.choice([True, False])
+        get_weapon = self.rng.choice([True, False])
 
         if not equipment_type:
             if get_weapon:
@@ -675,7 +756,7 @@ class RougeEquipment:
             eq_name = self.generate_armor_name(skill_count)
 
         # 3) 生成装备等级
-        equipment_level = random.randint(max(1, level - 10), min(100, level + 10))
+        equipment_level = formulas.equipment_level(self.rng, level)
 
         # 4) 计算基础属性
         if equipment_type == "weapon":
@@ -703,7 +784,8 @@ class RougeEquipment:
 
         logger.info(f"生成随机装备{equipment_type}：{equipment}")
 
-        self.insert_equipment(equipment)
+        # 只生成不写入：掉落物被玩家保留(放入背包或装备)时再调用 insert_equipment 写入，
+        # 直接折算为金币的掉落物不会写入数据库
         return equipment
 
     def get_equipment_info(self, equipment):
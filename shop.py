@@ -5,6 +5,7 @@ import json
 import sqlite3
 from common.log import logger
 from . import constants
+from . import database
 
 
 class Shop:
@@ -29,12 +30,12 @@ class Shop:
 
     def _connect(self) -> None:
         """
-        连接到 SQLite 数据库，启用 WAL 模式以提高并发性，并启用外键约束。
+        从连接池获取 SQLite 数据库连接(WAL 模式，每个线程独立读连接，写入串行化)。
         """
         try:
-            self.conn = sqlite3.connect(self.shop_db_path, check_same_thread=False)
-            # 通过列名访问数据
-            self.conn.row_factory = sqlite3.Row
+            self.db = database.get_pool(self.shop_db_path)
+            # 写连接
+            self.conn = self.db.writer
             logger.debug("成功连接到商店数据库。")
         except sqlite3.Error as e:
             logger.error(f"连接数据库失败: {e}")
@@ -59,7 +60,7 @@ class Shop:
             for item in constants.SHOP_ITEMS
         ]
         try:
-            with self.conn:
+            with self.db.write_lock, self.conn:
                 # 创建数据表
                 self.conn.execute('''
                 CREATE TABLE IF NOT EXISTS shop (
@@ -101,7 +102,7 @@ class Shop:
         :return: 返回查询到的所有条目（列表形式）
         """
         try:
-            cursor = self.conn.cursor()
+            cursor = self.db.reader().cursor()
 
             # 构造查询语句，读取所有条目
             query = f"SELECT * FROM {table_name}"
@@ -257,48 +258,30 @@ class Shop:
         if result:
             rarity, type = result
 
-        # 获取背包中的物品
-        inventory = player.inventory
-        if not inventory:
-            return "🤷‍♂️ 背包是空的,没有可以出售的物品"
-
-        for_order_property = {}
+        inventory_store = self.game.inventory_store
         # 批量出售
         if rarity > -1:
-            for item_name in inventory:
-                if inventory[item_name]["type"] == type:
-                    # 获取道具稀有度
-                    item_rarity = inventory[item_name]["rarity"]
-                    # 检查稀有度
-                    if item_rarity <= rarity:
-                        # 稀有度低于预售值，添加到待出售列表
-                        for_order_property[item_name] = inventory[item_name]["amount"]
-                else:
-                    continue
-
-            total_gold = 0
-            # 计算售出可得金币数量
-            for item_name in for_order_property:
-                # 获取道具的价值
-                total_gold += inventory[item_name]["price"] * for_order_property[item_name]
-                # 删除被出售的道具
-                inventory.pop(item_name)
-
-            # 售出后实际所得
-            actual_gold = int(total_gold * 0.8)
-
-            # 计算更新后的金币
-            player_update_gold = player.gold + actual_gold
+            # 删除物品与增加金币在同一个事务中提交
+            with self.game.transaction():
+                # 按类型和稀有度一次性选出并删除待出售的物品
+                sold_items = inventory_store.delete_matching(user_id, type, rarity)
+                if not sold_items and inventory_store.is_empty(user_id):
+                    return "🤷‍♂️ 背包是空的,没有可以出售的物品"
+
+                # 计算售出可得金币数量
+                total_gold = sum(price * amount for _, amount, price in sold_items)
+                # 售出后实际所得
+                actual_gold = int(total_gold * 0.8)
+                # 增加金币
+                self.game._update_player_data(player.user_id, {"gold": player.gold + actual_gold})
 
             # 生成出售报告
             report.append("🏪 出售所有物品成功:")
-            for item_name in for_order_property:
-                report.append(f"   - [{item_name}]x{for_order_property[item_name]}")
+            for item_name, amount, _ in sold_items:
+                report.append(f"   - [{item_name}]x{amount}")
             report.append(f"💰 基础价值：{total_gold}金币")
             report.append(f"♻️ 回收比例：80%")
             report.append(f"\n共获得 {actual_gold} 金币")
-            # 设置售出标志
-            sale_flag = True
         # 单个出售
         elif content.startswith("出售"):
             try:
@@ -308,16 +291,16 @@ class Shop:
             except (IndexError, ValueError):
                 return "❌ 出售格式错误！请使用: 出售 物品名 [数量]"
 
-            remain_num = 0
             # 获取物品属性
-            if item_name in inventory:
-                item_price = inventory[item_name]["price"]
-                item_hold_num = inventory[item_name]["amount"]
+            item = inventory_store.get_item(user_id, item_name)
+            if item is not None:
+                item_price = item["price"]
+                item_hold_num = item["amount"]
                 if item_hold_num < amount:
                     report.append(f"🎒 背包中只有 {item_hold_num} 个 {item_name}\n")
                     amount = item_hold_num
-                else:
-                    remain_num = item_hold_num - amount
+            elif inventory_store.is_empty(user_id):
+                return "🤷‍♂️ 背包是空的,没有可以出售的物品"
             else:
                 return f"🤷‍♂️ 玩家 [{player.nickname}] 的背包中没有物品 [{item_name}]"
 
@@ -325,10 +308,8 @@ class Shop:
             sell_price = int(item_price * 0.8)
             total_sell_price = sell_price * amount
 
-            if remain_num == 0:
-                inventory.pop(item_name)
-            else:
-                inventory[item_name]["amount"] = remain_num
+            # 扣除出售的数量，全部售出时删除该物品
+            inventory_store.remove(user_id, item_name, amount)
 
             # 计算更新后的金币
             player_update_gold = player.gold + total_sell_price
@@ -346,7 +327,6 @@ class Shop:
         if sale_flag:
             # 更新玩家数据
             updates = {
-                "inventory": inventory,
                 "gold": player_update_gold
             }
             # 保存更新后的玩家数据
@@ -382,9 +362,6 @@ class Shop:
         if not player:
             return "🤷‍♂️ 您还没有注册游戏"
 
-        # 获取玩家背包
-        inventory = player.inventory
-
         for item in self.shop_items:
             if item["name"] == item_name:
                 item_uuid = item["uuid"]
@@ -415,16 +392,11 @@ class Shop:
 
         # 更新玩家金币和背包
         player.gold -= total_price
-        if item_name in inventory:
-            inventory[item_name]["amount"] += amount
-        else:
-            item_dict["amount"] = amount
-            inventory[item_name] = item_dict
+        self.game.inventory_store.add(user_id, item_name, item_dict, amount)
 
         # 保存数据更新
         self.game._update_player_data(player.user_id, {
-            "gold": player.gold,
-            "inventory": inventory
+            "gold": player.gold
         })
 
         # 构建操作提示
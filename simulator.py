@@ -0,0 +1,224 @@
+"""
+数值平衡模拟器：
+    离线批量模拟冒险(PvE)与玩家对决(PvP)，统计各等级的胜率、回合数、每分钟金币/经验与掉落率，
+    用于调整 constants.py 中的成长、怪物与掉落参数。只依赖 constants、formulas 与 battle_engine，
+    不需要 chatgpt-on-wechat 运行环境，在插件目录下直接运行：
+
+        python simulator.py --levels 1-100 --battles 100000
+        python simulator.py --mode pvp --levels 10,20,30 --opponent-offset 5 --equipment random
+"""
+import sys
+import json
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+if __package__:
+    from . import constants
+    from . import formulas
+    from .battle_engine import PveBattle, PvpDuel
+else:
+    # 以脚本方式运行时插件目录就是模块搜索路径
+    import constants
+    import formulas
+    from battle_engine import PveBattle, PvpDuel
+
+
+# 每个任务模拟的战斗场数(任务越小，进程池的负载越均衡)
+BATCH_SIZE = 5000
+
+
+def player_stats(rng: random.Random, level: int, equipment: str, rarity=None) -> dict:
+    """
+    生成指定等级的玩家属性。
+
+    :param equipment: none 不带装备；random 按掉落规则随机生成武器与防具
+    :param rarity: 固定装备稀有度(RARITY_DATA 下标)，None 表示按掉落概率随机
+    """
+    attack, defense, max_hp = formulas.player_base_attributes(level)
+    if equipment == 'random':
+        # 与掉落装备相同：先抽稀有度，再确定装备等级与属性
+        factor = _pick_factor(rng, rarity)
+        weapon_attack, _, _, _ = formulas.weapon_attributes(rng, formulas.equipment_level(rng, level), factor)
+        attack += weapon_attack
+        factor = _pick_factor(rng, rarity)
+        _, armor_defense, armor_max_hp, _ = formulas.armor_attributes(rng, formulas.equipment_level(rng, level), factor)
+        defense += armor_defense
+        max_hp += armor_max_hp
+    return {'name': f"Lv.{level}", 'hp': max_hp, 'attack': attack, 'defense': defense}
+
+
+def _pick_factor(rng: random.Random, rarity=None) -> float:
+    """抽取装备属性系数，rarity 为 None 时按 RARITY_DATA 的概率随机"""
+    if rarity is not None:
+        return constants.RARITY_DATA[rarity][3]
+    return formulas.pick_rarity(rng)[2]
+
+
+def generate_monster(rng: random.Random, level: int) -> dict:
+    """随机生成怪物(场景随机，等级在玩家等级上下 2 级内浮动)"""
+    scene = rng.choice(list(constants.ADVENTURE_MAP))
+    monster_level = max(1, level + rng.randint(-2, 2))
+    monster = formulas.scale_monster(rng.choice(constants.ADVENTURE_MONSTERS[scene]), monster_level)
+    if formulas.is_mutant(rng):
+        monster = formulas.mutate_monster(monster)
+    monster['max_hp'] = monster['hp']
+    return monster
+
+
+def simulate_pve(level: int, battles: int, equipment: str, rarity, seed) -> dict:
+    """模拟一批冒险战斗，返回累计值"""
+    rng = random.Random(seed)
+    totals = {'battles': 0, 'wins': 0, 'rounds': 0, 'gold': 0, 'exp': 0,
+              'equipment_drops': 0, 'consumable_drops': 0}
+    for _ in range(battles):
+        player = player_stats(rng, level, equipment, rarity)
+        monster = generate_monster(rng, level)
+        result = PveBattle(rng, player, monster, keep_log=False).run()
+        totals['battles'] += 1
+        totals['rounds'] += result['round_num']
+        if result['player_hp'] > 0:
+            totals['wins'] += 1
+            exp, gold = formulas.battle_rewards(level, monster)
+            totals['exp'] += exp
+            totals['gold'] += gold
+            if rng.randint(1, 100) <= constants.EQUIPMENT_DROP_PROBABILITY:
+                totals['equipment_drops'] += 1
+            if rng.randint(1, 100) <= constants.CONSUMABLE_DROP_PROBABILITY:
+                totals['consumable_drops'] += 1
+    return totals
+
+
+def simulate_pvp(level: int, battles: int, equipment: str, rarity, seed, opponent_offset: int) -> dict:
+    """模拟一批玩家对决(挑战者等级为 level)，返回累计值"""
+    rng = random.Random(seed)
+    opponent_level = min(constants.PLAYER_MAX_LEVEL, max(1, level + opponent_offset))
+    totals = {'battles': 0, 'wins': 0, 'rounds': 0, 'winner_hp': 0}
+    for _ in range(battles):
+        challenger = player_stats(rng, level, equipment, rarity)
+        opponent = player_stats(rng, opponent_level, equipment, rarity)
+        result = PvpDuel(rng, challenger, opponent, keep_log=False).run()
+        totals['battles'] += 1
+        totals['rounds'] += result['round_num']
+        if result['winner'] == 1:
+            totals['wins'] += 1
+            totals['winner_hp'] += result['hp_1']
+        else:
+            totals['winner_hp'] += result['hp_2']
+    return totals
+
+
+def _run_task(task):
+    mode, level, battles, equipment, rarity, seed, opponent_offset = task
+    if mode == 'pvp':
+        return level, simulate_pvp(level, battles, equipment, rarity, seed, opponent_offset)
+    return level, simulate_pve(level, battles, equipment, rarity, seed)
+
+
+def summarize(mode: str, totals: dict) -> dict:
+    """把累计值换算成报告指标"""
+    battles = max(1, totals['battles'])
+    summary = {
+        'battles': totals['battles'],
+        'win_rate': totals['wins'] / battles,
+        'avg_rounds': totals['rounds'] / battles,
+    }
+    if mode == 'pvp':
+        summary['avg_winner_hp'] = totals['winner_hp'] / battles
+        return summary
+    # 按冒险冷却时间连续冒险估算(每场战斗前满血)
+    battles_per_minute = 60 / max(1, constants.ADVENTURE_COOLDOWN)
+    summary.update({
+        'gold_per_minute': totals['gold'] / battles * battles_per_minute,
+        'exp_per_minute': totals['exp'] / battles * battles_per_minute,
+        'equipment_drop_rate': totals['equipment_drops'] / battles,
+        'consumable_drop_rate': totals['consumable_drops'] / battles,
+    })
+    return summary
+
+
+def run_simulation(mode: str, levels, battles: int, equipment: str = 'none', rarity=None,
+                   opponent_offset: int = 0, workers=None, seed=None) -> dict:
+    """
+    将模拟任务分发到进程池并汇总。
+
+    :return: 等级 -> 报告指标
+    """
+    seeds = random.Random(seed)
+    tasks = []
+    for level in levels:
+        remaining = battles
+        while remaining > 0:
+            batch = min(BATCH_SIZE, remaining)
+            tasks.append((mode, level, batch, equipment, rarity, seeds.getrandbits(64), opponent_offset))
+            remaining -= batch
+
+    results = {level: {} for level in levels}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for level, totals in executor.map(_run_task, tasks):
+            merged = results[level]
+            for key, value in totals.items():
+                merged[key] = merged.get(key, 0) + value
+    return {level: summarize(mode, totals) for level, totals in results.items()}
+
+
+def parse_levels(text: str) -> list:
+    """解析等级参数，例如 "1-100"、"10,20,30"、"1-10,50" """
+    levels = set()
+    for part in text.split(','):
+        part = part.strip()
+        if '-' in part:
+            start, end = part.split('-', 1)
+            levels.update(range(int(start), int(end) + 1))
+        elif part:
+            levels.add(int(part))
+    levels = sorted(level for level in levels if 1 <= level <= constants.PLAYER_MAX_LEVEL)
+    if not levels:
+        raise argparse.ArgumentTypeError(f"无效的等级范围: {text}")
+    return levels
+
+
+def format_report(mode: str, report: dict) -> str:
+    """格式化为文本表格"""
+    if mode == 'pvp':
+        lines = [f"{'等级':>4} {'场次':>9} {'胜率':>8} {'回合':>8} {'胜者剩余生命':>12}"]
+        for level, s in report.items():
+            lines.append(f"{level:>6} {s['battles']:>11} {s['win_rate']:>10.2%} {s['avg_rounds']:>10.2f} {s['avg_winner_hp']:>18.1f}")
+    else:
+        lines = [f"{'等级':>4} {'场次':>9} {'胜率':>8} {'回合':>8} {'金币/分':>10} {'经验/分':>10} {'装备掉落':>8} {'消耗品掉落':>8}"]
+        for level, s in report.items():
+            lines.append(
+                f"{level:>6} {s['battles']:>11} {s['win_rate']:>10.2%} {s['avg_rounds']:>10.2f} "
+                f"{s['gold_per_minute']:>13.1f} {s['exp_per_minute']:>13.1f} "
+                f"{s['equipment_drop_rate']:>12.2%} {s['consumable_drop_rate']:>14.2%}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="冒险/PVP 数值平衡模拟器")
+    parser.add_argument('--mode', choices=['pve', 'pvp'], default='pve', help="模拟冒险(pve)或玩家对决(pvp)")
+    parser.add_argument('--levels', type=parse_levels, default=parse_levels('1-100'), help="玩家等级，例如 1-100 或 10,20,30")
+    parser.add_argument('--battles', type=int, default=10000, help="每个等级模拟的战斗场数")
+    parser.add_argument('--equipment', choices=['none', 'random'], default='none', help="玩家装备：不带装备或按掉落规则随机生成")
+    parser.add_argument('--rarity', type=int, choices=range(len(constants.RARITY_DATA)), default=None,
+                        help="固定装备稀有度(RARITY_DATA 下标)，默认按掉落概率随机")
+    parser.add_argument('--opponent-offset', type=int, default=0, help="PVP 对手与挑战者的等级差")
+    parser.add_argument('--workers', type=int, default=None, help="进程数，默认等于 CPU 核数")
+    parser.add_argument('--seed', type=int, default=None, help="随机数种子(指定后结果可复现)")
+    parser.add_argument('--json', action='store_true', help="以 JSON 格式输出")
+    args = parser.parse_args(argv)
+
+    report = run_simulation(
+        args.mode, args.levels, args.battles, equipment=args.equipment, rarity=args.rarity,
+        opponent_offset=args.opponent_offset, workers=args.workers, seed=args.seed
+    )
+    if args.json:
+        print(json.dumps({str(level): summary for level, summary in report.items()}, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(args.mode, report))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+延迟写入缓冲的回归测试：写入过程中读取缓冲的字段不能回退到数据库中的旧值。
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import threading
+import unittest
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# write_behind 只依赖 common.log，使用基准测试的替身
+sys.path.insert(0, os.path.join(PLUGIN_DIR, "benchmarks", "stubs"))
+sys.path.insert(0, PLUGIN_DIR)
+
+from write_behind import WriteBehindBuffer
+
+
+class BlockingFlush:
+    """写入函数替身：通知写入已开始，然后等待放行"""
+
+    def __init__(self, fail=False):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.fail = fail
+        self.written = []
+
+    def __call__(self, updates):
+        self.started.set()
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("写入失败")
+        self.written.append(updates)
+
+
+class WriteBehindFlushTest(unittest.TestCase):
+
+    def start_flush(self, buffer):
+        """在后台线程中执行 flush，返回线程与保存异常的列表"""
+        errors = []
+
+        def run():
+            try:
+                buffer.flush()
+            except Exception as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread, errors
+
+    def test_fields_visible_while_flushing(self):
+        callback = BlockingFlush()
+        buffer = WriteBehindBuffer(['position', 'last_attack'], callback, interval=1000)
+        buffer.put('A', {'position': 7, 'last_attack': 100})
+        thread, errors = self.start_flush(buffer)
+        self.assertTrue(callback.started.wait(5))
+        # 写入过程中仍能读到正在写入的值
+        self.assertEqual(buffer.get('A'), {'position': 7, 'last_attack': 100})
+        # 写入过程中的新值优先
+        buffer.put('A', {'position': 8})
+        self.assertEqual(buffer.get('A'), {'position': 8, 'last_attack': 100})
+        callback.release.set()
+        thread.join(5)
+        self.assertEqual(errors, [])
+        self.assertEqual(callback.written, [{'A': {'position': 7, 'last_attack': 100}}])
+        # 写入完成后只剩下写入期间的新值
+        self.assertEqual(buffer.get('A'), {'position': 8})
+
+    def test_failed_flush_keeps_fields(self):
+        callback = BlockingFlush(fail=True)
+        buffer = WriteBehindBuffer(['position'], callback, interval=1000)
+        buffer.put('A', {'position': 7})
+        thread, errors = self.start_flush(buffer)
+        self.assertTrue(callback.started.wait(5))
+        self.assertEqual(buffer.get('A'), {'position': 7})
+        callback.release.set()
+        thread.join(5)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(buffer.get('A'), {'position': 7})
+
+    def test_discard_while_flushing(self):
+        callback = BlockingFlush()
+        buffer = WriteBehindBuffer(['position'], callback, interval=1000)
+        buffer.put('A', {'position': 7})
+        buffer.put('B', {'position': 3})
+        thread, errors = self.start_flush(buffer)
+        self.assertTrue(callback.started.wait(5))
+        buffer.discard('A')
+        self.assertEqual(buffer.get('A'), {})
+        self.assertEqual(buffer.get('B'), {'position': 3})
+        callback.release.set()
+        thread.join(5)
+        self.assertEqual(errors, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
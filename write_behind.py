@@ -0,0 +1,134 @@
+import threading
+from common.log import logger
+
+
+class WriteBehindBuffer:
+    """
+    低价值高频字段(冷却时间戳、位置等)的延迟写入缓冲：
+        1) 同一玩家的多次更新在缓冲中合并，只保留最新的值
+        2) 后台线程每隔 interval 毫秒把所有玩家的缓冲更新在一个事务中写入
+        3) 读取玩家数据时需要用 get() 取出缓冲中的值覆盖数据库中的旧值，
+           正在写入的更新在提交完成前仍然可以读到
+        4) 停止时会把剩余的更新全部写入
+    """
+
+    def __init__(self, fields, flush_callback, interval: int, write_lock=None):
+        """
+        :param fields: 允许延迟写入的字段
+        :param flush_callback: 写入函数，参数为 user_id -> 更新字段，写入失败时应抛出异常
+        :param interval: 写入间隔(毫秒)
+        :param write_lock: 数据库写入锁(可重入)，取出缓冲到写入完成期间持有，
+                           避免其他线程在此期间写入的新值被旧值覆盖
+        """
+        self.fields = frozenset(fields)
+        self._flush_callback = flush_callback
+        self.interval = interval
+        self._write_lock = write_lock if write_lock is not None else threading.RLock()
+        # user_id -> 尚未写入的字段
+        self._pending = {}
+        # 正在写入的更新(提交完成前 get() 仍需返回，避免读到数据库中的旧值)
+        self._flushing = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        # 统计
+        self.buffered = 0
+        self.flushes = 0
+        self.flushed_players = 0
+
+    def start(self) -> None:
+        """启动后台写入线程"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="textGame-write-behind", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval / 1000):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"延迟写入玩家数据失败，将在下次重试: {e}")
+
+    def stop(self) -> None:
+        """停止后台线程并写入剩余的更新"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def put(self, user_id: str, fields: dict) -> None:
+        """合并玩家的更新(fields 中只能包含允许延迟写入的字段)"""
+        with self._lock:
+            self._pending.setdefault(user_id, {}).update(fields)
+            self.buffered += 1
+
+    def get(self, user_id: str) -> dict:
+        """获取玩家尚未写入的字段(副本，包括正在写入的字段，缓冲中较新的值优先)"""
+        with self._lock:
+            flushing = self._flushing.get(user_id)
+            pending = self._pending.get(user_id)
+            if flushing and pending:
+                return {**flushing, **pending}
+            if flushing:
+                return dict(flushing)
+            return dict(pending) if pending else {}
+
+    def take(self, user_id: str) -> dict:
+        """取出并移除玩家尚未写入的字段，由调用方在持有写入锁时一并写入"""
+        with self._lock:
+            return self._pending.pop(user_id, None) or {}
+
+    def restore(self, updates: dict) -> None:
+        """
+        把写入失败的更新放回缓冲，缓冲中已有的字段较新，不会被覆盖。
+
+        :param updates: user_id -> 更新字段
+        """
+        with self._lock:
+            for user_id, fields in updates.items():
+                newer = self._pending.get(user_id)
+                self._pending[user_id] = {**fields, **newer} if newer else fields
+
+    def discard(self, user_id: str) -> None:
+        """丢弃玩家尚未写入的字段(例如玩家注销时)"""
+        with self._lock:
+            self._pending.pop(user_id, None)
+            if user_id in self._flushing:
+                # 写入线程正在遍历原字典，替换而不是修改
+                self._flushing = {key: value for key, value in self._flushing.items() if key != user_id}
+
+    def flush(self) -> None:
+        """
+        把所有缓冲的更新交给 flush_callback 写入。
+        写入失败时放回缓冲，期间产生的更新较新，不会被覆盖。
+        写入完成前这些更新保留在 _flushing 中，get() 仍能读到。
+        """
+        with self._write_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                updates = self._pending
+                self._flushing = updates
+                self._pending = {}
+            try:
+                self._flush_callback(updates)
+            except Exception:
+                self.restore(updates)
+                raise
+            finally:
+                with self._lock:
+                    self._flushing = {}
+        with self._lock:
+            self.flushes += 1
+            self.flushed_players += len(updates)
+
+    def get_stats(self) -> dict:
+        """获取缓冲统计"""
+        with self._lock:
+            return {
+                'pending_players': len(self._pending),
+                'buffered': self.buffered,
+                'flushes': self.flushes,
+                'flushed_players': self.flushed_players,
+            }